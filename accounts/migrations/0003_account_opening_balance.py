@@ -0,0 +1,49 @@
+# Generated by Django 6.0.1 on 2026-10-18 06:25
+
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.db.models import Case, DecimalField, F, Sum, Value, When
+from django.db.models.functions import Coalesce
+
+
+def set_opening_balances(apps, schema_editor):
+    """Derive each opening balance from the current balance and history."""
+    Account = apps.get_model('accounts', 'Account')
+    accounts = Account.objects.annotate(
+        net=Coalesce(
+            Sum(Case(
+                When(transactions__transaction_type='income', then=F('transactions__amount')),
+                default=-F('transactions__amount'),
+            )),
+            Value(Decimal('0')),
+            output_field=DecimalField(max_digits=14, decimal_places=2),
+        ),
+    ).order_by()
+    batch = []
+    for account in accounts.iterator(chunk_size=1000):
+        # SQLite sums decimals as floats; round back to cents.
+        account.opening_balance = (account.balance - account.net).quantize(Decimal('0.01'))
+        batch.append(account)
+        if len(batch) >= 1000:
+            Account.objects.bulk_update(batch, ['opening_balance'])
+            batch = []
+    if batch:
+        Account.objects.bulk_update(batch, ['opening_balance'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0002_account_account_user_active_name_idx'),
+        ('transactions', '0004_monthlysummary'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='account',
+            name='opening_balance',
+            field=models.DecimalField(decimal_places=2, default=0, help_text='Saldo antes das transações registradas.', max_digits=12, verbose_name='saldo inicial'),
+        ),
+        migrations.RunPython(set_opening_balances, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 6.0.1 on 2026-10-18 06:33
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0003_account_opening_balance'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='account',
+            name='account_user_active_name_idx',
+        ),
+        migrations.AddIndex(
+            model_name='account',
+            index=models.Index(fields=['user', 'name'], name='account_user_name_idx'),
+        ),
+    ]
@@ -15,7 +15,9 @@ class Account(models.Model):
 
     Each user can have multiple accounts of different types.
     The balance is updated whenever transactions are created,
-    edited, or deleted (handled in the transactions app).
+    edited, or deleted (handled in the transactions app), and always
+    equals opening_balance plus the net of the account's transactions
+    (checked by ``manage.py reconcile_balances``).
     """
 
     ACCOUNT_TYPES = [
@@ -47,6 +49,13 @@ class Account(models.Model):
         default=0,
         verbose_name='saldo',
     )
+    opening_balance = models.DecimalField(
+        max_digits=12,
+        decimal_places=2,
+        default=0,
+        verbose_name='saldo inicial',
+        help_text='Saldo antes das transações registradas.',
+    )
     color = models.CharField(
         max_length=7,
         default='#06b6d4',
@@ -70,6 +79,17 @@ class Account(models.Model):
         verbose_name = 'conta'
         verbose_name_plural = 'contas'
         ordering = ['name']
+        indexes = [
+            # Serves both the account lists/choices (all accounts by
+            # name) and the dashboard (active ones, filtered while
+            # walking the index). SQLite renders ``is_active=True`` as a
+            # bare column test, which a (user, is_active, name) index
+            # cannot use for ordering.
+            models.Index(
+                fields=['user', 'name'],
+                name='account_user_name_idx',
+            ),
+        ]
 
     def __str__(self):
         return self.name
@@ -4,8 +4,11 @@ Unit tests for the accounts app.
 Tests Account model, CRUD views, and AccountForm.
 """
 from decimal import Decimal
+from io import StringIO
+from unittest import mock
 
 from django.contrib.auth import get_user_model
+from django.core.management import call_command
 from django.test import Client, TestCase
 from django.urls import reverse
 
@@ -130,15 +133,56 @@ class AccountViewTests(TestCase):
         )
         self.assertEqual(response.status_code, 404)
 
+    def test_data_version_moves_after_the_save(self):
+        """The cache is invalidated once the new account is written."""
+        self.client.force_login(self.user_a)
+        seen = []
+
+        def invalidate(user_id):
+            seen.append(Account.objects.filter(user=self.user_a, name='Nova').exists())
+
+        with mock.patch('accounts.views.invalidate_user_data', invalidate):
+            self.client.post(reverse('accounts:create'), {
+                'name': 'Nova', 'account_type': 'checking', 'balance': '10.00', 'color': '#06b6d4',
+            })
+        self.assertEqual(seen, [True])
+
+    def test_reference_data_moves_after_the_save(self):
+        """The form choices are refreshed once the new account is written."""
+        self.client.force_login(self.user_a)
+        seen = []
+
+        def invalidate(user_id):
+            seen.append(Account.objects.filter(user=self.user_a, name='Nova').exists())
+
+        with mock.patch('accounts.views.invalidate_reference_data', invalidate):
+            self.client.post(reverse('accounts:create'), {
+                'name': 'Nova', 'account_type': 'checking', 'balance': '10.00', 'color': '#06b6d4',
+            })
+        self.assertEqual(seen, [True])
+
     def test_delete_own_account_succeeds(self):
-        """User can delete their own account."""
+        """User can delete their own account (in the background)."""
         self.client.force_login(self.user_a)
         response = self.client.post(
             reverse('accounts:delete', args=[self.account_a.pk])
         )
         self.assertEqual(response.status_code, 302)
+        self.account_a.refresh_from_db()
+        self.assertFalse(self.account_a.is_active)
+        call_command('process_deletions', stdout=StringIO())
         self.assertFalse(Account.objects.filter(pk=self.account_a.pk).exists())
 
+    def test_account_being_deleted_shows_progress(self):
+        """The list shows the deletion instead of the edit/delete links."""
+        self.client.force_login(self.user_a)
+        self.client.post(reverse('accounts:delete', args=[self.account_a.pk]))
+        response = self.client.get(reverse('accounts:list'))
+        self.assertContains(response, 'Excluindo... 0%')
+        self.assertNotContains(response, reverse('accounts:edit', args=[self.account_a.pk]))
+        response = self.client.post(reverse('accounts:delete', args=[self.account_a.pk]))
+        self.assertEqual(response.status_code, 404)
+
 
 class AccountFormTests(TestCase):
     """Tests for AccountForm validation."""
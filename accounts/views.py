@@ -5,15 +5,22 @@ Provides CRUD views for managing bank accounts:
 - AccountListView: Lists all accounts for the logged-in user.
 - AccountCreateView: Creates a new account for the logged-in user.
 - AccountUpdateView: Edits an existing account owned by the logged-in user.
-- AccountDeleteView: Deletes an account owned by the logged-in user.
+- AccountDeleteView: Schedules the deletion of an account owned by the
+  logged-in user; its transactions are removed in the background.
 """
 from django.contrib import messages
 from django.contrib.auth.mixins import LoginRequiredMixin
+from django.db import transaction as db_transaction
+from django.db.models import Prefetch
+from django.http import HttpResponseRedirect
 from django.urls import reverse_lazy
 from django.views.generic import CreateView, DeleteView, ListView, UpdateView
 
 from accounts.forms import AccountForm
 from accounts.models import Account
+from core.cache import invalidate_reference_data, invalidate_user_data
+from transactions.deletion import schedule_account_deletion
+from transactions.snapshots import shift_snapshots
 
 
 class AccountListView(LoginRequiredMixin, ListView):
@@ -24,7 +31,10 @@ class AccountListView(LoginRequiredMixin, ListView):
     context_object_name = 'accounts'
 
     def get_queryset(self):
-        return Account.objects.filter(user=self.request.user).order_by('name')
+        # Accounts being deleted stay listed, with the job's progress.
+        return Account.objects.filter(user=self.request.user).prefetch_related(
+            Prefetch('deletion_jobs', to_attr='deletions'),
+        ).order_by('name')
 
 
 class AccountCreateView(LoginRequiredMixin, CreateView):
@@ -37,8 +47,14 @@ class AccountCreateView(LoginRequiredMixin, CreateView):
 
     def form_valid(self, form):
         form.instance.user = self.request.user
+        form.instance.opening_balance = form.instance.balance
+        response = super().form_valid(form)
+        # After the save: a version bumped earlier could be cached with
+        # the old data by a concurrent request.
+        invalidate_user_data(self.request.user.pk)
+        invalidate_reference_data(self.request.user.pk)
         messages.success(self.request, 'Conta criada com sucesso!')
-        return super().form_valid(form)
+        return response
 
 
 class AccountUpdateView(LoginRequiredMixin, UpdateView):
@@ -50,23 +66,51 @@ class AccountUpdateView(LoginRequiredMixin, UpdateView):
     success_url = reverse_lazy('accounts:list')
 
     def get_queryset(self):
-        return Account.objects.filter(user=self.request.user)
+        return Account.objects.filter(user=self.request.user, deletion_jobs__isnull=True)
+
+    def get_object(self, queryset=None):
+        obj = super().get_object(queryset)
+        # The form writes the posted balance onto the instance while
+        # validating, so remember the stored one first.
+        self.original_balance = obj.balance
+        return obj
 
     def form_valid(self, form):
+        # Editing the balance is a manual correction: move the opening
+        # balance by the same amount so the account still reconciles.
+        correction = form.instance.balance - self.original_balance
+        form.instance.opening_balance += correction
+        with db_transaction.atomic():
+            response = super().form_valid(form)
+            shift_snapshots(self.object.pk, correction)
+        invalidate_user_data(self.request.user.pk)
+        invalidate_reference_data(self.request.user.pk)
         messages.success(self.request, 'Conta atualizada com sucesso!')
-        return super().form_valid(form)
+        return response
 
 
 class AccountDeleteView(LoginRequiredMixin, DeleteView):
-    """Delete a bank account owned by the logged-in user."""
+    """
+    Delete a bank account owned by the logged-in user.
+
+    Only marks the account and schedules a DeletionJob, so the request
+    returns at once however long the history; ``process_deletions``
+    removes the transactions and then the account.
+    """
 
     model = Account
     template_name = 'accounts/account_confirm_delete.html'
     success_url = reverse_lazy('accounts:list')
 
     def get_queryset(self):
-        return Account.objects.filter(user=self.request.user)
+        return Account.objects.filter(user=self.request.user, deletion_jobs__isnull=True)
 
     def form_valid(self, form):
-        messages.success(self.request, 'Conta excluída com sucesso!')
-        return super().form_valid(form)
+        schedule_account_deletion(self.object)
+        invalidate_user_data(self.request.user.pk)
+        invalidate_reference_data(self.request.user.pk)
+        messages.success(
+            self.request,
+            'A conta está sendo excluída. Acompanhe o andamento na lista de contas.',
+        )
+        return HttpResponseRedirect(self.get_success_url())
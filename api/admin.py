@@ -0,0 +1,20 @@
+from django.contrib import admin
+
+from api.models import Tombstone
+
+
+@admin.register(Tombstone)
+class TombstoneAdmin(admin.ModelAdmin):
+    """Read-only admin for the delete tombstones (maintained automatically)."""
+
+    list_display = ('deleted_at', 'user', 'resource', 'object_id')
+    list_filter = ('resource',)
+    date_hierarchy = 'deleted_at'
+    list_per_page = 25
+    list_select_related = ('user',)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
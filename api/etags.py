@@ -0,0 +1,38 @@
+"""
+ETags of the Finanpy API responses.
+
+An API response only changes when the user's rows of the resource
+change, so its ETag is derived from the latest ``updated_at`` and the
+number of rows (which catches deletions), plus the query string. That
+validator is cached under the user's data version (see core.cache), so
+an unchanged poll is answered with a 304 without touching the
+resource's table. After a write, computing it again reads the newest
+row and counts the rows through the (user, updated_at) index.
+"""
+import hashlib
+
+from django.core.cache import cache
+from django.utils.http import urlencode
+
+from core.cache import user_cache_key
+
+VALIDATOR_TIMEOUT = 60 * 60
+
+
+def data_validator(user, resource, queryset):
+    """Return (latest updated_at, row count) of the user's rows of a resource."""
+    key = user_cache_key('api-validator', user.pk, resource)
+    validator = cache.get(key)
+    if validator is None:
+        latest = queryset.order_by('-updated_at').values_list('updated_at', flat=True).first()
+        validator = (latest.isoformat() if latest else '', queryset.count())
+        cache.set(key, validator, VALIDATOR_TIMEOUT)
+    return validator
+
+
+def resource_etag(request, resource, queryset):
+    """Return the strong ETag of a request for the user's rows of a resource."""
+    latest, count = data_validator(request.user, resource, queryset)
+    query = urlencode(sorted(request.GET.lists()), doseq=True)
+    digest = hashlib.md5(f'{resource}:{latest}:{count}:{query}'.encode()).hexdigest()
+    return f'"{digest}"'
@@ -0,0 +1,34 @@
+"""
+Remove the delete tombstones older than the retention.
+
+Meant to run periodically (e.g. daily). Sync cursors older than the
+retention are answered with 410 Gone, so their clients sync again from
+the start instead of missing the removed deletions.
+
+Usage:
+    python manage.py compact_tombstones
+    python manage.py compact_tombstones --days 30
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from api.tombstones import TOMBSTONE_RETENTION_DAYS, compact_tombstones
+
+
+class Command(BaseCommand):
+    help = 'Remove os registros de exclusão mais antigos que a retenção.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=TOMBSTONE_RETENTION_DAYS,
+            help=f'Dias de retenção (padrão: {TOMBSTONE_RETENTION_DAYS}).',
+        )
+
+    def handle(self, *args, **options):
+        if options['days'] < 1:
+            raise CommandError('A retenção deve ser de pelo menos 1 dia.')
+        deleted = compact_tombstones(options['days'])
+        self.stdout.write(self.style.SUCCESS(
+            f'{deleted} registro(s) de exclusão removido(s).'
+        ))
@@ -0,0 +1,33 @@
+# Generated by Django 6.0.1 on 2026-10-18 06:52
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Tombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('resource', models.PositiveSmallIntegerField(choices=[(1, 'accounts'), (2, 'categories'), (3, 'transactions')], verbose_name='recurso')),
+                ('object_id', models.PositiveBigIntegerField(verbose_name='id do objeto')),
+                ('deleted_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='excluído em')),
+                ('user', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='tombstones', to=settings.AUTH_USER_MODEL, verbose_name='usuário')),
+            ],
+            options={
+                'verbose_name': 'exclusão registrada',
+                'verbose_name_plural': 'exclusões registradas',
+                'indexes': [models.Index(fields=['user', 'id'], name='tombstone_user_id_idx'), models.Index(fields=['deleted_at'], name='tombstone_deleted_at_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,69 @@
+"""
+API models for the Finanpy project.
+
+Defines the Tombstone model, which remembers hard-deleted rows so the
+sync endpoint can tell offline clients what to delete.
+"""
+from django.conf import settings
+from django.db import models
+from django.utils import timezone
+
+
+class Tombstone(models.Model):
+    """
+    Records that one of a user's synced rows was deleted.
+
+    A tombstone is a few integers: the resource, the deleted id and
+    when it happened. Deleting an account also deletes its transactions
+    (CASCADE); only the account gets a tombstone and clients drop its
+    transactions with it. Tombstones are kept for
+    api.tombstones.TOMBSTONE_RETENTION_DAYS and then removed by
+    ``manage.py compact_tombstones``.
+    """
+
+    ACCOUNT = 1
+    CATEGORY = 2
+    TRANSACTION = 3
+    RESOURCES = [
+        (ACCOUNT, 'accounts'),
+        (CATEGORY, 'categories'),
+        (TRANSACTION, 'transactions'),
+    ]
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='tombstones',
+        db_index=False,
+        verbose_name='usuário',
+    )
+    resource = models.PositiveSmallIntegerField(
+        choices=RESOURCES,
+        verbose_name='recurso',
+    )
+    object_id = models.PositiveBigIntegerField(
+        verbose_name='id do objeto',
+    )
+    deleted_at = models.DateTimeField(
+        default=timezone.now,
+        verbose_name='excluído em',
+    )
+
+    class Meta:
+        verbose_name = 'exclusão registrada'
+        verbose_name_plural = 'exclusões registradas'
+        indexes = [
+            # Sync: the user's tombstones after the client's position.
+            models.Index(
+                fields=['user', 'id'],
+                name='tombstone_user_id_idx',
+            ),
+            # Compaction: everything older than the retention.
+            models.Index(
+                fields=['deleted_at'],
+                name='tombstone_deleted_at_idx',
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.get_resource_display()} #{self.object_id}'
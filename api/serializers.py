@@ -0,0 +1,104 @@
+"""
+JSON serialization for the Finanpy API.
+
+Rows are read with ``values()`` (no model instances, no forms) and
+turned into plain dicts by a fixed list of Fields, each naming the API
+field, the column it comes from and an optional converter. Decimals are
+written as strings so amounts keep their exact value.
+"""
+import json
+from collections import namedtuple
+
+# An API field: its name, the ``values()`` column it is read from and
+# a function converting the column value (None to use it as is).
+Field = namedtuple('Field', ['name', 'column', 'convert'])
+
+
+def _decimal(value):
+    return None if value is None else str(value)
+
+
+def _isoformat(value):
+    return None if value is None else value.isoformat()
+
+
+ACCOUNT_FIELDS = (
+    Field('id', 'id', None),
+    Field('name', 'name', None),
+    Field('account_type', 'account_type', None),
+    Field('balance', 'balance', _decimal),
+    Field('opening_balance', 'opening_balance', _decimal),
+    Field('color', 'color', None),
+    Field('is_active', 'is_active', None),
+    Field('created_at', 'created_at', _isoformat),
+    Field('updated_at', 'updated_at', _isoformat),
+)
+
+CATEGORY_FIELDS = (
+    Field('id', 'id', None),
+    Field('name', 'name', None),
+    Field('category_type', 'category_type', None),
+    Field('icon', 'icon', None),
+    Field('color', 'color', None),
+    Field('created_at', 'created_at', _isoformat),
+    Field('updated_at', 'updated_at', _isoformat),
+)
+
+TRANSACTION_FIELDS = (
+    Field('id', 'id', None),
+    Field('account', 'account_id', None),
+    Field('category', 'category_id', None),
+    Field('transaction_type', 'transaction_type', None),
+    Field('amount', 'amount', _decimal),
+    Field('date', 'date', _isoformat),
+    Field('description', 'description', None),
+    Field('transfer', 'transfer_id', None),
+    Field('created_at', 'created_at', _isoformat),
+    Field('updated_at', 'updated_at', _isoformat),
+)
+
+TRANSFER_FIELDS = (
+    Field('id', 'id', None),
+    Field('from_account', 'from_account_id', None),
+    Field('to_account', 'to_account_id', None),
+    Field('amount', 'amount', _decimal),
+    Field('date', 'date', _isoformat),
+    Field('description', 'description', None),
+    Field('created_at', 'created_at', _isoformat),
+)
+
+
+class InvalidFields(ValueError):
+    """Raised when ``?fields=`` names a field the resource does not have."""
+
+
+def select_fields(fields, requested):
+    """
+    Return the Fields named in ``requested`` (a comma-separated string).
+
+    An empty value selects every field. The order of ``fields`` is kept
+    whatever the order of the request.
+    """
+    if not requested:
+        return fields
+    names = {name.strip() for name in requested.split(',') if name.strip()}
+    unknown = names - {field.name for field in fields}
+    if unknown:
+        raise InvalidFields(f'Campos desconhecidos: {", ".join(sorted(unknown))}.')
+    return tuple(field for field in fields if field.name in names)
+
+
+def serialize(rows, fields):
+    """Return the ``values()`` rows as dicts with the given Fields."""
+    return [
+        {
+            name: row[column] if convert is None else convert(row[column])
+            for name, column, convert in fields
+        }
+        for row in rows
+    ]
+
+
+def dumps(payload):
+    """Encode a payload as compact UTF-8 JSON."""
+    return json.dumps(payload, ensure_ascii=False, separators=(',', ':')).encode()
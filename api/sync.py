@@ -0,0 +1,197 @@
+"""
+Delta sync for the Finanpy API.
+
+A sync cursor holds, for each synced resource, the (updated_at, id) of
+the last row the client received, the id of the last tombstone it
+received and when it was issued. A sync returns the rows changed after
+those positions in (updated_at, id) order, read through the
+(user, updated_at) indexes, plus the ids deleted since, and a new
+cursor. Without a cursor every row is returned (in batches of
+SYNC_LIMIT per resource) and older deletions are skipped.
+
+``updated_at`` and tombstone ids are taken when a row is written, not
+when its DB transaction commits, so a slow transaction can commit a
+row behind a position already handed out. The cursor therefore never
+moves past ``SYNC_SAFETY_MARGIN`` before the sync: newer rows are sent
+but read again by the next sync, which returns them once more until
+they are older than the margin. Clients apply rows by id, so receiving
+one twice is harmless.
+
+Before reading anything, ``has_changes`` asks the database in a single
+query with one indexed EXISTS per table whether anything changed at
+all, so an idle client polling costs one cheap query.
+"""
+import base64
+import datetime
+import json
+from collections import namedtuple
+from functools import reduce
+from operator import or_
+
+from django.contrib.auth import get_user_model
+from django.db.models import Exists, Q
+from django.utils import timezone
+
+from accounts.models import Account
+from api.models import Tombstone
+from api.serializers import ACCOUNT_FIELDS, CATEGORY_FIELDS, TRANSACTION_FIELDS, serialize
+from api.tombstones import retention_cutoff
+from categories.models import Category
+from transactions.models import Transaction
+
+SYNC_LIMIT = 500
+
+# Must be longer than any write transaction on synced rows (statement
+# imports, deletion batches, bulk transfers).
+SYNC_SAFETY_MARGIN = datetime.timedelta(minutes=5)
+
+# Synced resources: name, model and API fields.
+SYNCED = (
+    ('accounts', Account, ACCOUNT_FIELDS),
+    ('categories', Category, CATEGORY_FIELDS),
+    ('transactions', Transaction, TRANSACTION_FIELDS),
+)
+
+# ``positions`` maps each resource name to the (updated_at, id) of the
+# last row sent that is older than SYNC_SAFETY_MARGIN, or None.
+SyncCursor = namedtuple('SyncCursor', ['issued_at', 'positions', 'tombstone_id'])
+
+
+class InvalidSyncCursor(ValueError):
+    """Raised when a sync cursor cannot be decoded."""
+
+
+class ExpiredSyncCursor(Exception):
+    """Raised when tombstones a sync cursor needs may have been compacted."""
+
+
+def encode_cursor(cursor):
+    """Return a sync cursor as an opaque, URL-safe string."""
+    payload = json.dumps(
+        [
+            cursor.issued_at.isoformat(),
+            {
+                name: position and [position[0].isoformat(), position[1]]
+                for name, position in cursor.positions.items()
+            },
+            cursor.tombstone_id,
+        ],
+        separators=(',', ':'),
+    )
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def _parse_datetime(value):
+    parsed = datetime.datetime.fromisoformat(value)
+    if timezone.is_naive(parsed):
+        raise ValueError('Naive datetime in sync cursor.')
+    return parsed
+
+
+def decode_cursor(text):
+    """Return the SyncCursor encoded in ``text``."""
+    try:
+        padded = text + '=' * (-len(text) % 4)
+        issued_at, raw_positions, tombstone_id = json.loads(base64.urlsafe_b64decode(padded))
+        positions = {}
+        for name, _, _ in SYNCED:
+            position = raw_positions[name]
+            if position is not None:
+                updated_at, pk = position
+                position = (_parse_datetime(updated_at), int(pk))
+            positions[name] = position
+        return SyncCursor(_parse_datetime(issued_at), positions, int(tombstone_id))
+    except (TypeError, ValueError, KeyError) as exc:
+        raise InvalidSyncCursor('Cursor inválido.') from exc
+
+
+def changed_since(queryset, position):
+    """Return the rows of ``queryset`` after an (updated_at, id) position."""
+    if position is None:
+        return queryset
+    updated_at, pk = position
+    # The leading bound gives the database a plain index range.
+    return queryset.filter(
+        Q(updated_at__gte=updated_at),
+        Q(updated_at__gt=updated_at) | Q(updated_at=updated_at, id__gt=pk),
+    )
+
+
+def has_changes(user, cursor):
+    """Return True when anything changed or was deleted after ``cursor``."""
+    conditions = [
+        Exists(changed_since(model.objects.filter(user=user), cursor.positions[name]))
+        for name, model, _ in SYNCED
+    ]
+    conditions.append(Exists(Tombstone.objects.filter(user=user, id__gt=cursor.tombstone_id)))
+    return get_user_model().objects.filter(pk=user.pk).filter(reduce(or_, conditions)).exists()
+
+
+def sync_changes(user, cursor_text=None, limit=SYNC_LIMIT):
+    """
+    Return the changes of a user's data since a sync cursor.
+
+    Returns None when nothing changed. Otherwise returns a dict with the
+    changed rows of each resource, the ``deleted`` ids of each resource,
+    a new ``cursor`` and ``has_more`` (sync again right away when True).
+    Raises InvalidSyncCursor or ExpiredSyncCursor for unusable cursors.
+    """
+    issued_at = timezone.now()
+    # Rows written after this may still be committing.
+    horizon = issued_at - SYNC_SAFETY_MARGIN
+    if cursor_text:
+        cursor = decode_cursor(cursor_text)
+        if cursor.issued_at < retention_cutoff():
+            raise ExpiredSyncCursor('Sincronize novamente desde o início.')
+        if not has_changes(user, cursor):
+            return None
+    else:
+        # Recent deletions are sent too: one still committing may
+        # remove a row read below.
+        latest = (
+            Tombstone.objects.filter(user=user, deleted_at__lte=horizon)
+            .order_by('-id').values_list('id', flat=True).first()
+        )
+        cursor = SyncCursor(issued_at, dict.fromkeys(name for name, _, _ in SYNCED), latest or 0)
+
+    payload = {}
+    positions = {}
+    has_more = False
+    for name, model, fields in SYNCED:
+        rows = list(
+            changed_since(model.objects.filter(user=user), cursor.positions[name])
+            .order_by('updated_at', 'id')
+            .values(*{field.column for field in fields})[:limit + 1]
+        )
+        # Rows past the horizon are not waited for: the next sync
+        # reads them again, so has_more stays False for them.
+        has_more = has_more or (len(rows) > limit and rows[limit]['updated_at'] <= horizon)
+        rows = rows[:limit]
+        position = cursor.positions[name]
+        for row in rows:
+            if row['updated_at'] > horizon:
+                break
+            position = (row['updated_at'], row['id'])
+        positions[name] = position
+        payload[name] = serialize(rows, fields)
+
+    tombstones = list(
+        Tombstone.objects.filter(user=user, id__gt=cursor.tombstone_id)
+        .order_by('id').values_list('id', 'deleted_at', 'resource', 'object_id')[:limit + 1]
+    )
+    has_more = has_more or (len(tombstones) > limit and tombstones[limit][1] <= horizon)
+    tombstones = tombstones[:limit]
+    resource_names = dict(Tombstone.RESOURCES)
+    deleted = {name: [] for name, _, _ in SYNCED}
+    tombstone_id = cursor.tombstone_id
+    settled = True
+    for pk, deleted_at, resource, object_id in tombstones:
+        deleted[resource_names[resource]].append(object_id)
+        settled = settled and deleted_at <= horizon
+        if settled:
+            tombstone_id = pk
+    payload['deleted'] = deleted
+
+    payload['cursor'] = encode_cursor(SyncCursor(issued_at, positions, tombstone_id))
+    payload['has_more'] = has_more
+    return payload
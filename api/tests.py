@@ -0,0 +1,468 @@
+"""
+Unit tests for the api app.
+
+Tests field selection, the JSON list endpoints (scoping, cursors,
+filters, errors) and their ETags, delta sync, delete tombstones and
+the bulk transfer endpoint.
+"""
+import datetime
+import json
+from datetime import date
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from accounts.models import Account
+from api.models import Tombstone
+from api.serializers import TRANSACTION_FIELDS, InvalidFields, select_fields
+from api.sync import SyncCursor, decode_cursor, encode_cursor, sync_changes
+from categories.models import Category
+from transactions.deletion import run_deletion_job, schedule_account_deletion
+from transactions.models import DeletionJob, Transaction, Transfer
+
+User = get_user_model()
+
+
+class SelectFieldsTests(TestCase):
+    """Tests for ``?fields=`` parsing."""
+
+    def test_empty_selects_all(self):
+        """No fields means every field."""
+        self.assertEqual(select_fields(TRANSACTION_FIELDS, ''), TRANSACTION_FIELDS)
+
+    def test_keeps_resource_order(self):
+        """Requested fields come back in the resource's order."""
+        fields = select_fields(TRANSACTION_FIELDS, 'amount, id,amount')
+        self.assertEqual([field.name for field in fields], ['id', 'amount'])
+
+    def test_unknown_field(self):
+        """Unknown names are rejected."""
+        with self.assertRaises(InvalidFields):
+            select_fields(TRANSACTION_FIELDS, 'id,user')
+
+
+class ApiViewTests(TestCase):
+    """Tests for the JSON list endpoints."""
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.user = User.objects.create_user(email='api@example.com', password='pass123')
+        self.account = Account.objects.create(
+            user=self.user, name='Conta', account_type='checking',
+        )
+        self.category = Category.objects.create(
+            user=self.user, name='Mercado', category_type='expense',
+        )
+        self.transactions = Transaction.objects.bulk_create([
+            Transaction(
+                user=self.user, account=self.account, category=self.category,
+                transaction_type='expense', amount=Decimal(day) + Decimal('0.25'),
+                date=date(2025, 1, day), description=f'Compra {day}',
+            )
+            for day in range(1, 8)
+        ])
+        other = User.objects.create_user(email='other@example.com', password='pass123')
+        other_account = Account.objects.create(user=other, name='Outra', account_type='checking')
+        self.other_account = other_account
+        Transaction.objects.create(
+            user=other, account=other_account, transaction_type='income',
+            amount=Decimal('1.00'), date=date(2025, 1, 1),
+        )
+        self.client.force_login(self.user)
+        self.url = reverse('api:transactions')
+
+    def get_json(self, url, params=None):
+        response = self.client.get(url, params or {})
+        return response, json.loads(response.content)
+
+    def test_requires_login(self):
+        """Anonymous requests get a JSON 401, not a redirect."""
+        response = Client().get(self.url)
+        self.assertEqual(response.status_code, 401)
+        self.assertIn('detail', json.loads(response.content))
+
+    def test_read_only(self):
+        """Writes are not allowed."""
+        self.assertEqual(self.client.post(self.url).status_code, 405)
+
+    def test_lists_only_own_rows(self):
+        """Each resource lists only the user's rows."""
+        _, data = self.get_json(reverse('api:accounts'))
+        self.assertEqual([row['name'] for row in data['results']], ['Conta'])
+        _, data = self.get_json(self.url)
+        self.assertEqual(len(data['results']), 7)
+        self.assertEqual(data['results'][0], {
+            'id': self.transactions[-1].pk,
+            'account': self.account.pk,
+            'category': self.category.pk,
+            'transaction_type': 'expense',
+            'amount': '7.25',
+            'date': '2025-01-07',
+            'description': 'Compra 7',
+            'transfer': None,
+            'created_at': self.transactions[-1].created_at.isoformat(),
+            'updated_at': self.transactions[-1].updated_at.isoformat(),
+        })
+
+    def test_field_selection(self):
+        """``?fields=`` narrows the rows; unknown fields are a 400."""
+        _, data = self.get_json(reverse('api:categories'), {'fields': 'id,name'})
+        self.assertEqual(data['results'], [{'id': self.category.pk, 'name': 'Mercado'}])
+        response, data = self.get_json(self.url, {'fields': 'id,user'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('fields', data['errors'])
+
+    def test_cursor_pagination(self):
+        """Cursors walk the whole list in order, both ways."""
+        ids = []
+        params = {'limit': 3, 'fields': 'id', 'sort': 'amount'}
+        while True:
+            _, data = self.get_json(self.url, params)
+            ids += [row['id'] for row in data['results']]
+            if not data['next']:
+                break
+            params['cursor'] = data['next']
+        self.assertEqual(ids, [tx.pk for tx in self.transactions])
+        params['cursor'] = data['previous']
+        _, data = self.get_json(self.url, params)
+        self.assertEqual([row['id'] for row in data['results']], ids[3:6])
+
+    def test_filters(self):
+        """The transaction list filters apply; foreign accounts are a 400."""
+        _, data = self.get_json(self.url, {'amount_min': '5', 'fields': 'amount'})
+        self.assertEqual([row['amount'] for row in data['results']], ['7.25', '6.25', '5.25'])
+        response, _ = self.get_json(self.url, {'account': self.other_account.pk})
+        self.assertEqual(response.status_code, 400)
+        response, data = self.get_json(self.url, {'q': 'compra'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('q', data['errors'])
+
+    def test_invalid_limit_and_cursor(self):
+        """Bad limits and cursors are a 400."""
+        self.assertEqual(self.client.get(self.url, {'limit': '0'}).status_code, 400)
+        self.assertEqual(self.client.get(self.url, {'limit': 'x'}).status_code, 400)
+        self.assertEqual(self.client.get(self.url, {'cursor': 'bad'}).status_code, 400)
+
+    def test_unchanged_poll_is_not_modified(self):
+        """A matching ETag gets an empty 304 without reading the rows."""
+        response = self.client.get(self.url)
+        etag = response['ETag']
+        self.assertFalse(etag.startswith('W/'))
+        self.assertIn('private', response['Cache-Control'])
+        # No query at all: the validator, the session and the user are cached.
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+
+    def test_etag_depends_on_the_query(self):
+        """Different pages or projections have different ETags."""
+        first = self.client.get(self.url)['ETag']
+        self.assertNotEqual(first, self.client.get(self.url, {'fields': 'id'})['ETag'])
+
+    def test_write_changes_the_etag(self):
+        """Creating or deleting a transaction changes the ETag."""
+        etag = self.client.get(self.url)['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('transactions:create'), {
+                'transaction_type': 'income',
+                'account': self.account.pk,
+                'amount': '10.00',
+                'date': '2025-02-01',
+            })
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('transactions:delete', args=[self.transactions[0].pk]))
+        self.assertNotEqual(self.client.get(self.url)['ETag'], etag)
+
+
+class SyncTests(TestCase):
+    """Tests for the delta sync endpoint and the delete tombstones."""
+
+    def setUp(self):
+        self.client = Client()
+        self.user = User.objects.create_user(email='sync@example.com', password='pass123')
+        self.account = Account.objects.create(
+            user=self.user, name='Conta', account_type='checking',
+        )
+        self.category = Category.objects.create(
+            user=self.user, name='Mercado', category_type='expense',
+        )
+        self.transaction = self.add(Decimal('10.00'))
+        other = User.objects.create_user(email='other@example.com', password='pass123')
+        other_account = Account.objects.create(user=other, name='Outra', account_type='checking')
+        Transaction.objects.create(
+            user=other, account=other_account, transaction_type='income',
+            amount=Decimal('1.00'), date=date(2025, 1, 1),
+        )
+        self.client.force_login(self.user)
+        self.url = reverse('api:sync')
+        # Rows are written right before each sync here; without a margin
+        # the cursor moves past them (see test_late_commit_is_not_skipped).
+        patcher = mock.patch('api.sync.SYNC_SAFETY_MARGIN', datetime.timedelta(0))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def add(self, amount):
+        return Transaction.objects.create(
+            user=self.user, account=self.account, category=self.category,
+            transaction_type='expense', amount=amount, date=date(2025, 1, 1),
+        )
+
+    def sync(self, cursor=None):
+        response = self.client.get(self.url, {'cursor': cursor} if cursor else {})
+        data = json.loads(response.content) if response.content else None
+        return response, data
+
+    def test_requires_login(self):
+        """Anonymous syncs get a JSON 401."""
+        self.assertEqual(Client().get(self.url).status_code, 401)
+
+    def test_initial_sync_returns_everything(self):
+        """Without a cursor every row of the user is returned."""
+        _, data = self.sync()
+        self.assertEqual([row['id'] for row in data['accounts']], [self.account.pk])
+        self.assertEqual([row['id'] for row in data['categories']], [self.category.pk])
+        self.assertEqual([row['id'] for row in data['transactions']], [self.transaction.pk])
+        self.assertEqual(data['deleted'], {'accounts': [], 'categories': [], 'transactions': []})
+        self.assertFalse(data['has_more'])
+
+    def test_no_change_is_one_query_and_empty(self):
+        """An idle sync is a 204 with no body after a single query."""
+        _, data = self.sync()
+        # Only the change check (the session and the user are cached).
+        with self.assertNumQueries(1):
+            response, _ = self.sync(data['cursor'])
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(response.content, b'')
+
+    def test_changes_since_cursor(self):
+        """Only rows changed after the cursor are returned."""
+        _, data = self.sync()
+        added = self.add(Decimal('2.00'))
+        self.account.name = 'Renomeada'
+        self.account.save()
+        _, data = self.sync(data['cursor'])
+        self.assertEqual([row['id'] for row in data['transactions']], [added.pk])
+        self.assertEqual([row['name'] for row in data['accounts']], ['Renomeada'])
+        self.assertEqual(data['categories'], [])
+        self.assertEqual(self.sync(data['cursor'])[0].status_code, 204)
+
+    def test_batches_until_done(self):
+        """Large changes come in batches with ``has_more``."""
+        for amount in range(1, 5):
+            self.add(Decimal(amount))
+        data = sync_changes(self.user, limit=2)
+        ids = [row['id'] for row in data['transactions']]
+        while data['has_more']:
+            data = sync_changes(self.user, data['cursor'], limit=2)
+            ids += [row['id'] for row in data['transactions']]
+        self.assertEqual(ids, list(
+            Transaction.objects.filter(user=self.user).order_by('updated_at', 'id')
+            .values_list('id', flat=True)
+        ))
+        self.assertIsNone(sync_changes(self.user, data['cursor'], limit=2))
+
+    def test_late_commit_is_not_skipped(self):
+        """A row committed after a sync with an older updated_at comes next."""
+        now = timezone.now()
+        Transaction.objects.filter(pk=self.transaction.pk).update(
+            updated_at=now - datetime.timedelta(minutes=2),
+        )
+        with mock.patch('api.sync.SYNC_SAFETY_MARGIN', datetime.timedelta(minutes=5)):
+            data = sync_changes(self.user)
+            self.assertEqual([row['id'] for row in data['transactions']], [self.transaction.pk])
+            # Written before the row synced above, committed after the sync.
+            late = self.add(Decimal('2.00'))
+            Transaction.objects.filter(pk=late.pk).update(
+                updated_at=now - datetime.timedelta(minutes=3),
+            )
+            data = sync_changes(self.user, data['cursor'])
+        self.assertEqual(
+            [row['id'] for row in data['transactions']],
+            [late.pk, self.transaction.pk],
+        )
+        self.assertFalse(data['has_more'])
+
+    def test_deleted_transaction(self):
+        """Deleting a transaction is synced as a tombstone."""
+        _, data = self.sync()
+        self.client.post(reverse('transactions:delete', args=[self.transaction.pk]))
+        _, data = self.sync(data['cursor'])
+        self.assertEqual(data['deleted']['transactions'], [self.transaction.pk])
+        # The account balance changed too.
+        self.assertEqual([row['balance'] for row in data['accounts']], ['10.00'])
+
+    def test_deleted_category_uncategorizes_transactions(self):
+        """Deleting a category syncs its tombstone and the uncategorized rows."""
+        _, data = self.sync()
+        self.client.post(reverse('categories:delete', args=[self.category.pk]))
+        _, data = self.sync(data['cursor'])
+        self.assertEqual(data['deleted']['categories'], [self.category.pk])
+        self.assertEqual(
+            [(row['id'], row['category']) for row in data['transactions']],
+            [(self.transaction.pk, None)],
+        )
+
+    def test_deleted_account_is_one_tombstone(self):
+        """Deleting an account records only the account."""
+        _, data = self.sync()
+        self.client.post(reverse('accounts:delete', args=[self.account.pk]))
+        run_deletion_job(DeletionJob.objects.get())
+        self.assertEqual(Tombstone.objects.count(), 1)
+        _, data = self.sync(data['cursor'])
+        self.assertEqual(data['deleted']['accounts'], [self.account.pk])
+        self.assertEqual(data['deleted']['transactions'], [])
+
+    def test_initial_sync_skips_old_tombstones(self):
+        """A fresh client does not get earlier deletions."""
+        self.client.post(reverse('transactions:delete', args=[self.transaction.pk]))
+        _, data = self.sync()
+        self.assertEqual(data['deleted']['transactions'], [])
+        self.assertEqual(self.sync(data['cursor'])[0].status_code, 204)
+
+    def test_invalid_and_expired_cursors(self):
+        """Garbage is a 400; a cursor older than the retention is a 410."""
+        self.assertEqual(self.sync('bad')[0].status_code, 400)
+        _, data = self.sync()
+        cursor = decode_cursor(data['cursor'])
+        old = SyncCursor(
+            timezone.now() - datetime.timedelta(days=91),
+            cursor.positions,
+            cursor.tombstone_id,
+        )
+        self.assertEqual(self.sync(encode_cursor(old))[0].status_code, 410)
+
+    def test_compact_tombstones(self):
+        """The command removes tombstones older than the retention."""
+        Tombstone.objects.bulk_create([
+            Tombstone(
+                user=self.user, resource=Tombstone.TRANSACTION, object_id=pk,
+                deleted_at=timezone.now() - datetime.timedelta(days=days),
+            )
+            for pk, days in [(1, 120), (2, 100), (3, 10)]
+        ])
+        out = StringIO()
+        call_command('compact_tombstones', stdout=out)
+        self.assertIn('2 registro(s)', out.getvalue())
+        self.assertEqual(list(Tombstone.objects.values_list('object_id', flat=True)), [3])
+
+
+class TransferApiTests(TestCase):
+    """Tests for the bulk transfer endpoint."""
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.user = User.objects.create_user(email='transfers@example.com', password='pass123')
+        self.accounts = [
+            Account.objects.create(
+                user=self.user, name=f'Conta {i}', account_type='checking', balance=Decimal('1000.00'),
+            )
+            for i in range(3)
+        ]
+        self.client.force_login(self.user)
+        self.url = reverse('api:transfers')
+
+    def post(self, transfers):
+        response = self.client.post(
+            self.url, json.dumps({'transfers': transfers}), content_type='application/json',
+        )
+        return response, json.loads(response.content)
+
+    def item(self, source, destination, amount='10.00', **extra):
+        return {
+            'from_account': self.accounts[source].pk,
+            'to_account': self.accounts[destination].pk,
+            'amount': amount,
+            'date': '2025-03-10',
+            **extra,
+        }
+
+    def balances(self):
+        return [account.balance for account in Account.objects.filter(user=self.user).order_by('pk')]
+
+    def test_books_the_batch(self):
+        """Every transfer gets both legs; balances move together."""
+        response, data = self.post([
+            self.item(0, 1, '100.00', description='Reserva'),
+            self.item(1, 2, '30.00'),
+            self.item(2, 0, '5.50'),
+        ])
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(
+            [(row['from_account'], row['amount'], row['description']) for row in data['results']],
+            [(self.accounts[0].pk, '100.00', 'Reserva'), (self.accounts[1].pk, '30.00', ''),
+             (self.accounts[2].pk, '5.50', '')],
+        )
+        self.assertEqual(
+            set(Transfer.objects.values_list('pk', flat=True)),
+            {row['id'] for row in data['results']},
+        )
+        self.assertEqual(Transaction.objects.filter(transfer__isnull=False).count(), 6)
+        self.assertEqual(
+            self.balances(),
+            [Decimal('905.50'), Decimal('1070.00'), Decimal('1024.50')],
+        )
+
+    def test_invalid_item_books_nothing(self):
+        """One bad item rejects the whole batch, errors by index."""
+        response, data = self.post([
+            self.item(0, 1),
+            self.item(0, 0, amount='-1', date='ontem'),
+        ])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(set(data['errors']), {'1'})
+        self.assertEqual(set(data['errors']['1']), {'to_account', 'amount', 'date'})
+        self.assertFalse(Transfer.objects.exists())
+        self.assertEqual(self.balances(), [Decimal('1000.00')] * 3)
+
+    def test_other_users_accounts_are_rejected(self):
+        """Accounts of another user are invalid."""
+        other = User.objects.create_user(email='other@example.com', password='pass123')
+        account = Account.objects.create(user=other, name='Outra', account_type='checking')
+        item = self.item(0, 1)
+        item['to_account'] = account.pk
+        response, data = self.post([item])
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('to_account', data['errors']['0'])
+
+    def test_accounts_being_deleted_are_rejected(self):
+        """No money moves into an account that is going away."""
+        schedule_account_deletion(self.accounts[1])
+        response, data = self.post([self.item(0, 1, '50.00')])
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('to_account', data['errors']['0'])
+        self.assertFalse(Transfer.objects.exists())
+
+    def test_batch_limits(self):
+        """Empty, oversized and malformed bodies are a 400."""
+        self.assertEqual(self.post([])[0].status_code, 400)
+        self.assertEqual(self.post([self.item(0, 1)] * 501)[0].status_code, 400)
+        response = self.client.post(self.url, 'x', content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_queries_do_not_grow_per_transfer(self):
+        """A batch is written with bulk inserts and set-based updates."""
+        # Caches the session and the user.
+        self.client.get(self.url)
+        with self.assertNumQueries(8):
+            self.post([self.item(0, 1)])
+        with self.assertNumQueries(9):
+            self.post([self.item(i % 3, (i + 1) % 3, f'{i + 1}.00') for i in range(30)])
+
+    def test_login_and_method(self):
+        """Anonymous clients get 401 and GET is not allowed."""
+        self.assertEqual(self.client.get(self.url).status_code, 405)
+        self.client.logout()
+        self.assertEqual(self.post([self.item(0, 1)])[0].status_code, 401)
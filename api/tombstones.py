@@ -0,0 +1,57 @@
+"""
+Delete tombstones for the Finanpy sync endpoint.
+
+The delete views call ``record_deletion`` in the DB transaction that
+deletes the row. Tombstones older than the retention are removed in
+batches by ``compact_tombstones``; a sync cursor older than the
+retention may have missed some of them, so the sync endpoint answers
+it with 410 Gone and the client starts over.
+"""
+import datetime
+
+from django.utils import timezone
+
+from accounts.models import Account
+from api.models import Tombstone
+from categories.models import Category
+from transactions.models import Transaction
+
+TOMBSTONE_RETENTION_DAYS = 90
+
+COMPACT_BATCH_SIZE = 1000
+
+RESOURCE_OF_MODEL = {
+    Account: Tombstone.ACCOUNT,
+    Category: Tombstone.CATEGORY,
+    Transaction: Tombstone.TRANSACTION,
+}
+
+
+def record_deletion(instance):
+    """Remember that ``instance`` (an account, category or transaction) is deleted."""
+    Tombstone.objects.create(
+        user_id=instance.user_id,
+        resource=RESOURCE_OF_MODEL[type(instance)],
+        object_id=instance.pk,
+    )
+
+
+def retention_cutoff(days=TOMBSTONE_RETENTION_DAYS, now=None):
+    """Return the time before which tombstones may have been removed."""
+    return (now or timezone.now()) - datetime.timedelta(days=days)
+
+
+def compact_tombstones(days=TOMBSTONE_RETENTION_DAYS, batch_size=COMPACT_BATCH_SIZE):
+    """
+    Delete the tombstones older than ``days`` and return how many.
+
+    Deletes by primary key in batches so no statement holds the table
+    for long, however many tombstones have piled up.
+    """
+    old = Tombstone.objects.filter(deleted_at__lt=retention_cutoff(days))
+    deleted = 0
+    while True:
+        batch = list(old.values_list('pk', flat=True)[:batch_size])
+        if not batch:
+            return deleted
+        deleted += Tombstone.objects.filter(pk__in=batch).delete()[0]
@@ -0,0 +1,29 @@
+"""
+URL configuration for the api app (mounted under ``/api/v1/``).
+
+Provides JSON routes for the logged-in user's data:
+- accounts: The user's accounts.
+- categories: The user's categories.
+- transactions: The user's transactions.
+- sync: Changes and deletions since a sync cursor.
+- transfers: Books a batch of transfers (POST).
+"""
+from django.urls import path
+
+from api.views import (
+    AccountListView,
+    CategoryListView,
+    SyncView,
+    TransactionListView,
+    TransferCreateView,
+)
+
+app_name = 'api'
+
+urlpatterns = [
+    path('accounts/', AccountListView.as_view(), name='accounts'),
+    path('categories/', CategoryListView.as_view(), name='categories'),
+    path('transactions/', TransactionListView.as_view(), name='transactions'),
+    path('sync/', SyncView.as_view(), name='sync'),
+    path('transfers/', TransferCreateView.as_view(), name='transfers'),
+]
@@ -0,0 +1,250 @@
+"""
+API views for the Finanpy project.
+
+JSON endpoints for the logged-in user's data, versioned under
+``/api/v1/``:
+- AccountListView: The user's accounts.
+- CategoryListView: The user's categories.
+- TransactionListView: The user's transactions, with the filters and
+  sorts of the transaction list.
+- SyncView: What changed or was deleted since a sync cursor.
+- TransferCreateView: Books a batch of transfers between accounts (the
+  only write endpoint).
+
+Every list is paginated with keyset cursors (``?cursor=``, ``?limit=``),
+can be narrowed to some fields (``?fields=id,amount``) and carries an
+ETag, so an unchanged poll gets a 304 without reading or serializing
+any row (see api.etags). Sync is described in api.sync.
+"""
+import json
+
+from django.contrib.auth.mixins import LoginRequiredMixin
+from django.http import HttpResponse, JsonResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.views import View
+
+from accounts.models import Account
+from api.etags import resource_etag
+from api.serializers import (
+    ACCOUNT_FIELDS,
+    CATEGORY_FIELDS,
+    TRANSACTION_FIELDS,
+    TRANSFER_FIELDS,
+    InvalidFields,
+    dumps,
+    select_fields,
+    serialize,
+)
+from api.sync import ExpiredSyncCursor, InvalidSyncCursor, sync_changes
+from categories.models import Category
+from core.pagination import InvalidCursor, KeysetPaginator
+from transactions.filters import SORT_ORDERINGS, transaction_list_queryset
+from transactions.forms import TransactionFilterForm
+from transactions.models import Transaction
+from transactions.transfers import MAX_BULK_TRANSFERS, create_transfers, parse_transfers
+
+
+class InvalidRequest(ValueError):
+    """Raised with the ``{field: [messages]}`` errors of a bad request."""
+
+    def __init__(self, errors):
+        super().__init__(errors)
+        self.errors = errors
+
+
+class ApiView(LoginRequiredMixin, View):
+    """Base API view: JSON 401 instead of the login redirect, GET by default."""
+
+    http_method_names = ['get', 'head', 'options']
+
+    def handle_no_permission(self):
+        return JsonResponse({'detail': 'Autenticação necessária.'}, status=401)
+
+
+class ResourceListView(ApiView):
+    """
+    A keyset-paginated list of one resource of the logged-in user.
+
+    Subclasses set ``resource``, ``model`` and ``fields`` and implement
+    ``get_queryset()`` and ``get_ordering()``.
+    """
+
+    resource = None
+    model = None
+    fields = ()
+    page_size = 100
+    max_page_size = 500
+
+    def get_queryset(self):
+        """Return the user's rows to list (may raise InvalidRequest)."""
+        raise NotImplementedError
+
+    def get_ordering(self):
+        """Return the keyset ordering of the list, ending in the pk."""
+        raise NotImplementedError
+
+    def get_limit(self):
+        value = self.request.GET.get('limit')
+        if not value:
+            return self.page_size
+        try:
+            limit = int(value)
+        except ValueError:
+            limit = 0
+        if not 1 <= limit <= self.max_page_size:
+            raise InvalidRequest({'limit': [f'Use um número entre 1 e {self.max_page_size}.']})
+        return limit
+
+    def get(self, request, *args, **kwargs):
+        try:
+            fields = select_fields(self.fields, request.GET.get('fields'))
+            limit = self.get_limit()
+            queryset = self.get_queryset()
+        except InvalidFields as exc:
+            return JsonResponse({'errors': {'fields': [str(exc)]}}, status=400)
+        except InvalidRequest as exc:
+            return JsonResponse({'errors': exc.errors}, status=400)
+
+        etag = resource_etag(request, self.resource, self.model.objects.filter(user=request.user))
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            ordering = self.get_ordering()
+            columns = {field.column for field in fields}
+            columns.update(name.lstrip('-') for name in ordering)
+            paginator = KeysetPaginator(queryset.values(*columns), limit, ordering)
+            try:
+                page = paginator.get_page(request.GET.get('cursor'))
+            except InvalidCursor as exc:
+                return JsonResponse({'errors': {'cursor': [str(exc)]}}, status=400)
+            payload = {
+                'results': serialize(page, fields),
+                'next': page.next_cursor,
+                'previous': page.previous_cursor,
+            }
+            response = HttpResponse(dumps(payload), content_type='application/json')
+        response['ETag'] = etag
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+
+class AccountListView(ResourceListView):
+    """The logged-in user's accounts, by name."""
+
+    resource = 'accounts'
+    model = Account
+    fields = ACCOUNT_FIELDS
+
+    def get_queryset(self):
+        return Account.objects.filter(user=self.request.user)
+
+    def get_ordering(self):
+        return ('name', 'id')
+
+
+class CategoryListView(ResourceListView):
+    """The logged-in user's categories, by type and name."""
+
+    resource = 'categories'
+    model = Category
+    fields = CATEGORY_FIELDS
+
+    def get_queryset(self):
+        return Category.objects.filter(user=self.request.user)
+
+    def get_ordering(self):
+        return ('category_type', 'name', 'id')
+
+
+class TransactionListView(ResourceListView):
+    """
+    The logged-in user's transactions.
+
+    Accepts the filters and ``sort`` of the transaction list (see
+    TransactionFilterForm), except the search text, whose ranked
+    results cannot be paginated with cursors.
+    """
+
+    resource = 'transactions'
+    model = Transaction
+    fields = TRANSACTION_FIELDS
+
+    def get_queryset(self):
+        form = TransactionFilterForm(self.request.GET, user=self.request.user)
+        if not form.is_valid():
+            raise InvalidRequest(form.errors)
+        filters = dict(form.cleaned_data)
+        if filters.pop('q'):
+            raise InvalidRequest({'q': ['A busca não está disponível na API.']})
+        self.sort = filters.pop('sort')
+        return transaction_list_queryset(self.request.user, self.sort, **filters)
+
+    def get_ordering(self):
+        return SORT_ORDERINGS[self.sort]
+
+
+class SyncView(ApiView):
+    """
+    Changes of the logged-in user's data since ``?cursor=``.
+
+    Answers 204 with an empty body when nothing changed, 400 for an
+    invalid cursor and 410 when the cursor is older than the tombstone
+    retention (the client must sync again without a cursor).
+    """
+
+    def get(self, request, *args, **kwargs):
+        try:
+            payload = sync_changes(request.user, request.GET.get('cursor'))
+        except InvalidSyncCursor as exc:
+            return JsonResponse({'errors': {'cursor': [str(exc)]}}, status=400)
+        except ExpiredSyncCursor as exc:
+            return JsonResponse({'detail': str(exc)}, status=410)
+        if payload is None:
+            response = HttpResponse(status=204)
+        else:
+            response = HttpResponse(dumps(payload), content_type='application/json')
+        patch_cache_control(response, private=True, no_store=True)
+        return response
+
+
+class TransferCreateView(ApiView):
+    """
+    Book a batch of transfers between the logged-in user's accounts.
+
+    The body is ``{"transfers": [...]}`` with up to MAX_BULK_TRANSFERS
+    items (see transactions.transfers.parse_transfers). The batch is
+    all or nothing: any invalid item answers 400 with the errors by
+    item index and books nothing; otherwise every transfer and both of
+    its legs are written in one DB transaction and the transfers are
+    returned with 201.
+    """
+
+    http_method_names = ['post', 'options']
+
+    def post(self, request, *args, **kwargs):
+        try:
+            items = json.loads(request.body)['transfers']
+        except (ValueError, TypeError, KeyError):
+            return JsonResponse(
+                {'errors': {'transfers': ['Envie um objeto JSON com a lista "transfers".']}},
+                status=400,
+            )
+        if not isinstance(items, list) or not 1 <= len(items) <= MAX_BULK_TRANSFERS:
+            return JsonResponse(
+                {'errors': {'transfers': [f'Envie de 1 a {MAX_BULK_TRANSFERS} transferências.']}},
+                status=400,
+            )
+        transfers, errors = parse_transfers(request.user, items)
+        if errors:
+            return JsonResponse({'errors': errors}, status=400)
+        transfers = create_transfers(transfers)
+        rows = [
+            {field.column: getattr(transfer, field.column) for field in TRANSFER_FIELDS}
+            for transfer in transfers
+        ]
+        response = HttpResponse(
+            dumps({'results': serialize(rows, TRANSFER_FIELDS)}),
+            content_type='application/json',
+            status=201,
+        )
+        patch_cache_control(response, private=True, no_store=True)
+        return response
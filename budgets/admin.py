@@ -0,0 +1,14 @@
+from django.contrib import admin
+
+from budgets.models import Budget
+
+
+@admin.register(Budget)
+class BudgetAdmin(admin.ModelAdmin):
+    """Admin configuration for the Budget model."""
+
+    list_display = ('category', 'user', 'amount', 'updated_at')
+    search_fields = ('category__name', 'user__email')
+    list_per_page = 25
+    readonly_fields = ('created_at', 'updated_at')
+    list_select_related = ('category', 'user')
@@ -0,0 +1,72 @@
+"""
+Budget forms for the Finanpy project.
+
+Provides the BudgetForm for creating and editing category budgets,
+styled with TailwindCSS classes matching the project's design system.
+"""
+from django import forms
+
+from budgets.models import Budget
+from categories.models import Category
+
+# Shared Tailwind CSS classes for form widgets
+TAILWIND_INPUT_CLASSES = (
+    'w-full px-4 py-2.5 bg-gray-800 border border-gray-700 rounded-lg '
+    'text-gray-100 placeholder-gray-500 focus:outline-none focus:border-cyan-500 '
+    'focus:ring-1 focus:ring-cyan-500 transition-colors duration-200'
+)
+
+TAILWIND_SELECT_CLASSES = (
+    'w-full px-4 py-2.5 bg-gray-800 border border-gray-700 rounded-lg '
+    'text-gray-100 focus:outline-none focus:border-cyan-500 '
+    'focus:ring-1 focus:ring-cyan-500 transition-colors duration-200'
+)
+
+
+class BudgetForm(forms.ModelForm):
+    """
+    Form for creating and editing a category budget.
+
+    Only the user's expense categories without a budget (plus the
+    budget's own category, when editing) are offered.
+    """
+
+    class Meta:
+        model = Budget
+        fields = ['category', 'amount']
+        labels = {
+            'category': 'Categoria',
+            'amount': 'Limite mensal',
+        }
+        help_texts = {
+            'amount': 'Quanto você pretende gastar nesta categoria por mês.',
+        }
+        widgets = {
+            'category': forms.Select(attrs={
+                'class': TAILWIND_SELECT_CLASSES,
+            }),
+            'amount': forms.NumberInput(attrs={
+                'class': TAILWIND_INPUT_CLASSES,
+                'placeholder': '0.00',
+                'step': '0.01',
+                'min': '0.01',
+            }),
+        }
+
+    def __init__(self, *args, user=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if user is not None:
+            categories = Category.objects.filter(user=user, category_type='expense')
+            taken = Budget.objects.filter(user=user)
+            if self.instance.pk:
+                taken = taken.exclude(pk=self.instance.pk)
+            self.fields['category'].queryset = (
+                categories.exclude(pk__in=taken.values('category'))
+                .order_by('name')
+            )
+
+    def clean_amount(self):
+        amount = self.cleaned_data['amount']
+        if amount <= 0:
+            raise forms.ValidationError('O limite deve ser maior que zero.')
+        return amount
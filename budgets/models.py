@@ -0,0 +1,59 @@
+"""
+Budget models for the Finanpy project.
+
+Defines the Budget model: a monthly spending limit for an expense
+category. What the category spent is read from the MonthlySummary
+rollup, not stored here (see budgets.status).
+"""
+from django.conf import settings
+from django.db import models
+
+
+class Budget(models.Model):
+    """
+    Monthly spending limit of one of the user's expense categories.
+
+    The same limit applies to every month; each category has at most
+    one budget.
+    """
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='budgets',
+        verbose_name='usuário',
+    )
+    category = models.ForeignKey(
+        'categories.Category',
+        on_delete=models.CASCADE,
+        related_name='budgets',
+        db_index=False,
+        verbose_name='categoria',
+    )
+    amount = models.DecimalField(
+        max_digits=12,
+        decimal_places=2,
+        verbose_name='limite mensal',
+    )
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='criado em',
+    )
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        verbose_name='atualizado em',
+    )
+
+    class Meta:
+        verbose_name = 'orçamento'
+        verbose_name_plural = 'orçamentos'
+        constraints = [
+            # Also serves the category foreign key.
+            models.UniqueConstraint(
+                fields=['category'],
+                name='budget_category_unique',
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.category} - R$ {self.amount}'
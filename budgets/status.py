@@ -0,0 +1,89 @@
+"""
+Budget status for the Finanpy project.
+
+What a category spent in a month is never summed from the transactions:
+it is the sum of the category's expense rows of the MonthlySummary
+rollup for that month (one row per account), which every transaction
+write path updates in the same DB transaction as the write (see
+transactions.rollups) and ``manage.py rebuild_monthly_summaries``
+regenerates. Transfers are not spending and are not in the rollup.
+
+``budget_status`` reads the user's budgets with their category and
+their spend in one query: the spend is a correlated subquery served by
+the (user, year_month, transaction_type) index of the rollup, a handful
+of rows per budget.
+"""
+from decimal import Decimal
+
+from django.db.models import DecimalField, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+from budgets.models import Budget
+from transactions.models import MonthlySummary
+
+CENT = Decimal('0.01')
+
+# From this share of the limit on, a budget is flagged as close to it.
+WARNING_RATIO = Decimal('0.8')
+
+STATUS_OK = 'ok'
+STATUS_WARNING = 'warning'
+STATUS_OVER = 'over'
+
+
+def budget_status(user, month, category_ids=None):
+    """
+    Return the user's budgets with what was spent in ``month``.
+
+    ``month`` is the first day of the month. Pass ``category_ids`` to
+    check only some categories. Each budget gets ``spent``,
+    ``remaining``, ``percent`` (of the limit, for progress bars) and
+    ``status`` (STATUS_OK, STATUS_WARNING or STATUS_OVER); the list is
+    ordered by category name.
+    """
+    spent = (
+        MonthlySummary.objects.filter(
+            user=user,
+            year_month=month,
+            transaction_type='expense',
+            category=OuterRef('category'),
+        )
+        .order_by()
+        .values('category')
+        .annotate(total=Sum('total'))
+        .values('total')
+    )
+    budgets = (
+        Budget.objects.filter(user=user)
+        .select_related('category')
+        .annotate(spent=Coalesce(
+            Subquery(spent),
+            Value(Decimal('0')),
+            output_field=DecimalField(max_digits=14, decimal_places=2),
+        ))
+    )
+    if category_ids is not None:
+        budgets = budgets.filter(category_id__in=category_ids)
+    # A few rows: sorted here rather than with a temporary B-tree.
+    budgets = sorted(budgets, key=lambda budget: budget.category.name.lower())
+    for budget in budgets:
+        # SQLite sums decimals as floats; round back to cents.
+        budget.spent = Decimal(str(budget.spent)).quantize(CENT)
+        budget.remaining = budget.amount - budget.spent
+        ratio = budget.spent / budget.amount if budget.amount else Decimal('1')
+        budget.percent = min(int(ratio * 100), 100)
+        if budget.spent > budget.amount:
+            budget.status = STATUS_OVER
+        elif ratio >= WARNING_RATIO:
+            budget.status = STATUS_WARNING
+        else:
+            budget.status = STATUS_OK
+    return budgets
+
+
+def over_budget(user, month, category_ids=None):
+    """Return the budgets of ``budget_status`` that are over their limit."""
+    return [
+        budget for budget in budget_status(user, month, category_ids)
+        if budget.status == STATUS_OVER
+    ]
@@ -0,0 +1,293 @@
+"""
+Unit tests for the budgets app.
+
+Tests the budget status read from the monthly rollup, the budget views
+and form, and the budget flags on the dashboard and on expense entry.
+"""
+from datetime import date
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from accounts.models import Account
+from budgets.forms import BudgetForm
+from budgets.models import Budget
+from budgets.status import STATUS_OK, STATUS_OVER, STATUS_WARNING, budget_status, over_budget
+from categories.models import Category
+from transactions.models import MonthlySummary, Transaction, Transfer
+from transactions.rollups import rebuild_monthly_summaries
+from transactions.services import apply_transaction_changes
+from transactions.tests import plan_problems
+from transactions.transfers import create_transfers
+
+User = get_user_model()
+
+
+class BudgetTestMixin:
+    """Creates a user with an account, two expense categories and budgets."""
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.user = User.objects.create_user(email='budget@example.com', password='testpass123')
+        self.account = Account.objects.create(
+            user=self.user, name='Corrente', account_type='checking', balance=Decimal('5000.00'),
+        )
+        self.food = Category.objects.create(user=self.user, name='Alimentação', category_type='expense')
+        self.fun = Category.objects.create(user=self.user, name='Lazer', category_type='expense')
+        self.salary = Category.objects.create(user=self.user, name='Salário', category_type='income')
+        self.food_budget = Budget.objects.create(user=self.user, category=self.food, amount=Decimal('500.00'))
+        self.fun_budget = Budget.objects.create(user=self.user, category=self.fun, amount=Decimal('200.00'))
+        self.month = date.today().replace(day=1)
+        self.client.force_login(self.user)
+
+    def expense(self, category, amount, day=None, account=None):
+        transaction = Transaction.objects.create(
+            user=self.user,
+            account=account or self.account,
+            category=category,
+            transaction_type='expense',
+            amount=Decimal(amount),
+            date=day or self.month,
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            apply_transaction_changes(added=[transaction])
+        return transaction
+
+
+class BudgetStatusTests(BudgetTestMixin, TestCase):
+    """Spend comes from the MonthlySummary rollup, in one query."""
+
+    def test_spend_and_status(self):
+        savings = Account.objects.create(user=self.user, name='Poupança', account_type='savings')
+        self.expense(self.food, '300.00')
+        self.expense(self.food, '150.00', account=savings)
+        self.expense(self.fun, '250.00')
+        budgets = budget_status(self.user, self.month)
+
+        self.assertEqual([budget.category for budget in budgets], [self.food, self.fun])
+        food, fun = budgets
+        self.assertEqual(food.spent, Decimal('450.00'))
+        self.assertEqual(food.remaining, Decimal('50.00'))
+        self.assertEqual(food.percent, 90)
+        self.assertEqual(food.status, STATUS_WARNING)
+        self.assertEqual(fun.spent, Decimal('250.00'))
+        self.assertEqual(fun.percent, 100)
+        self.assertEqual(fun.status, STATUS_OVER)
+
+    def test_unspent_budget_is_ok(self):
+        food, fun = budget_status(self.user, self.month)
+        self.assertEqual(food.spent, Decimal('0.00'))
+        self.assertEqual(food.status, STATUS_OK)
+
+    def test_other_months_and_income_do_not_count(self):
+        last_month = date(2020, 1, 1)
+        self.expense(self.food, '400.00', day=last_month)
+        income = Transaction.objects.create(
+            user=self.user, account=self.account, category=self.salary,
+            transaction_type='income', amount=Decimal('900.00'), date=self.month,
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            apply_transaction_changes(added=[income])
+        food = budget_status(self.user, self.month)[0]
+        self.assertEqual(food.spent, Decimal('0.00'))
+        self.assertEqual(budget_status(self.user, last_month)[0].spent, Decimal('400.00'))
+
+    def test_transfers_are_not_spending(self):
+        savings = Account.objects.create(user=self.user, name='Poupança', account_type='savings')
+        create_transfers([Transfer(
+            user=self.user, from_account=self.account, to_account=savings,
+            amount=Decimal('1000.00'), date=self.month,
+        )])
+        self.assertEqual(over_budget(self.user, self.month), [])
+
+    def test_edit_and_delete_update_the_spend(self):
+        transaction = self.expense(self.fun, '250.00')
+        self.assertEqual(over_budget(self.user, self.month), [self.fun_budget])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('transactions:edit', args=[transaction.pk]), {
+                'account': self.account.pk,
+                'category': self.fun.pk,
+                'transaction_type': 'expense',
+                'amount': '50.00',
+                'date': self.month.isoformat(),
+                'description': '',
+            })
+        self.assertEqual(budget_status(self.user, self.month)[1].spent, Decimal('50.00'))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('transactions:delete', args=[transaction.pk]))
+        self.assertEqual(budget_status(self.user, self.month)[1].spent, Decimal('0.00'))
+
+    def test_rebuild_gives_the_same_spend(self):
+        self.expense(self.food, '120.00')
+        self.expense(self.fun, '80.00')
+        before = [budget.spent for budget in budget_status(self.user, self.month)]
+        MonthlySummary.objects.all().delete()
+        rebuild_monthly_summaries()
+        after = [budget.spent for budget in budget_status(self.user, self.month)]
+        self.assertEqual(after, before)
+
+    def test_one_indexed_query_for_all_budgets(self):
+        for name in ('Mercado', 'Transporte', 'Saúde'):
+            category = Category.objects.create(user=self.user, name=name, category_type='expense')
+            Budget.objects.create(user=self.user, category=category, amount=Decimal('100.00'))
+            self.expense(category, '10.00')
+        with CaptureQueriesContext(connection) as queries:
+            budgets = budget_status(self.user, self.month)
+        self.assertEqual(len(budgets), 5)
+        self.assertEqual(len(queries), 1)
+        if connection.vendor == 'sqlite':
+            self.assertEqual(plan_problems(queries[0]['sql']), [])
+
+    def test_only_some_categories(self):
+        self.expense(self.fun, '250.00')
+        self.assertEqual(over_budget(self.user, self.month, [self.food.pk]), [])
+        self.assertEqual(over_budget(self.user, self.month, [self.fun.pk]), [self.fun_budget])
+
+    def test_other_users_budgets_are_not_read(self):
+        other = User.objects.create_user(email='other@example.com', password='testpass123')
+        self.assertEqual(budget_status(other, self.month), [])
+
+
+class BudgetViewTests(BudgetTestMixin, TestCase):
+    """Budget pages are scoped to the logged-in user."""
+
+    def test_list_shows_progress_and_flags(self):
+        self.expense(self.fun, '250.00')
+        response = self.client.get(reverse('budgets:list'))
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Alimentação')
+        self.assertContains(response, 'Acima do limite')
+        self.assertEqual(response.context['over_count'], 1)
+
+    def test_list_requires_login(self):
+        self.client.logout()
+        response = self.client.get(reverse('budgets:list'))
+        self.assertEqual(response.status_code, 302)
+
+    def test_create(self):
+        market = Category.objects.create(user=self.user, name='Mercado', category_type='expense')
+        response = self.client.post(reverse('budgets:create'), {
+            'category': market.pk,
+            'amount': '300.00',
+        })
+        self.assertRedirects(response, reverse('budgets:list'))
+        budget = Budget.objects.get(category=market)
+        self.assertEqual(budget.user, self.user)
+        self.assertEqual(budget.amount, Decimal('300.00'))
+
+    def test_edit(self):
+        response = self.client.post(reverse('budgets:edit', args=[self.food_budget.pk]), {
+            'category': self.food.pk,
+            'amount': '800.00',
+        })
+        self.assertRedirects(response, reverse('budgets:list'))
+        self.food_budget.refresh_from_db()
+        self.assertEqual(self.food_budget.amount, Decimal('800.00'))
+
+    def test_delete(self):
+        response = self.client.post(reverse('budgets:delete', args=[self.food_budget.pk]))
+        self.assertRedirects(response, reverse('budgets:list'))
+        self.assertFalse(Budget.objects.filter(pk=self.food_budget.pk).exists())
+
+    def test_data_version_moves_after_the_save(self):
+        """The cache is invalidated once the budget change is written."""
+        market = Category.objects.create(user=self.user, name='Mercado', category_type='expense')
+        seen = []
+
+        def invalidate(user_id):
+            seen.append(sorted(Budget.objects.filter(user=self.user).values_list('amount', flat=True)))
+
+        with mock.patch('budgets.views.invalidate_user_data', invalidate):
+            self.client.post(reverse('budgets:create'), {'category': market.pk, 'amount': '300.00'})
+            self.client.post(reverse('budgets:edit', args=[self.food_budget.pk]), {
+                'category': self.food.pk, 'amount': '800.00',
+            })
+            self.client.post(reverse('budgets:delete', args=[self.fun_budget.pk]))
+        self.assertEqual(seen, [
+            [Decimal('200.00'), Decimal('300.00'), Decimal('500.00')],
+            [Decimal('200.00'), Decimal('300.00'), Decimal('800.00')],
+            [Decimal('300.00'), Decimal('800.00')],
+        ])
+
+    def test_other_users_budgets_are_404(self):
+        other = User.objects.create_user(email='other@example.com', password='testpass123')
+        self.client.force_login(other)
+        for name in ('budgets:edit', 'budgets:delete'):
+            response = self.client.get(reverse(name, args=[self.food_budget.pk]))
+            self.assertEqual(response.status_code, 404)
+
+    def test_dashboard_shows_flags(self):
+        self.expense(self.fun, '250.00')
+        response = self.client.get(reverse('dashboard'))
+        self.assertContains(response, 'Orçamentos do Mês')
+        self.assertEqual(
+            [budget.category for budget in response.context['budget_alerts']], [self.fun],
+        )
+
+    def test_dashboard_updates_after_budget_change(self):
+        self.expense(self.fun, '150.00')
+        self.assertEqual(self.client.get(reverse('dashboard')).context['budget_alerts'], [])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('budgets:edit', args=[self.fun_budget.pk]), {
+                'category': self.fun.pk,
+                'amount': '100.00',
+            })
+        response = self.client.get(reverse('dashboard'))
+        self.assertEqual(len(response.context['budget_alerts']), 1)
+
+    def test_expense_over_budget_warns(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse('transactions:create'), {
+                'account': self.account.pk,
+                'category': self.fun.pk,
+                'transaction_type': 'expense',
+                'amount': '250.00',
+                'date': self.month.isoformat(),
+                'description': 'Show',
+            }, follow=True)
+        messages = [str(message) for message in response.context['messages']]
+        self.assertIn('Orçamento de Lazer excedido', ' '.join(messages))
+
+    def test_expense_within_budget_does_not_warn(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse('transactions:create'), {
+                'account': self.account.pk,
+                'category': self.fun.pk,
+                'transaction_type': 'expense',
+                'amount': '20.00',
+                'date': self.month.isoformat(),
+                'description': 'Cinema',
+            }, follow=True)
+        messages = [str(message) for message in response.context['messages']]
+        self.assertNotIn('excedido', ' '.join(messages))
+
+
+class BudgetFormTests(BudgetTestMixin, TestCase):
+    """BudgetForm offers the user's expense categories without a budget."""
+
+    def test_category_choices(self):
+        market = Category.objects.create(user=self.user, name='Mercado', category_type='expense')
+        other = User.objects.create_user(email='other@example.com', password='testpass123')
+        Category.objects.create(user=other, name='Outra', category_type='expense')
+        form = BudgetForm(user=self.user)
+        self.assertEqual(list(form.fields['category'].queryset), [market])
+
+    def test_editing_keeps_own_category(self):
+        form = BudgetForm(user=self.user, instance=self.food_budget)
+        self.assertIn(self.food, form.fields['category'].queryset)
+        self.assertNotIn(self.fun, form.fields['category'].queryset)
+
+    def test_amount_must_be_positive(self):
+        market = Category.objects.create(user=self.user, name='Mercado', category_type='expense')
+        form = BudgetForm({'category': market.pk, 'amount': '0'}, user=self.user)
+        self.assertFalse(form.is_valid())
+        self.assertIn('amount', form.errors)
@@ -0,0 +1,26 @@
+"""
+URL configuration for the budgets app.
+
+Provides routes for the budget progress page and the CRUD of budgets:
+- list: This month's spend of each budget.
+- create: Form to create a budget.
+- edit: Form to update a budget.
+- delete: Confirmation page to delete a budget.
+"""
+from django.urls import path
+
+from budgets.views import (
+    BudgetCreateView,
+    BudgetDeleteView,
+    BudgetListView,
+    BudgetUpdateView,
+)
+
+app_name = 'budgets'
+
+urlpatterns = [
+    path('', BudgetListView.as_view(), name='list'),
+    path('create/', BudgetCreateView.as_view(), name='create'),
+    path('<int:pk>/edit/', BudgetUpdateView.as_view(), name='edit'),
+    path('<int:pk>/delete/', BudgetDeleteView.as_view(), name='delete'),
+]
@@ -0,0 +1,92 @@
+"""
+Budget views for the Finanpy project.
+
+Provides the budget progress page and CRUD views for category budgets:
+- BudgetListView: The user's budgets with this month's spend.
+- BudgetCreateView: Creates a budget for one of the user's categories.
+- BudgetUpdateView: Changes the limit (or category) of a budget.
+- BudgetDeleteView: Deletes a budget.
+"""
+from django.contrib import messages
+from django.contrib.auth.mixins import LoginRequiredMixin
+from django.urls import reverse_lazy
+from django.utils import timezone
+from django.views.generic import CreateView, DeleteView, TemplateView, UpdateView
+
+from budgets.forms import BudgetForm
+from budgets.models import Budget
+from budgets.status import STATUS_OVER, budget_status
+from core.cache import invalidate_user_data
+
+
+class BudgetListView(LoginRequiredMixin, TemplateView):
+    """Display the user's budgets with this month's spend and flags."""
+
+    template_name = 'budgets/budget_list.html'
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        month = timezone.localdate().replace(day=1)
+        budgets = budget_status(self.request.user, month)
+        context.update({
+            'month': month,
+            'budgets': budgets,
+            'over_count': sum(1 for budget in budgets if budget.status == STATUS_OVER),
+        })
+        return context
+
+
+class BudgetFormMixin:
+    """Shared setup of the budget create and edit views."""
+
+    model = Budget
+    form_class = BudgetForm
+    template_name = 'budgets/budget_form.html'
+    success_url = reverse_lazy('budgets:list')
+
+    def get_form_kwargs(self):
+        kwargs = super().get_form_kwargs()
+        kwargs['user'] = self.request.user
+        return kwargs
+
+
+class BudgetCreateView(LoginRequiredMixin, BudgetFormMixin, CreateView):
+    """Create a budget for one of the logged-in user's expense categories."""
+
+    def form_valid(self, form):
+        form.instance.user = self.request.user
+        response = super().form_valid(form)
+        invalidate_user_data(self.request.user.pk)
+        messages.success(self.request, 'Orçamento criado com sucesso!')
+        return response
+
+
+class BudgetUpdateView(LoginRequiredMixin, BudgetFormMixin, UpdateView):
+    """Edit a budget owned by the logged-in user."""
+
+    def get_queryset(self):
+        return Budget.objects.filter(user=self.request.user)
+
+    def form_valid(self, form):
+        response = super().form_valid(form)
+        invalidate_user_data(self.request.user.pk)
+        messages.success(self.request, 'Orçamento atualizado com sucesso!')
+        return response
+
+
+class BudgetDeleteView(LoginRequiredMixin, DeleteView):
+    """Delete a budget owned by the logged-in user."""
+
+    model = Budget
+    template_name = 'budgets/budget_confirm_delete.html'
+    success_url = reverse_lazy('budgets:list')
+    context_object_name = 'budget'
+
+    def get_queryset(self):
+        return Budget.objects.filter(user=self.request.user).select_related('category')
+
+    def form_valid(self, form):
+        response = super().form_valid(form)
+        invalidate_user_data(self.request.user.pk)
+        messages.success(self.request, 'Orçamento excluído com sucesso!')
+        return response
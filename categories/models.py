@@ -62,6 +62,12 @@ class Category(models.Model):
         verbose_name = 'categoria'
         verbose_name_plural = 'categorias'
         ordering = ['category_type', 'name']
+        indexes = [
+            models.Index(
+                fields=['user', 'category_type', 'name'],
+                name='category_user_type_name_idx',
+            ),
+        ]
 
     def __str__(self):
         return self.name
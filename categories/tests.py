@@ -3,6 +3,8 @@ Unit tests for the categories app.
 
 Tests Category model, CRUD views, and CategoryForm.
 """
+from unittest import mock
+
 from django.contrib.auth import get_user_model
 from django.test import Client, TestCase
 from django.urls import reverse
@@ -117,6 +119,26 @@ class CategoryViewTests(TestCase):
         self.category_a.refresh_from_db()
         self.assertEqual(self.category_a.name, 'Categoria A Atualizada')
 
+    def test_data_version_moves_after_the_save(self):
+        """The data and reference caches are invalidated once the change is written."""
+        self.client.force_login(self.user_a)
+        seen = []
+
+        def invalidate(user_id):
+            seen.append(list(
+                Category.objects.filter(user=self.user_a).order_by('name').values_list('name', flat=True)
+            ))
+
+        with mock.patch('categories.views.invalidate_user_data', invalidate), \
+                mock.patch('categories.views.invalidate_reference_data', invalidate):
+            self.client.post(reverse('categories:create'), {
+                'name': 'Nova', 'category_type': 'income', 'icon': '', 'color': '#10b981',
+            })
+            self.client.post(reverse('categories:edit', args=[self.category_a.pk]), {
+                'name': 'Renomeada', 'category_type': 'expense', 'icon': '', 'color': '#06b6d4',
+            })
+        self.assertEqual(seen, [['Categoria A', 'Nova']] * 2 + [['Nova', 'Renomeada']] * 2)
+
     def test_user_cannot_edit_other_user_category(self):
         """User cannot edit another user's category (404)."""
         self.client.force_login(self.user_b)
@@ -9,11 +9,16 @@ Provides CRUD views for managing transaction categories:
 """
 from django.contrib import messages
 from django.contrib.auth.mixins import LoginRequiredMixin
+from django.db import transaction as db_transaction
 from django.urls import reverse_lazy
+from django.utils import timezone
 from django.views.generic import CreateView, DeleteView, ListView, UpdateView
 
+from api.tombstones import record_deletion
 from categories.forms import CategoryForm
 from categories.models import Category
+from core.cache import invalidate_reference_data, invalidate_user_data
+from transactions.rollups import merge_category_into_uncategorized
 
 
 class CategoryListView(LoginRequiredMixin, ListView):
@@ -37,8 +42,11 @@ class CategoryCreateView(LoginRequiredMixin, CreateView):
 
     def form_valid(self, form):
         form.instance.user = self.request.user
+        response = super().form_valid(form)
+        invalidate_user_data(self.request.user.pk)
+        invalidate_reference_data(self.request.user.pk)
         messages.success(self.request, 'Categoria criada com sucesso!')
-        return super().form_valid(form)
+        return response
 
 
 class CategoryUpdateView(LoginRequiredMixin, UpdateView):
@@ -53,8 +61,11 @@ class CategoryUpdateView(LoginRequiredMixin, UpdateView):
         return Category.objects.filter(user=self.request.user)
 
     def form_valid(self, form):
+        response = super().form_valid(form)
+        invalidate_user_data(self.request.user.pk)
+        invalidate_reference_data(self.request.user.pk)
         messages.success(self.request, 'Categoria atualizada com sucesso!')
-        return super().form_valid(form)
+        return response
 
 
 class CategoryDeleteView(LoginRequiredMixin, DeleteView):
@@ -68,5 +79,15 @@ class CategoryDeleteView(LoginRequiredMixin, DeleteView):
         return Category.objects.filter(user=self.request.user)
 
     def form_valid(self, form):
+        with db_transaction.atomic():
+            # Its transactions become uncategorized; so do their rollups.
+            merge_category_into_uncategorized(self.object)
+            # Uncategorize them here rather than via SET_NULL so their
+            # updated_at moves and synced clients see the change.
+            self.object.transactions.update(category=None, updated_at=timezone.now())
+            record_deletion(self.object)
+            response = super().form_valid(form)
+        invalidate_user_data(self.request.user.pk)
+        invalidate_reference_data(self.request.user.pk)
         messages.success(self.request, 'Categoria excluída com sucesso!')
-        return super().form_valid(form)
+        return response
@@ -2,6 +2,9 @@
 ASGI config for core project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+Served this way, the dashboard runs its queries concurrently, e.g.:
+
+    uvicorn core.asgi:application --workers 4
 
 For more information on this file, see
 https://docs.djangoproject.com/en/6.0/howto/deployment/asgi/
@@ -12,5 +15,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
+# Serve the async views (see FINANPY_SERVER in core.settings).
+os.environ.setdefault('FINANPY_SERVER', 'asgi')
 
 application = get_asgi_application()
@@ -0,0 +1,70 @@
+"""
+Per-user cache versioning for the Finanpy project.
+
+Each user has a data version stored in the cache. Cached pages and
+fragments put the version in their keys, so bumping it makes every
+entry of that user unreachable at once without deleting anything.
+Write paths call ``invalidate_user_data`` after any change to the
+user's transactions, accounts or categories.
+
+Reference data (the accounts and categories offered in forms, see
+core.reference) has a version of its own, bumped by
+``invalidate_reference_data`` only when accounts or categories change,
+so it stays cached while transactions are being entered.
+"""
+import time
+
+from django.core.cache import cache
+from django.db import transaction as db_transaction
+
+DATA_VERSION_KEY = 'user:{user_id}:data-version'
+REFERENCE_VERSION_KEY = 'user:{user_id}:reference-version'
+
+
+def get_data_version(user_id, key_format=DATA_VERSION_KEY):
+    """Return the current data version of a user, creating it if needed."""
+    key = key_format.format(user_id=user_id)
+    version = cache.get(key)
+    if version is None:
+        # A fresh, time-based start never collides with versions used
+        # before the key was evicted.
+        cache.add(key, time.time_ns(), None)
+        version = cache.get(key)
+    return version
+
+
+def bump_data_version(user_id, key_format=DATA_VERSION_KEY):
+    """Move a user to a new data version immediately."""
+    key = key_format.format(user_id=user_id)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, time.time_ns(), None)
+
+
+def invalidate_user_data(user_id):
+    """
+    Bump a user's data version once the current DB transaction commits.
+
+    Bumping before the commit would let a concurrent reader cache the
+    old data under the new version.
+    """
+    db_transaction.on_commit(lambda: bump_data_version(user_id))
+
+
+def invalidate_reference_data(user_id):
+    """Bump a user's reference data version once the DB transaction commits."""
+    db_transaction.on_commit(lambda: bump_data_version(user_id, REFERENCE_VERSION_KEY))
+
+
+def user_cache_key(prefix, user_id, *parts):
+    """Build a cache key bound to the user's current data version."""
+    version = get_data_version(user_id)
+    suffix = ':'.join(str(part) for part in parts)
+    return f'{prefix}:{user_id}:{version}:{suffix}'
+
+
+def reference_cache_key(prefix, user_id):
+    """Build a cache key prefix bound to the user's reference data version."""
+    version = get_data_version(user_id, REFERENCE_VERSION_KEY)
+    return f'{prefix}:{user_id}:{version}'
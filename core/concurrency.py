@@ -0,0 +1,40 @@
+"""
+Concurrent database reads for the async views of the Finanpy project.
+
+Django's async ORM methods run every query through the single thread
+that sync_to_async keeps for thread-sensitive code, so independent
+queries still run one after another. ``gather_reads`` instead runs
+each read in a thread of a bounded pool. Every thread has its own
+database connection, so the queries overlap and the wait is about that
+of the slowest one. The connection is closed when the read is done;
+with PostgreSQL's pool this returns it to the pool.
+
+Reads run outside the caller's DB transaction and only see committed
+data, which is what a page built from cached figures needs.
+"""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.db import connections
+
+# Upper bound on the reads (and connections) in flight per process.
+MAX_CONCURRENT_READS = 8
+
+_executor = ThreadPoolExecutor(
+    max_workers=MAX_CONCURRENT_READS,
+    thread_name_prefix='finanpy-read',
+)
+
+
+def _read(func):
+    try:
+        return func()
+    finally:
+        connections.close_all()
+
+
+async def gather_reads(*funcs):
+    """Call each function in the read pool at once; return their results in order."""
+    read = sync_to_async(_read, thread_sensitive=False, executor=_executor)
+    return await asyncio.gather(*(read(func) for func in funcs))
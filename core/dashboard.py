@@ -0,0 +1,108 @@
+"""
+Dashboard figures for the Finanpy project.
+
+The dashboard is built from four independent reads, one query each:
+the active accounts with their month-opening balances, the month's
+income and expenses, the budgets with their spend, and the latest
+transactions. ``build_dashboard_data`` runs them one after another
+(WSGI); ``abuild_dashboard_data`` runs them concurrently (ASGI, see
+core.concurrency), so it takes about as long as the slowest one.
+"""
+from datetime import timedelta
+from decimal import Decimal
+from functools import partial
+
+from django.db.models import Case, DecimalField, F, Q, Sum, Value, When
+from django.db.models.functions import Coalesce
+
+from accounts.models import Account
+from budgets.status import STATUS_OK, budget_status
+from core.concurrency import gather_reads
+from transactions.models import MonthlySummary, Transaction
+from transactions.snapshots import annotate_balance_as_of
+
+
+def account_figures(user, month_start):
+    """Active accounts, total balance and the balance the month opened with."""
+    # Saldo de abertura do mês: snapshot do fim do mês anterior +
+    # transações posteriores, na mesma consulta
+    accounts = list(
+        annotate_balance_as_of(
+            Account.objects.filter(user=user, is_active=True),
+            month_start - timedelta(days=1),
+            name='month_opening_balance',
+        ).order_by('name')
+    )
+    total_balance = sum((account.balance for account in accounts), Decimal('0'))
+    month_opening_balance = sum(
+        (Decimal(account.month_opening_balance) for account in accounts),
+        Decimal('0'),
+    ).quantize(Decimal('0.01'))
+    return {
+        'accounts': accounts,
+        'total_balance': total_balance,
+        'month_opening_balance': month_opening_balance,
+    }
+
+
+def monthly_figures(user, month_start):
+    """The month's income, expenses and balance, in one aggregate."""
+    zero = Value(Decimal('0'), output_field=DecimalField())
+    monthly = MonthlySummary.objects.filter(
+        user=user,
+        year_month=month_start,
+    ).aggregate(
+        income=Coalesce(Sum('total', filter=Q(transaction_type='income')), zero),
+        expenses=Coalesce(Sum('total', filter=Q(transaction_type='expense')), zero),
+        balance=Coalesce(
+            Sum(Case(
+                When(transaction_type='income', then=F('total')),
+                default=-F('total'),
+            )),
+            zero,
+        ),
+    )
+    return {
+        'monthly_income': monthly['income'],
+        'monthly_expenses': monthly['expenses'],
+        'monthly_balance': monthly['balance'],
+    }
+
+
+def budget_figures(user, month_start):
+    """The budgets with the month's spend, and those close to or over it."""
+    budgets = budget_status(user, month_start)
+    return {
+        'budgets': budgets,
+        'budget_alerts': [budget for budget in budgets if budget.status != STATUS_OK],
+    }
+
+
+def recent_transactions(user, month_start):
+    """The user's five latest transactions."""
+    return {
+        'recent_transactions': list(
+            Transaction.objects.filter(user=user)
+            .select_related('account', 'category')
+            .order_by('-date', '-created_at', '-id')[:5]
+        ),
+    }
+
+
+DASHBOARD_READS = (account_figures, monthly_figures, budget_figures, recent_transactions)
+
+
+def build_dashboard_data(user, month_start):
+    """Return the dashboard figures, reading them one after another."""
+    data = {}
+    for read in DASHBOARD_READS:
+        data.update(read(user, month_start))
+    return data
+
+
+async def abuild_dashboard_data(user, month_start):
+    """Return the dashboard figures, reading them concurrently."""
+    data = {}
+    for part in await gather_reads(*(partial(read, user, month_start) for read in DASHBOARD_READS)):
+        data.update(part)
+    return data
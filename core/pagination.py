@@ -0,0 +1,168 @@
+"""
+Keyset (seek) pagination for the Finanpy project.
+
+Unlike Django's Paginator, which runs COUNT(*) and OFFSET queries that
+get slower the deeper the page, the KeysetPaginator remembers the
+ordering values of the last row shown and asks the database for the
+rows that come after it. Every page is a single indexed range query,
+so page 1000 costs the same as page 1 and rows inserted while a user
+is paging never cause duplicates or gaps.
+
+Cursors are opaque, URL-safe strings. The ordering must end in a
+unique, non-nullable field (usually ``-id``) so it is total.
+"""
+import base64
+import json
+from datetime import date, datetime
+from decimal import Decimal
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+
+
+class InvalidCursor(ValueError):
+    """Raised when a cursor cannot be decoded for the current ordering."""
+
+
+def _encode_value(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
+
+
+class KeysetPage:
+    """A page of results with cursors to its neighbours."""
+
+    def __init__(self, object_list, paginator, next_values, previous_values):
+        self.object_list = object_list
+        self.paginator = paginator
+        self.next_cursor = paginator.encode_cursor(next_values, 'next')
+        self.previous_cursor = paginator.encode_cursor(previous_values, 'prev')
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class KeysetPaginator:
+    """
+    Paginate a queryset by seeking past the ordering values of a cursor.
+
+    ``ordering`` is a sequence of field names using the usual ``-``
+    prefix for descending order, e.g. ``('-date', '-created_at', '-id')``.
+    It should match an index so each page is a range scan. The paginator
+    never counts rows: it fetches one extra row to know whether there is
+    another page in the direction of travel.
+    """
+
+    def __init__(self, queryset, per_page, ordering):
+        self.queryset = queryset
+        self.per_page = int(per_page)
+        self.ordering = tuple(ordering)
+        self.fields = [name.lstrip('-') for name in self.ordering]
+        self.descending = [name.startswith('-') for name in self.ordering]
+
+    def encode_cursor(self, values, direction):
+        if values is None:
+            return None
+        payload = json.dumps(
+            [direction, [_encode_value(v) for v in values]],
+            separators=(',', ':'),
+        )
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+    def decode_cursor(self, cursor):
+        """Return ``(direction, values)`` for a cursor string."""
+        try:
+            padded = cursor + '=' * (-len(cursor) % 4)
+            direction, raw = json.loads(base64.urlsafe_b64decode(padded))
+            if direction not in ('next', 'prev') or len(raw) != len(self.fields):
+                raise InvalidCursor('Cursor inválido.')
+        except (TypeError, ValueError) as exc:
+            raise InvalidCursor('Cursor inválido.') from exc
+        values = []
+        for name, value in zip(self.fields, raw):
+            try:
+                field = self.queryset.model._meta.get_field(name)
+            except FieldDoesNotExist:
+                # Annotations (e.g. a search rank) are used as-is.
+                values.append(value)
+                continue
+            try:
+                values.append(field.to_python(value))
+            except ValidationError as exc:
+                raise InvalidCursor('Cursor inválido.') from exc
+        return direction, values
+
+    def _seek_filter(self, values, forward):
+        """
+        Build the WHERE clause selecting rows after ``values``.
+
+        The leading ``lte``/``gte`` bound on the first field gives the
+        database a simple index range; the OR of equality prefixes then
+        breaks ties on the remaining fields.
+        """
+        clauses = Q()
+        for i, (name, desc) in enumerate(zip(self.fields, self.descending)):
+            lookup = 'lt' if desc == forward else 'gt'
+            clause = Q(**{f'{name}__{lookup}': values[i]})
+            for prev_name, prev_value in zip(self.fields[:i], values[:i]):
+                clause &= Q(**{prev_name: prev_value})
+            clauses |= clause
+        first_lookup = 'lte' if self.descending[0] == forward else 'gte'
+        return Q(**{f'{self.fields[0]}__{first_lookup}': values[0]}) & clauses
+
+    def _values_of(self, obj):
+        if isinstance(obj, dict):
+            # Rows of a ``values()`` queryset.
+            return [obj[name] for name in self.fields]
+        return [getattr(obj, name) for name in self.fields]
+
+    def get_page(self, cursor=None):
+        """Return the KeysetPage following (or preceding) ``cursor``."""
+        direction, values = ('next', None)
+        if cursor:
+            direction, values = self.decode_cursor(cursor)
+        forward = direction == 'next'
+
+        queryset = self.queryset
+        if values is not None:
+            queryset = queryset.filter(self._seek_filter(values, forward))
+        if forward:
+            ordering = self.ordering
+        else:
+            ordering = [
+                name[1:] if name.startswith('-') else f'-{name}'
+                for name in self.ordering
+            ]
+        rows = list(queryset.order_by(*ordering)[:self.per_page + 1])
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if not forward:
+            rows.reverse()
+
+        if not rows:
+            return KeysetPage(rows, self, None, None)
+        # Moving forward from a cursor implies there is something before
+        # it (and vice versa); this avoids an extra query per page.
+        has_next = has_more if forward else True
+        has_previous = values is not None if forward else has_more
+        return KeysetPage(
+            rows,
+            self,
+            self._values_of(rows[-1]) if has_next else None,
+            self._values_of(rows[0]) if has_previous else None,
+        )
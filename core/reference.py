@@ -0,0 +1,46 @@
+"""
+Cached reference data for the Finanpy project.
+
+The accounts and categories offered by the transaction forms change
+rarely compared with how often the forms are opened and submitted.
+``reference_data`` keeps each user's lists in the cache under the
+user's reference data version (see core.cache), so a warm form renders
+its choices and validates the submitted ids without reading either
+table. The account and category views bump that version when they
+change anything.
+
+The cached objects are only used as choices and foreign key targets:
+their balance may be older than the database's.
+"""
+from collections import namedtuple
+
+from django.core.cache import cache
+
+from accounts.models import Account
+from categories.models import Category
+from core.cache import reference_cache_key
+
+REFERENCE_TIMEOUT = 24 * 60 * 60
+
+ReferenceData = namedtuple('ReferenceData', ['accounts', 'categories'])
+
+
+def reference_data(user_id):
+    """Return a user's accounts (by name) and categories (by type and name)."""
+    prefix = reference_cache_key('reference', user_id)
+    keys = {name: f'{prefix}:{name}' for name in ReferenceData._fields}
+    cached = cache.get_many(keys.values())
+    data = {name: cached.get(key) for name, key in keys.items()}
+    if data['accounts'] is None:
+        # Accounts being deleted (see transactions.deletion) take no new
+        # transactions.
+        data['accounts'] = list(
+            Account.objects.filter(user_id=user_id, deletion_jobs__isnull=True).order_by('name')
+        )
+        cache.set(keys['accounts'], data['accounts'], REFERENCE_TIMEOUT)
+    if data['categories'] is None:
+        data['categories'] = list(
+            Category.objects.filter(user_id=user_id).order_by('category_type', 'name')
+        )
+        cache.set(keys['categories'], data['categories'], REFERENCE_TIMEOUT)
+    return ReferenceData(**data)
@@ -8,13 +8,30 @@ https://docs.djangoproject.com/en/6.0/topics/settings/
 
 For the full list of settings and their values, see
 https://docs.djangoproject.com/en/6.0/ref/settings/
+
+The FINANPY_PROFILE environment variable selects the settings profile:
+"development" (the default) or "production" (see the end of this file).
+FINANPY_DB_BACKEND selects the database: "sqlite" (the default) or
+"postgresql" (see Database below), and FINANPY_CACHE the cache (see
+Cache below).
 """
 
+import os
 from pathlib import Path
 
+from django.core.exceptions import ImproperlyConfigured
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
+FINANPY_PROFILE = os.environ.get('FINANPY_PROFILE', 'development')
+
+if FINANPY_PROFILE not in ('development', 'production'):
+    raise ImproperlyConfigured(f'Unknown FINANPY_PROFILE: {FINANPY_PROFILE!r}.')
+
+# Set to "asgi" by core.asgi: the dashboard then uses its async view.
+FINANPY_SERVER = os.environ.get('FINANPY_SERVER', 'wsgi')
+
 
 # Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/6.0/howto/deployment/checklist/
@@ -39,7 +56,10 @@ INSTALLED_APPS = [
     'django.contrib.staticfiles',
 
     'accounts',
+    'api',
+    'budgets',
     'categories',
+    'reports',
     'transactions',
     'users',
 ]
@@ -49,7 +69,7 @@ MIDDLEWARE = [
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
-    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'users.middleware.CachedAuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -77,12 +97,88 @@ WSGI_APPLICATION = 'core.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/6.0/ref/settings/#databases
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+FINANPY_DB_BACKEND = os.environ.get('FINANPY_DB_BACKEND', 'sqlite')
+
+if FINANPY_DB_BACKEND == 'sqlite':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.environ.get('FINANPY_SQLITE_PATH', BASE_DIR / 'db.sqlite3'),
+        }
     }
-}
+elif FINANPY_DB_BACKEND == 'postgresql':
+    # Requires requirements-postgres.txt. Connections come from
+    # psycopg's pool, so a request does not pay for connecting (the pool
+    # replaces CONN_MAX_AGE, which must stay 0). QuerySet.iterator()
+    # reads through server-side cursors (DISABLE_SERVER_SIDE_CURSORS is
+    # left off): exports, reconciliation and rebuilds stream their rows.
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.environ.get('POSTGRES_DB', 'finanpy'),
+            'USER': os.environ.get('POSTGRES_USER', 'finanpy'),
+            'PASSWORD': os.environ.get('POSTGRES_PASSWORD', ''),
+            'HOST': os.environ.get('POSTGRES_HOST', 'localhost'),
+            'PORT': os.environ.get('POSTGRES_PORT', '5432'),
+            'OPTIONS': {
+                'pool': {
+                    'min_size': int(os.environ.get('POSTGRES_POOL_MIN_SIZE', 2)),
+                    'max_size': int(os.environ.get('POSTGRES_POOL_MAX_SIZE', 10)),
+                    'timeout': int(os.environ.get('POSTGRES_POOL_TIMEOUT', 10)),
+                },
+            },
+        }
+    }
+else:
+    raise ImproperlyConfigured(f'Unknown FINANPY_DB_BACKEND: {FINANPY_DB_BACKEND!r}.')
+
+
+# Cache
+# https://docs.djangoproject.com/en/6.0/topics/cache/
+#
+# "locmem" is private to each process; with several worker processes
+# use "file" (the production default) or "redis" (requires
+# requirements-redis.txt), so every worker sees the same invalidations.
+
+FINANPY_CACHE = os.environ.get(
+    'FINANPY_CACHE', 'file' if FINANPY_PROFILE == 'production' else 'locmem',
+)
+
+if FINANPY_CACHE == 'locmem':
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'finanpy',
+            'OPTIONS': {'MAX_ENTRIES': 10000},
+        }
+    }
+elif FINANPY_CACHE == 'file':
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.environ.get('FINANPY_CACHE_DIR', BASE_DIR / '.cache'),
+            'OPTIONS': {'MAX_ENTRIES': 100000},
+        }
+    }
+elif FINANPY_CACHE == 'redis':
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ.get('REDIS_URL', 'redis://127.0.0.1:6379/1'),
+        }
+    }
+else:
+    raise ImproperlyConfigured(f'Unknown FINANPY_CACHE: {FINANPY_CACHE!r}.')
+
+
+# Sessions and authentication
+# https://docs.djangoproject.com/en/6.0/topics/http/sessions/
+#
+# Sessions are read from the cache (written through to the database)
+# and the logged-in user is cached by users.middleware, so a warm request
+# does not query the database before the view runs.
+
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
 
 
 # Password validation
@@ -144,3 +240,46 @@ MESSAGE_TAGS = {
     message_constants.WARNING: 'warning',
     message_constants.ERROR: 'error',
 }
+
+
+# Settings profiles
+# https://docs.djangoproject.com/en/6.0/howto/deployment/checklist/
+
+if FINANPY_PROFILE == 'production':
+    DEBUG = False
+    SECRET_KEY = os.environ['DJANGO_SECRET_KEY']
+    ALLOWED_HOSTS = os.environ.get('DJANGO_ALLOWED_HOSTS', '').split(',')
+
+    # Compiled templates are kept in memory for the life of the process.
+    TEMPLATES[0]['APP_DIRS'] = False
+    TEMPLATES[0]['OPTIONS']['loaders'] = [
+        ('django.template.loaders.cached.Loader', [
+            'django.template.loaders.filesystem.Loader',
+            'django.template.loaders.app_directories.Loader',
+        ]),
+    ]
+
+if FINANPY_PROFILE == 'production' and FINANPY_DB_BACKEND == 'sqlite':
+    # SQLite tuned for several worker processes writing at once:
+    # - WAL lets readers run while a write is in progress;
+    # - synchronous=NORMAL is durable across crashes of the app in WAL
+    #   mode and syncs far less often;
+    # - the page cache (cache_size, in KiB when negative) and mmap keep
+    #   hot pages in memory;
+    # - busy_timeout makes a writer wait for the lock instead of failing
+    #   with "database is locked";
+    # - IMMEDIATE transactions take the write lock when they begin, so a
+    #   transaction that read first cannot fail to upgrade its lock
+    #   (a failure busy_timeout does not retry).
+    DATABASES['default']['OPTIONS'] = {
+        'init_command': (
+            'PRAGMA journal_mode=WAL;'
+            'PRAGMA synchronous=NORMAL;'
+            'PRAGMA mmap_size=134217728;'
+            'PRAGMA cache_size=-20000;'
+            'PRAGMA busy_timeout=5000;'
+        ),
+        'transaction_mode': 'IMMEDIATE',
+    }
+    DATABASES['default']['CONN_MAX_AGE'] = 600
+    DATABASES['default']['CONN_HEALTH_CHECKS'] = True
@@ -7,14 +7,17 @@ The `urlpatterns` list routes URLs to views. For more information please see:
 from django.contrib import admin
 from django.urls import include, path
 
-from core.views import DashboardView, landing_page
+from core.views import dashboard_view, landing_page
 
 urlpatterns = [
     path('', landing_page, name='landing'),
-    path('dashboard/', DashboardView.as_view(), name='dashboard'),
+    path('dashboard/', dashboard_view, name='dashboard'),
     path('admin/', admin.site.urls),
     path('users/', include('users.urls')),
     path('accounts/', include('accounts.urls')),
     path('categories/', include('categories.urls')),
+    path('budgets/', include('budgets.urls')),
     path('transactions/', include('transactions.urls')),
+    path('reports/', include('reports.urls')),
+    path('api/v1/', include('api.urls')),
 ]
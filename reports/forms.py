@@ -0,0 +1,161 @@
+"""
+Report forms for the Finanpy project.
+
+Provides the ReportFilterForm with the date range and options shared by
+the reports and the TimeSeriesForm with the chart series parameters,
+styled with TailwindCSS classes matching the project's
+design system.
+"""
+import datetime
+
+from django import forms
+from django.utils import timezone
+
+from accounts.models import Account
+from categories.models import Category
+from reports.queries import MAX_REPORT_DAYS, MAX_WEEKLY_DAYS, PERIOD_MONTH, PERIOD_WEEK
+from transactions.snapshots import month_end
+
+# Shared Tailwind CSS classes for form widgets
+TAILWIND_INPUT_CLASSES = (
+    'w-full px-4 py-2.5 bg-gray-800 border border-gray-700 rounded-lg '
+    'text-gray-100 placeholder-gray-500 focus:outline-none focus:border-cyan-500 '
+    'focus:ring-1 focus:ring-cyan-500 transition-colors duration-200'
+)
+
+TAILWIND_SELECT_CLASSES = (
+    'w-full px-4 py-2.5 bg-gray-800 border border-gray-700 rounded-lg '
+    'text-gray-100 focus:outline-none focus:border-cyan-500 '
+    'focus:ring-1 focus:ring-cyan-500 transition-colors duration-200'
+)
+
+
+# Dates outside these years are rejected: they would only produce empty
+# reports, and the date arithmetic overflows near 1 and 9999.
+MIN_YEAR = 1900
+MAX_YEAR = 2100
+
+
+def clean_years(form, date_from, date_to):
+    """Add an error for each date outside MIN_YEAR..MAX_YEAR; return whether both are in."""
+    valid = True
+    for name, value in (('date_from', date_from), ('date_to', date_to)):
+        if not MIN_YEAR <= value.year <= MAX_YEAR:
+            form.add_error(name, f'Informe uma data entre {MIN_YEAR} e {MAX_YEAR}.')
+            valid = False
+    return valid
+
+
+def default_range(today=None):
+    """Return the last 12 months, current month included."""
+    today = today or timezone.localdate()
+    start = today.replace(day=1)
+    for _ in range(11):
+        start = (start - datetime.timedelta(days=1)).replace(day=1)
+    return start, month_end(today)
+
+
+class ReportFilterForm(forms.Form):
+    """
+    Date range and options of a report (all optional).
+
+    Submitted with GET. Missing dates default to the last 12 months;
+    ``options()`` returns the effective values.
+    """
+
+    date_from = forms.DateField(
+        label='De',
+        required=False,
+        widget=forms.DateInput(attrs={
+            'type': 'date',
+            'class': TAILWIND_INPUT_CLASSES,
+        }),
+    )
+    date_to = forms.DateField(
+        label='Até',
+        required=False,
+        widget=forms.DateInput(attrs={
+            'type': 'date',
+            'class': TAILWIND_INPUT_CLASSES,
+        }),
+    )
+    transaction_type = forms.ChoiceField(
+        label='Tipo',
+        choices=[('expense', 'Despesas'), ('income', 'Receitas')],
+        required=False,
+        widget=forms.Select(attrs={
+            'class': TAILWIND_SELECT_CLASSES,
+        }),
+    )
+    period = forms.ChoiceField(
+        label='Agrupar por',
+        choices=[(PERIOD_MONTH, 'Mês'), (PERIOD_WEEK, 'Semana')],
+        required=False,
+        widget=forms.Select(attrs={
+            'class': TAILWIND_SELECT_CLASSES,
+        }),
+    )
+
+    def clean(self):
+        cleaned_data = super().clean()
+        default_from, default_to = default_range()
+        date_from = cleaned_data.get('date_from') or default_from
+        date_to = cleaned_data.get('date_to') or default_to
+        if clean_years(self, date_from, date_to):
+            if date_from > date_to:
+                self.add_error('date_to', 'A data final deve ser posterior à inicial.')
+            elif (date_to - date_from).days >= MAX_REPORT_DAYS:
+                self.add_error('date_to', 'Escolha um intervalo de até 10 anos.')
+        cleaned_data['date_from'] = date_from
+        cleaned_data['date_to'] = date_to
+        cleaned_data['transaction_type'] = cleaned_data.get('transaction_type') or 'expense'
+        cleaned_data['period'] = cleaned_data.get('period') or PERIOD_MONTH
+        if cleaned_data['period'] == PERIOD_WEEK and (date_to - date_from).days >= MAX_WEEKLY_DAYS:
+            self.add_error(
+                'period',
+                f'Agrupe por semana intervalos de até {MAX_WEEKLY_DAYS} dias.',
+            )
+        return cleaned_data
+
+    def options(self):
+        """Return the cleaned options, or the defaults when invalid."""
+        if self.is_valid():
+            return self.cleaned_data
+        date_from, date_to = default_range()
+        return {
+            'date_from': date_from,
+            'date_to': date_to,
+            'transaction_type': 'expense',
+            'period': PERIOD_MONTH,
+        }
+
+
+class TimeSeriesForm(forms.Form):
+    """
+    Parameters of the chart time series endpoint (all optional).
+
+    Missing dates default to the last 12 months. Account and category
+    querysets are filtered by user in __init__.
+    """
+
+    date_from = forms.DateField(required=False)
+    date_to = forms.DateField(required=False)
+    account = forms.ModelChoiceField(queryset=Account.objects.none(), required=False)
+    category = forms.ModelChoiceField(queryset=Category.objects.none(), required=False)
+
+    def __init__(self, *args, user=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if user is not None:
+            self.fields['account'].queryset = Account.objects.filter(user=user)
+            self.fields['category'].queryset = Category.objects.filter(user=user)
+
+    def clean(self):
+        cleaned_data = super().clean()
+        default_from, default_to = default_range()
+        date_from = cleaned_data.get('date_from') or default_from
+        date_to = cleaned_data.get('date_to') or default_to
+        cleaned_data['date_from'] = date_from
+        cleaned_data['date_to'] = date_to
+        if clean_years(self, date_from, date_to) and date_from > date_to:
+            self.add_error('date_to', 'A data final deve ser posterior à inicial.')
+        return cleaned_data
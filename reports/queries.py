@@ -0,0 +1,252 @@
+"""
+Report queries for the Finanpy project.
+
+Every report is a single grouped query. The whole months of the range
+are read from the MonthlySummary rollup (a few rows per month) and only
+the days of the partial months at its edges from the transactions; the
+two grouped parts are combined with UNION ALL and grouped again in the
+same statement. A 5-year report therefore reads a few hundred rollup
+rows plus at most two months of transactions, whatever the number of
+transactions in between. Shares of the total are computed in SQL with
+a window over the grouped sums.
+
+Weekly figures cannot come from a monthly rollup, so weekly reports
+read the transactions and are limited to MAX_WEEKLY_DAYS.
+
+Transfers between accounts are neither income nor expenses: their legs
+are left out of every report, as they are out of the rollup.
+"""
+import datetime
+from collections import namedtuple
+from decimal import Decimal
+
+from django.db import connections
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import TruncMonth, TruncWeek
+
+from transactions.models import MonthlySummary, Transaction
+from transactions.snapshots import month_end
+
+CENT = Decimal('0.01')
+
+PERIOD_MONTH = 'month'
+PERIOD_WEEK = 'week'
+
+MAX_WEEKLY_DAYS = 92
+
+# Longest range of a report (about ten years), so a page has at most
+# ~120 monthly rows.
+MAX_REPORT_DAYS = 10 * 366
+
+TOP_CATEGORIES = 10
+
+# A table a report reads from: the rows, the name of the amount
+# column, the expression counting transactions and the expression
+# giving the period (month or week) of a row.
+Source = namedtuple('Source', ['queryset', 'amount', 'count', 'period'])
+
+
+def split_range(date_from, date_to):
+    """
+    Split a date range into whole months and partial-month edges.
+
+    Returns ``(months, edges)``: the (first, last) month starts fully
+    inside the range, or None, and a list of (start, end) date ranges
+    covering the remaining days.
+    """
+    first = date_from if date_from.day == 1 else month_end(date_from) + datetime.timedelta(days=1)
+    last_end = date_to if date_to == month_end(date_to) else date_to.replace(day=1) - datetime.timedelta(days=1)
+    if first > last_end:
+        return None, [(date_from, date_to)]
+    edges = []
+    if date_from < first:
+        edges.append((date_from, first - datetime.timedelta(days=1)))
+    if last_end < date_to:
+        edges.append((last_end + datetime.timedelta(days=1), date_to))
+    return (first, last_end.replace(day=1)), edges
+
+
+def report_sources(user, date_from, date_to, **filters):
+    """Return the Sources that together cover the range exactly once."""
+    months, edges = split_range(date_from, date_to)
+    sources = []
+    if months:
+        sources.append(Source(
+            MonthlySummary.objects.filter(user=user, year_month__range=months, **filters),
+            'total',
+            Sum('count'),
+            F('year_month'),
+        ))
+    if edges:
+        days = Q()
+        for start, end in edges:
+            days |= Q(date__range=(start, end))
+        sources.append(Source(
+            Transaction.objects.filter(days, user=user, transfer__isnull=True, **filters),
+            'amount',
+            Count('pk'),
+            TruncMonth('date'),
+        ))
+    return sources
+
+
+def fetch_grouped(parts, select, group_by, order_by, limit=None):
+    """
+    Run ``SELECT <select> FROM (<parts> UNION ALL ...) GROUP BY ...``.
+
+    ``parts`` are grouped ``values()`` querysets with the same columns.
+    Returns the rows as dicts.
+    """
+    union = parts[0].union(*parts[1:], all=True) if len(parts) > 1 else parts[0]
+    sql, params = union.query.sql_with_params()
+    connection = connections[union.db]
+    query = f'SELECT {select} FROM ({sql}) parts GROUP BY {group_by} ORDER BY {order_by}'
+    if limit is not None:
+        query += f' LIMIT {int(limit)}'
+    with connection.cursor() as cursor:
+        cursor.execute(query, params)
+        columns = [column[0] for column in cursor.description]
+        return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+
+def to_cents(value):
+    """Convert a sum read with a raw cursor to a Decimal in cents."""
+    # SQLite sums decimals as floats; round back to cents.
+    return Decimal(str(value or 0)).quantize(CENT)
+
+
+def to_date(value):
+    """Convert a date read with a raw cursor (a string on SQLite) to a date."""
+    if isinstance(value, datetime.datetime):
+        return value.date()
+    if isinstance(value, str):
+        return datetime.date.fromisoformat(value[:10])
+    return value
+
+
+def category_breakdown(user, date_from, date_to, transaction_type='expense', limit=None):
+    """
+    Return the total of each category in the range, largest first.
+
+    Rows have category_id, name, color, total, count, average and share
+    (percentage of the total of all categories, even with ``limit``).
+    Uncategorized transactions have a None category.
+    """
+    parts = [
+        source.queryset
+        .values(key=F('category_id'), name=F('category__name'), color=F('category__color'))
+        .annotate(total=Sum(source.amount), n=source.count)
+        .order_by()
+        for source in report_sources(user, date_from, date_to, transaction_type=transaction_type)
+    ]
+    if not parts:
+        return []
+    rows = fetch_grouped(
+        parts,
+        select=(
+            'key, name, color, SUM(total) AS total, SUM(n) AS n, '
+            'SUM(total) * 1.0 / SUM(n) AS average, '
+            'ROUND(SUM(total) * 100.0 / NULLIF(SUM(SUM(total)) OVER (), 0), 1) AS share'
+        ),
+        group_by='key, name, color',
+        order_by='total DESC, name',
+        limit=limit,
+    )
+    return [
+        {
+            'category_id': row['key'],
+            'name': row['name'],
+            'color': row['color'],
+            'total': to_cents(row['total']),
+            'count': row['n'],
+            'average': to_cents(row['average']),
+            'share': Decimal(str(row['share'] or 0)),
+        }
+        for row in rows
+    ]
+
+
+def top_categories(user, date_from, date_to, transaction_type='expense', limit=TOP_CATEGORIES):
+    """Return the ``limit`` categories with the largest totals in the range."""
+    return category_breakdown(user, date_from, date_to, transaction_type, limit=limit)
+
+
+def period_starts(date_from, date_to, period=PERIOD_MONTH):
+    """Return the first day of every month (or week) touching the range."""
+    if period == PERIOD_WEEK:
+        current = date_from - datetime.timedelta(days=date_from.weekday())
+    else:
+        current = date_from.replace(day=1)
+    starts = []
+    while current <= date_to:
+        starts.append(current)
+        if period == PERIOD_WEEK:
+            current += datetime.timedelta(days=7)
+        else:
+            current = month_end(current) + datetime.timedelta(days=1)
+    return starts
+
+
+def period_totals(user, date_from, date_to, period=PERIOD_MONTH, **filters):
+    """
+    Return {period start: row} with the income, expenses and net of each
+    month (or week) of the range that has transactions.
+
+    ``filters`` narrow the transactions (e.g. ``account=``,
+    ``category=``). Weekly ranges must not exceed MAX_WEEKLY_DAYS.
+    """
+    if period == PERIOD_WEEK:
+        if (date_to - date_from).days >= MAX_WEEKLY_DAYS:
+            raise ValueError('Weekly reports are limited to MAX_WEEKLY_DAYS.')
+        sources = [Source(
+            Transaction.objects.filter(
+                user=user, date__range=(date_from, date_to), transfer__isnull=True, **filters,
+            ),
+            'amount',
+            Count('pk'),
+            TruncWeek('date'),
+        )]
+    else:
+        sources = report_sources(user, date_from, date_to, **filters)
+    parts = [
+        source.queryset
+        .values(period=source.period)
+        .annotate(
+            income=Sum(source.amount, filter=Q(transaction_type='income')),
+            expenses=Sum(source.amount, filter=Q(transaction_type='expense')),
+        )
+        .order_by()
+        for source in sources
+    ]
+    rows = fetch_grouped(
+        parts,
+        select=(
+            'period, SUM(income) AS income, SUM(expenses) AS expenses, '
+            'COALESCE(SUM(income), 0) - COALESCE(SUM(expenses), 0) AS net'
+        ),
+        group_by='period',
+        order_by='period',
+    )
+    return {
+        to_date(row['period']): {
+            'income': to_cents(row['income']),
+            'expenses': to_cents(row['expenses']),
+            'net': to_cents(row['net']),
+        }
+        for row in rows
+    }
+
+
+def cash_flow(user, date_from, date_to, period=PERIOD_MONTH):
+    """
+    Return income, expenses and net per month (or week) of the range.
+
+    Every period of the range has a row, in date order, so the result
+    can be charted as is.
+    """
+    totals = period_totals(user, date_from, date_to, period)
+    empty = {'income': Decimal('0.00'), 'expenses': Decimal('0.00'), 'net': Decimal('0.00')}
+    return [
+        {'period': start, **totals.get(start, empty)}
+        for start in period_starts(date_from, date_to, period)
+    ]
@@ -0,0 +1,186 @@
+"""
+Time series for the Finanpy charts.
+
+Income, expenses, net and balance per bucket of a date range, for all of
+a user's accounts or one account/category. The bucket grows with the
+range (day, week, month, year) so a series never has more than
+MAX_POINTS points and the payload stays a few KB whatever the range
+(the number of points is computed, not counted bucket by bucket, and
+ranges longer than MAX_POINTS years keep their latest years):
+
+- days and weeks come from one query grouping the transactions by date
+  (served by the (user, date) / (account, date) / (category, date)
+  indexes, no per-row date function), weeks folded from the daily rows;
+- months and years come from one query on the MonthlySummary rollup
+  (plus the edge days, see reports.queries), years folded from months.
+
+Missing buckets are filled with zeros and the balance is the opening
+balance plus the running sum of the nets and of the money transferred
+in and out (transfers are not income or expenses, see reports.queries).
+"""
+import datetime
+from decimal import Decimal
+from itertools import accumulate
+
+from django.db.models import Case, F, Q, Sum, When
+
+from accounts.models import Account
+from reports.queries import PERIOD_MONTH, period_totals, to_cents
+from transactions.models import Transaction
+from transactions.snapshots import balances_as_of, month_end
+
+MAX_POINTS = 60
+
+BUCKET_DAY = 'day'
+BUCKET_WEEK = 'week'
+BUCKET_MONTH = 'month'
+BUCKET_YEAR = 'year'
+
+
+def bucket_start(day, bucket):
+    """Return the first day of the bucket holding ``day``."""
+    if bucket == BUCKET_WEEK:
+        return day - datetime.timedelta(days=day.weekday())
+    if bucket == BUCKET_MONTH:
+        return day.replace(day=1)
+    if bucket == BUCKET_YEAR:
+        return day.replace(month=1, day=1)
+    return day
+
+
+def next_bucket(start, bucket):
+    """Return the first day of the bucket after the one starting at ``start``."""
+    if bucket == BUCKET_DAY:
+        return start + datetime.timedelta(days=1)
+    if bucket == BUCKET_WEEK:
+        return start + datetime.timedelta(days=7)
+    if bucket == BUCKET_MONTH:
+        return month_end(start) + datetime.timedelta(days=1)
+    return start.replace(year=start.year + 1)
+
+
+def bucket_starts(date_from, date_to, bucket):
+    """Return the first day of every bucket touching the range."""
+    starts = []
+    current = bucket_start(date_from, bucket)
+    while current <= date_to:
+        starts.append(current)
+        current = next_bucket(current, bucket)
+    return starts
+
+
+def bucket_count(date_from, date_to, bucket):
+    """Return how many buckets touch the range, without listing them."""
+    if bucket == BUCKET_DAY:
+        return (date_to - date_from).days + 1
+    if bucket == BUCKET_WEEK:
+        return (bucket_start(date_to, bucket) - bucket_start(date_from, bucket)).days // 7 + 1
+    if bucket == BUCKET_MONTH:
+        return (date_to.year - date_from.year) * 12 + date_to.month - date_from.month + 1
+    return date_to.year - date_from.year + 1
+
+
+def choose_bucket(date_from, date_to, max_points=MAX_POINTS):
+    """Return the smallest bucket giving at most ``max_points`` points."""
+    for bucket in (BUCKET_DAY, BUCKET_WEEK, BUCKET_MONTH):
+        if bucket_count(date_from, date_to, bucket) <= max_points:
+            return bucket
+    return BUCKET_YEAR
+
+
+def _daily_rows(user, date_from, date_to, filters):
+    """Return (date, income, expenses) rows grouped by transaction date."""
+    return (
+        Transaction.objects.filter(
+            user=user, date__range=(date_from, date_to), transfer__isnull=True, **filters,
+        )
+        .values('date')
+        .annotate(
+            income=Sum('amount', filter=Q(transaction_type='income')),
+            expenses=Sum('amount', filter=Q(transaction_type='expense')),
+        )
+        .order_by()
+        .values_list('date', 'income', 'expenses')
+    )
+
+
+def _transfer_rows(user, date_from, date_to, filters):
+    """Return (date, net) rows of the transfer legs grouped by date."""
+    return (
+        Transaction.objects.filter(
+            user=user, date__range=(date_from, date_to), transfer__isnull=False, **filters,
+        )
+        .values('date')
+        .annotate(net=Sum(Case(
+            When(transaction_type='income', then=F('amount')),
+            default=-F('amount'),
+        )))
+        .order_by()
+        .values_list('date', 'net')
+    )
+
+
+def _monthly_rows(user, date_from, date_to, filters):
+    """Return (month, income, expenses) rows from the rollup and edge days."""
+    totals = period_totals(user, date_from, date_to, PERIOD_MONTH, **filters)
+    return [(month, row['income'], row['expenses']) for month, row in totals.items()]
+
+
+def time_series(user, date_from, date_to, account=None, category=None, max_points=MAX_POINTS):
+    """
+    Return the chart series of a user (or account/category) over a range.
+
+    The result is a dict of parallel lists (``labels``, ``income``,
+    ``expenses``, ``net``, ``balance``) plus the ``bucket`` used.
+    ``balance`` is None when filtering by category, which has none.
+    A range of more than ``max_points`` years keeps only the latest ones.
+    """
+    filters = {}
+    if account is not None:
+        filters['account'] = account
+    if category is not None:
+        filters['category'] = category
+    bucket = choose_bucket(date_from, date_to, max_points)
+    if bucket == BUCKET_YEAR and bucket_count(date_from, date_to, bucket) > max_points:
+        # Even yearly points would be too many: keep the latest years.
+        date_from = datetime.date(date_to.year - max_points + 1, 1, 1)
+    if bucket in (BUCKET_DAY, BUCKET_WEEK):
+        rows = _daily_rows(user, date_from, date_to, filters)
+    else:
+        rows = _monthly_rows(user, date_from, date_to, filters)
+
+    starts = bucket_starts(date_from, date_to, bucket)
+    income = dict.fromkeys(starts, Decimal('0'))
+    expenses = dict.fromkeys(starts, Decimal('0'))
+    for day, day_income, day_expenses in rows:
+        start = bucket_start(day, bucket)
+        income[start] += to_cents(day_income)
+        expenses[start] += to_cents(day_expenses)
+    income = list(income.values())
+    expenses = list(expenses.values())
+    net = [i - e for i, e in zip(income, expenses)]
+
+    balance = None
+    if category is None:
+        accounts = Account.objects.filter(user=user)
+        if account is not None:
+            accounts = accounts.filter(pk=account.pk)
+        opening = sum(
+            balances_as_of(accounts, date_from - datetime.timedelta(days=1)).values(),
+            Decimal('0'),
+        )
+        transferred = dict.fromkeys(starts, Decimal('0'))
+        for day, day_net in _transfer_rows(user, date_from, date_to, filters):
+            transferred[bucket_start(day, bucket)] += to_cents(day_net)
+        balance = list(accumulate(
+            (n + t for n, t in zip(net, transferred.values())),
+            initial=opening,
+        ))[1:]
+    return {
+        'bucket': bucket,
+        'labels': starts,
+        'income': income,
+        'expenses': expenses,
+        'net': net,
+        'balance': balance,
+    }
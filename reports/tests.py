@@ -0,0 +1,531 @@
+"""
+Unit tests for the reports app.
+
+Tests the report queries and time series (against sums computed
+directly from the transactions), ReportFilterForm, the report views and
+that transfers stay out of the income and expense figures.
+"""
+import json
+from datetime import date
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db.models import Sum
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from accounts.models import Account
+from categories.models import Category
+from reports.forms import ReportFilterForm, default_range
+from reports.queries import (
+    PERIOD_WEEK,
+    cash_flow,
+    category_breakdown,
+    period_starts,
+    period_totals,
+    split_range,
+    top_categories,
+)
+from reports.series import MAX_POINTS, bucket_count, bucket_starts, choose_bucket, time_series
+from transactions.models import Transaction, Transfer
+from transactions.rollups import rebuild_monthly_summaries
+from transactions.transfers import create_transfers
+
+User = get_user_model()
+
+
+class ReportDataMixin:
+    """Creates a user with a year of transactions and builds the rollup."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email='reports@example.com',
+            password='testpass123',
+        )
+        self.account = Account.objects.create(
+            user=self.user, name='Conta', account_type='checking',
+        )
+        self.food = Category.objects.create(
+            user=self.user, name='Mercado', category_type='expense', color='#ff0000',
+        )
+        self.rent = Category.objects.create(
+            user=self.user, name='Aluguel', category_type='expense',
+        )
+        self.salary = Category.objects.create(
+            user=self.user, name='Salário', category_type='income',
+        )
+        transactions = []
+        for month in range(1, 13):
+            for day in (1, 10, 20, 28):
+                transactions.append(Transaction(
+                    user=self.user, account=self.account, category=self.food,
+                    transaction_type='expense', amount=Decimal('12.34') * day,
+                    date=date(2025, month, day),
+                ))
+            transactions.append(Transaction(
+                user=self.user, account=self.account, category=self.rent,
+                transaction_type='expense', amount=Decimal('1500.00'),
+                date=date(2025, month, 5),
+            ))
+            transactions.append(Transaction(
+                user=self.user, account=self.account, category=None,
+                transaction_type='expense', amount=Decimal('7.77'),
+                date=date(2025, month, 15),
+            ))
+            transactions.append(Transaction(
+                user=self.user, account=self.account, category=self.salary,
+                transaction_type='income', amount=Decimal('5000.00'),
+                date=date(2025, month, 25),
+            ))
+        Transaction.objects.bulk_create(transactions)
+
+        # Another user's data must never show up.
+        other = User.objects.create_user(email='other@example.com', password='testpass123')
+        other_account = Account.objects.create(user=other, name='X', account_type='checking')
+        Transaction.objects.create(
+            user=other, account=other_account, transaction_type='expense',
+            amount=Decimal('999.00'), date=date(2025, 6, 10),
+        )
+        rebuild_monthly_summaries()
+
+    def expected_by_category(self, date_from, date_to, transaction_type='expense'):
+        rows = (
+            Transaction.objects.filter(
+                user=self.user,
+                transaction_type=transaction_type,
+                date__range=(date_from, date_to),
+            )
+            .values('category_id')
+            .annotate(total=Sum('amount'))
+        )
+        return {row['category_id']: Decimal(row['total']).quantize(Decimal('0.01')) for row in rows}
+
+
+class SplitRangeTests(TestCase):
+    """Tests for splitting a range into rollup months and edge days."""
+
+    def test_whole_months(self):
+        """A month-aligned range has no edges."""
+        self.assertEqual(
+            split_range(date(2025, 1, 1), date(2025, 3, 31)),
+            ((date(2025, 1, 1), date(2025, 3, 1)), []),
+        )
+
+    def test_partial_edges(self):
+        """Partial first and last months become day ranges."""
+        self.assertEqual(
+            split_range(date(2025, 1, 10), date(2025, 4, 15)),
+            (
+                (date(2025, 2, 1), date(2025, 3, 1)),
+                [(date(2025, 1, 10), date(2025, 1, 31)), (date(2025, 4, 1), date(2025, 4, 15))],
+            ),
+        )
+
+    def test_inside_one_month(self):
+        """A range without a whole month is read from transactions only."""
+        self.assertEqual(
+            split_range(date(2025, 1, 10), date(2025, 2, 15)),
+            (None, [(date(2025, 1, 10), date(2025, 2, 15))]),
+        )
+
+    def test_period_starts(self):
+        """Months and weeks (starting on Monday) touching the range."""
+        self.assertEqual(
+            period_starts(date(2025, 1, 15), date(2025, 3, 1)),
+            [date(2025, 1, 1), date(2025, 2, 1), date(2025, 3, 1)],
+        )
+        self.assertEqual(
+            period_starts(date(2025, 1, 1), date(2025, 1, 14), 'week'),
+            [date(2024, 12, 30), date(2025, 1, 6), date(2025, 1, 13)],
+        )
+
+
+class ReportQueryTests(ReportDataMixin, TestCase):
+    """The reports match sums computed directly from the transactions."""
+
+    def test_category_breakdown_matches_transactions(self):
+        """Rollup months plus edge days add up to the transaction sums."""
+        for date_from, date_to in [
+            (date(2025, 1, 1), date(2025, 12, 31)),
+            (date(2025, 2, 7), date(2025, 11, 12)),
+            (date(2025, 3, 3), date(2025, 3, 18)),
+        ]:
+            with self.subTest(date_from=date_from, date_to=date_to):
+                rows = category_breakdown(self.user, date_from, date_to)
+                self.assertEqual(
+                    {row['category_id']: row['total'] for row in rows},
+                    self.expected_by_category(date_from, date_to),
+                )
+
+    def test_category_breakdown_shape(self):
+        """Rows are sorted by total and carry names, counts and shares."""
+        rows = category_breakdown(self.user, date(2025, 1, 1), date(2025, 12, 31))
+        self.assertEqual([row['name'] for row in rows], ['Aluguel', 'Mercado', None])
+        self.assertEqual(rows[0]['count'], 12)
+        self.assertEqual(rows[0]['average'], Decimal('1500.00'))
+        self.assertEqual(rows[1]['color'], '#ff0000')
+        self.assertAlmostEqual(sum(row['share'] for row in rows), Decimal('100'), delta=Decimal('0.2'))
+        total = sum(row['total'] for row in rows)
+        self.assertAlmostEqual(
+            rows[0]['share'],
+            (rows[0]['total'] * 100 / total).quantize(Decimal('0.1')),
+            delta=Decimal('0.1'),
+        )
+
+    def test_income_breakdown(self):
+        """The transaction type selects income categories."""
+        rows = category_breakdown(self.user, date(2025, 1, 1), date(2025, 6, 30), 'income')
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]['total'], Decimal('30000.00'))
+        self.assertEqual(rows[0]['share'], Decimal('100.0'))
+
+    def test_top_categories_share_of_all(self):
+        """Limited results keep their share of the full total."""
+        full = category_breakdown(self.user, date(2025, 1, 10), date(2025, 12, 20))
+        top = top_categories(self.user, date(2025, 1, 10), date(2025, 12, 20), limit=1)
+        self.assertEqual(top, full[:1])
+        self.assertLess(top[0]['share'], 100)
+
+    def test_cash_flow_by_month(self):
+        """Each month has income, expenses and net, gaps included."""
+        rows = cash_flow(self.user, date(2024, 11, 15), date(2025, 2, 10))
+        self.assertEqual(
+            [row['period'] for row in rows],
+            [date(2024, 11, 1), date(2024, 12, 1), date(2025, 1, 1), date(2025, 2, 1)],
+        )
+        self.assertEqual(rows[0]['income'], Decimal('0.00'))
+        january = rows[2]
+        self.assertEqual(january['income'], Decimal('5000.00'))
+        self.assertEqual(
+            january['expenses'],
+            sum(self.expected_by_category(date(2025, 1, 1), date(2025, 1, 31)).values()),
+        )
+        self.assertEqual(january['net'], january['income'] - january['expenses'])
+        february = rows[3]
+        self.assertEqual(
+            february['expenses'],
+            sum(self.expected_by_category(date(2025, 2, 1), date(2025, 2, 10)).values()),
+        )
+
+    def test_cash_flow_by_week(self):
+        """Weekly rows start on Monday."""
+        rows = cash_flow(self.user, date(2025, 3, 1), date(2025, 3, 31), 'week')
+        self.assertEqual(rows[0]['period'], date(2025, 2, 24))
+        self.assertEqual(sum(row['income'] for row in rows), Decimal('5000.00'))
+        self.assertEqual(
+            sum(row['expenses'] for row in rows),
+            sum(self.expected_by_category(date(2025, 3, 1), date(2025, 3, 31)).values()),
+        )
+
+    def test_one_query_per_report(self):
+        """Rollup and edge days are combined in a single statement."""
+        with self.assertNumQueries(1):
+            category_breakdown(self.user, date(2025, 1, 10), date(2025, 12, 20))
+        with self.assertNumQueries(1):
+            cash_flow(self.user, date(2025, 1, 10), date(2025, 12, 20))
+
+
+class ReportFilterFormTests(TestCase):
+    """Tests for ReportFilterForm."""
+
+    def test_defaults_to_last_twelve_months(self):
+        """Missing fields fall back to the defaults."""
+        options = ReportFilterForm({}).options()
+        self.assertEqual(options['date_from'].day, 1)
+        self.assertLess((options['date_to'] - options['date_from']).days, 366)
+        self.assertEqual(options['transaction_type'], 'expense')
+        self.assertEqual(options['period'], 'month')
+
+    def test_long_weekly_range_is_rejected(self):
+        """Weekly grouping is limited to short ranges."""
+        form = ReportFilterForm({
+            'date_from': '2025-01-01', 'date_to': '2025-12-31', 'period': 'week',
+        })
+        self.assertFalse(form.is_valid())
+        self.assertIn('period', form.errors)
+        self.assertEqual(form.options()['period'], 'month')
+
+    def test_inverted_range_is_rejected(self):
+        """The end date must not precede the start date."""
+        form = ReportFilterForm({'date_from': '2025-05-01', 'date_to': '2025-04-01'})
+        self.assertFalse(form.is_valid())
+        self.assertIn('date_to', form.errors)
+
+
+    def test_out_of_bounds_years_are_rejected(self):
+        """Dates outside 1900..2100 are a form error, not an overflow."""
+        for data in (
+            {'date_from': '2024-01-01', 'date_to': '9999-12-31'},
+            {'date_from': '0001-01-01', 'date_to': '2025-12-31'},
+        ):
+            with self.subTest(data=data):
+                form = ReportFilterForm(data)
+                self.assertFalse(form.is_valid())
+                self.assertEqual(form.options()['date_from'], default_range()[0])
+
+    def test_long_range_is_rejected(self):
+        """A report covers at most about ten years."""
+        form = ReportFilterForm({'date_from': '2000-01-01', 'date_to': '2025-12-31'})
+        self.assertFalse(form.is_valid())
+        self.assertIn('date_to', form.errors)
+        self.assertTrue(ReportFilterForm({'date_from': '2016-01-01', 'date_to': '2025-12-31'}).is_valid())
+
+
+class ReportViewTests(ReportDataMixin, TestCase):
+    """Tests for the report views."""
+
+    def setUp(self):
+        super().setUp()
+        self.client = Client()
+        self.client.force_login(self.user)
+        self.params = {'date_from': '2025-01-10', 'date_to': '2025-12-20'}
+
+    def test_login_required(self):
+        """Anonymous users are redirected to the login page."""
+        self.client.logout()
+        for name in ('categories', 'cash_flow', 'top_categories'):
+            response = self.client.get(reverse(f'reports:{name}'))
+            self.assertEqual(response.status_code, 302)
+
+    def test_category_report(self):
+        """Shows the categories and embeds the chart data."""
+        response = self.client.get(reverse('reports:categories'), self.params)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Aluguel')
+        self.assertContains(response, 'Sem categoria')
+        self.assertContains(response, 'id="report-chart"')
+        self.assertEqual(response.context['chart']['labels'][0], 'Aluguel')
+
+    def test_cash_flow_report(self):
+        """Lists every month of the range."""
+        response = self.client.get(reverse('reports:cash_flow'), self.params)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['rows']), 12)
+        self.assertEqual(response.context['income'], Decimal('55000.00'))
+
+    def test_cash_flow_out_of_bounds_shows_the_error(self):
+        """An absurd range renders the form error over the default range."""
+        response = self.client.get(
+            reverse('reports:cash_flow'), {'date_from': '2024-01-01', 'date_to': '9999-12-31'},
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Informe uma data entre 1900 e 2100.')
+        self.assertEqual(len(response.context['rows']), 12)
+
+    def test_top_categories_report(self):
+        """Ranks the income categories when asked."""
+        response = self.client.get(
+            reverse('reports:top_categories'),
+            {**self.params, 'transaction_type': 'income'},
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([row['name'] for row in response.context['rows']], ['Salário'])
+
+    def test_single_report_query(self):
+        """A warm report page costs one query (session and user are cached)."""
+        self.client.get(reverse('reports:categories'), self.params)
+        with self.assertNumQueries(1):
+            self.client.get(reverse('reports:categories'), self.params)
+
+    def test_empty_state(self):
+        """A range without transactions shows the empty state."""
+        response = self.client.get(
+            reverse('reports:categories'),
+            {'date_from': '2020-01-01', 'date_to': '2020-12-31'},
+        )
+        self.assertContains(response, 'Nenhuma transação no período')
+
+
+class TimeSeriesTests(ReportDataMixin, TestCase):
+    """Tests for the chart time series and its JSON endpoint."""
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.user)
+        self.url = reverse('reports:series')
+
+    def test_bucket_grows_with_the_range(self):
+        """Days, then weeks, months and years keep within the budget."""
+        self.assertEqual(choose_bucket(date(2025, 1, 1), date(2025, 2, 1)), 'day')
+        self.assertEqual(choose_bucket(date(2025, 1, 1), date(2025, 12, 31)), 'week')
+        self.assertEqual(choose_bucket(date(2021, 1, 1), date(2025, 12, 31)), 'month')
+        self.assertEqual(choose_bucket(date(1990, 1, 1), date(2025, 12, 31)), 'year')
+
+    def test_bucket_count_is_computed(self):
+        """The count matches the listed buckets without walking the range."""
+        for date_from, date_to in [
+            (date(2025, 1, 1), date(2025, 2, 1)),
+            (date(2024, 12, 30), date(2025, 12, 31)),
+            (date(1900, 1, 1), date(2100, 12, 31)),
+        ]:
+            for bucket in ('day', 'week', 'month', 'year'):
+                with self.subTest(date_from=date_from, date_to=date_to, bucket=bucket):
+                    self.assertEqual(
+                        bucket_count(date_from, date_to, bucket),
+                        len(bucket_starts(date_from, date_to, bucket)),
+                    )
+
+    def test_yearly_points_are_capped(self):
+        """A range of more than MAX_POINTS years keeps the latest ones."""
+        series = time_series(self.user, date(1900, 1, 1), date(2100, 12, 31))
+        self.assertEqual(series['bucket'], 'year')
+        self.assertEqual(len(series['labels']), MAX_POINTS)
+        self.assertEqual(series['labels'][-1], date(2100, 1, 1))
+
+    def test_endpoint_rejects_dates_out_of_bounds(self):
+        """Years outside 1900..2100 are a 400, not an overflow."""
+        for params in (
+            {'date_from': '2024-01-01', 'date_to': '9999-12-31'},
+            {'date_from': '0001-01-01', 'date_to': '2025-12-31'},
+        ):
+            with self.subTest(params=params):
+                response = self.client.get(self.url, params)
+                self.assertEqual(response.status_code, 400)
+        response = self.client.get(self.url, {'date_from': '1900-01-01', 'date_to': '2100-12-31'})
+        self.assertEqual(response.status_code, 200)
+        self.assertLess(len(response.content), 4096)
+
+    def test_daily_series_fills_gaps(self):
+        """Every day of the range has a point, zero when empty."""
+        series = time_series(self.user, date(2025, 3, 1), date(2025, 3, 31))
+        self.assertEqual(series['bucket'], 'day')
+        self.assertEqual(len(series['labels']), 31)
+        self.assertEqual(series['income'][24], Decimal('5000.00'))
+        self.assertEqual(series['expenses'][1], Decimal('0'))
+
+    def test_buckets_add_up_to_the_transactions(self):
+        """Whatever the bucket, the totals match the transactions."""
+        for date_from, date_to in [
+            (date(2025, 2, 3), date(2025, 3, 9)),
+            (date(2025, 1, 15), date(2025, 12, 10)),
+            (date(2019, 6, 1), date(2025, 12, 31)),
+        ]:
+            with self.subTest(date_from=date_from, date_to=date_to):
+                series = time_series(self.user, date_from, date_to)
+                self.assertLessEqual(len(series['labels']), MAX_POINTS)
+                self.assertEqual(
+                    sum(series['expenses']),
+                    sum(self.expected_by_category(date_from, date_to).values()),
+                )
+                self.assertEqual(
+                    sum(series['income']),
+                    sum(self.expected_by_category(date_from, date_to, 'income').values()),
+                )
+
+    def test_balance_is_cumulative(self):
+        """The balance ends at the net of all the transactions."""
+        series = time_series(self.user, date(2025, 1, 1), date(2025, 12, 31))
+        income = sum(self.expected_by_category(date(2025, 1, 1), date(2025, 12, 31), 'income').values())
+        expenses = sum(self.expected_by_category(date(2025, 1, 1), date(2025, 12, 31)).values())
+        self.assertEqual(series['balance'][-1], income - expenses)
+        self.assertEqual(
+            series['balance'][1] - series['balance'][0],
+            series['net'][1],
+        )
+
+    def test_category_series_has_no_balance(self):
+        """A category has flows but no balance."""
+        series = time_series(
+            self.user, date(2025, 1, 1), date(2025, 12, 31), category=self.rent,
+        )
+        self.assertIsNone(series['balance'])
+        self.assertEqual(sum(series['expenses']), Decimal('18000.00'))
+
+    def test_endpoint_is_compact_json(self):
+        """The endpoint returns small, numeric series."""
+        response = self.client.get(self.url, {'date_from': '2021-01-01', 'date_to': '2025-12-31'})
+        self.assertEqual(response.status_code, 200)
+        self.assertLess(len(response.content), 4096)
+        data = json.loads(response.content)
+        self.assertEqual(data['bucket'], 'month')
+        self.assertEqual(len(data['labels']), 60)
+        self.assertIsInstance(data['income'][-1], float)
+
+    def test_endpoint_revalidates_with_etag(self):
+        """An unchanged series is a 304; a write changes the ETag."""
+        params = {'date_from': '2025-01-01', 'date_to': '2025-12-31'}
+        response = self.client.get(self.url, params)
+        etag = response['ETag']
+        self.assertIn('private', response['Cache-Control'])
+        response = self.client.get(self.url, params, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('transactions:create'), {
+                'transaction_type': 'income',
+                'account': self.account.pk,
+                'amount': '10.00',
+                'date': '2025-06-01',
+            })
+        response = self.client.get(self.url, params, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_warm_endpoint_skips_the_series_queries(self):
+        """A cached series costs no query (session and user are cached too)."""
+        params = {'date_from': '2025-01-01', 'date_to': '2025-12-31'}
+        self.client.get(self.url, params)
+        with self.assertNumQueries(0):
+            self.client.get(self.url, params)
+
+    def test_other_users_account_is_rejected(self):
+        """Filtering by someone else's account is a 400."""
+        other = Account.objects.exclude(user=self.user).get()
+        response = self.client.get(self.url, {'account': other.pk})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('account', json.loads(response.content)['errors'])
+
+
+class TransferReportTests(ReportDataMixin, TestCase):
+    """Transfers are neither income nor expenses in any report."""
+
+    def setUp(self):
+        super().setUp()
+        self.savings = Account.objects.create(
+            user=self.user, name='Poupança', account_type='savings',
+        )
+
+    def add_transfers(self):
+        create_transfers([
+            Transfer(
+                user=self.user, from_account=self.account, to_account=self.savings,
+                amount=Decimal('250.00'), date=day,
+            )
+            for day in (date(2025, 3, 10), date(2025, 5, 2), date(2025, 5, 30))
+        ])
+
+    def test_totals_are_unchanged(self):
+        """Rollup months, edge days and weeks all skip the legs."""
+        ranges = [
+            (date(2025, 1, 1), date(2025, 12, 31), 'month'),
+            (date(2025, 3, 5), date(2025, 5, 20), 'month'),
+            (date(2025, 4, 28), date(2025, 6, 1), PERIOD_WEEK),
+        ]
+        def totals():
+            return (
+                [period_totals(self.user, *args) for args in ranges],
+                category_breakdown(self.user, date(2025, 3, 5), date(2025, 5, 20), 'income'),
+                category_breakdown(self.user, date(2025, 3, 5), date(2025, 5, 20), 'expense'),
+            )
+
+        before = totals()
+        self.add_transfers()
+        self.assertEqual(totals(), before)
+
+    def test_account_balance_includes_transfers(self):
+        """The balance series of an account follows the money moved."""
+        total = time_series(self.user, date(2025, 1, 1), date(2025, 12, 31))
+        self.add_transfers()
+        self.assertEqual(time_series(self.user, date(2025, 1, 1), date(2025, 12, 31)), total)
+        for date_from, date_to in [
+            (date(2025, 5, 1), date(2025, 5, 31)),
+            (date(2025, 1, 1), date(2025, 12, 31)),
+            (date(2021, 1, 1), date(2025, 12, 31)),
+        ]:
+            with self.subTest(date_from=date_from, date_to=date_to):
+                series = time_series(self.user, date_from, date_to, account=self.savings)
+                self.assertEqual(sum(series['net']), Decimal('0'))
+                self.assertEqual(series['balance'][-1], Decimal('750.00'))
@@ -0,0 +1,26 @@
+"""
+URL configuration for the reports app.
+
+Provides routes for the reports of the logged-in user's transactions:
+- categories: Totals by category with their share of the total.
+- cash_flow: Income vs expenses per month or week.
+- top_categories: The categories with the largest totals.
+- series: JSON time series for charts.
+"""
+from django.urls import path
+
+from reports.views import (
+    CashFlowReportView,
+    CategoryReportView,
+    TimeSeriesView,
+    TopCategoriesReportView,
+)
+
+app_name = 'reports'
+
+urlpatterns = [
+    path('', CategoryReportView.as_view(), name='categories'),
+    path('cash-flow/', CashFlowReportView.as_view(), name='cash_flow'),
+    path('top-categories/', TopCategoriesReportView.as_view(), name='top_categories'),
+    path('series/', TimeSeriesView.as_view(), name='series'),
+]
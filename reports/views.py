@@ -0,0 +1,194 @@
+"""
+Report views for the Finanpy project.
+
+Provides the reports of the logged-in user's transactions over a date
+range (see reports.queries):
+- CategoryReportView: Spending (or income) by category with shares.
+- CashFlowReportView: Income vs expenses per month or week.
+- TopCategoriesReportView: The categories with the largest totals.
+- TimeSeriesView: JSON series (income, expenses, net, balance) for charts.
+
+Each report runs a single grouped query and exposes its data both for
+the HTML tables and, through ``json_script``, for charts.
+"""
+import hashlib
+
+from django.contrib.auth.mixins import LoginRequiredMixin
+from django.core.cache import cache
+from django.http import JsonResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.views.generic import TemplateView, View
+
+from core.cache import user_cache_key
+from reports.forms import ReportFilterForm, TimeSeriesForm
+from reports.queries import TOP_CATEGORIES, cash_flow, category_breakdown, top_categories
+from reports.series import time_series
+
+
+class ReportView(LoginRequiredMixin, TemplateView):
+    """Base view: reads the ReportFilterForm and renders ``get_report()``."""
+
+    # ReportFilterForm fields shown by the report.
+    form_fields = ('date_from', 'date_to')
+
+    def get_report(self, options):
+        """Return the report rows for the effective form options."""
+        raise NotImplementedError
+
+    def get_chart(self, rows):
+        """Return the rows reshaped as chart labels and series."""
+        raise NotImplementedError
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        form = ReportFilterForm(self.request.GET)
+        options = form.options()
+        rows = self.get_report(options)
+        context.update({
+            'filter_form': form,
+            'form_fields': self.form_fields,
+            'options': options,
+            'rows': rows,
+            'chart': self.get_chart(rows),
+        })
+        return context
+
+
+class CategoryReportView(ReportView):
+    """Totals of each category in the range, with their share of the total."""
+
+    template_name = 'reports/category_report.html'
+    form_fields = ('date_from', 'date_to', 'transaction_type')
+
+    def get_report(self, options):
+        return category_breakdown(
+            self.request.user,
+            options['date_from'],
+            options['date_to'],
+            options['transaction_type'],
+        )
+
+    def get_chart(self, rows):
+        return {
+            'labels': [row['name'] or 'Sem categoria' for row in rows],
+            'colors': [row['color'] or '#6b7280' for row in rows],
+            'totals': [row['total'] for row in rows],
+            'shares': [row['share'] for row in rows],
+        }
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['total'] = sum(row['total'] for row in context['rows'])
+        return context
+
+
+class TopCategoriesReportView(CategoryReportView):
+    """The categories with the largest totals in the range."""
+
+    template_name = 'reports/top_categories_report.html'
+
+    def get_report(self, options):
+        return top_categories(
+            self.request.user,
+            options['date_from'],
+            options['date_to'],
+            options['transaction_type'],
+        )
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['limit'] = TOP_CATEGORIES
+        return context
+
+
+class CashFlowReportView(ReportView):
+    """Income, expenses and net per month or week of the range."""
+
+    template_name = 'reports/cash_flow_report.html'
+    form_fields = ('date_from', 'date_to', 'period')
+
+    def get_report(self, options):
+        return cash_flow(
+            self.request.user,
+            options['date_from'],
+            options['date_to'],
+            options['period'],
+        )
+
+    def get_chart(self, rows):
+        return {
+            'labels': [row['period'] for row in rows],
+            'income': [row['income'] for row in rows],
+            'expenses': [row['expenses'] for row in rows],
+            'net': [row['net'] for row in rows],
+        }
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        rows = context['rows']
+        context['income'] = sum(row['income'] for row in rows)
+        context['expenses'] = sum(row['expenses'] for row in rows)
+        context['net'] = context['income'] - context['expenses']
+        # Scale of the bars: the largest income or expense of a period.
+        context['scale'] = max(
+            [row['income'] for row in rows] + [row['expenses'] for row in rows],
+            default=0,
+        )
+        return context
+
+
+class TimeSeriesView(LoginRequiredMixin, View):
+    """
+    Return the chart series of the logged-in user as compact JSON.
+
+    Query parameters: date_from, date_to, account and category (see
+    TimeSeriesForm). The series are downsampled to at most
+    reports.series.MAX_POINTS points. Responses are cached under the
+    user's data version and carry an ETag derived from it, so clients
+    revalidate with a 304 until the user's data changes.
+    """
+
+    cache_timeout = 60 * 60
+
+    def get(self, request, *args, **kwargs):
+        form = TimeSeriesForm(request.GET, user=request.user)
+        if not form.is_valid():
+            return JsonResponse({'errors': form.errors}, status=400)
+        data = form.cleaned_data
+        key = user_cache_key(
+            'series',
+            request.user.pk,
+            data['date_from'].isoformat(),
+            data['date_to'].isoformat(),
+            data['account'].pk if data['account'] else '',
+            data['category'].pk if data['category'] else '',
+        )
+        etag = f'"{hashlib.md5(key.encode()).hexdigest()}"'
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            payload = cache.get(key)
+            if payload is None:
+                payload = self.build_payload(data)
+                cache.set(key, payload, self.cache_timeout)
+            response = JsonResponse(payload, json_dumps_params={'separators': (',', ':')})
+        response['ETag'] = etag
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+    def build_payload(self, data):
+        series = time_series(
+            self.request.user,
+            data['date_from'],
+            data['date_to'],
+            account=data['account'],
+            category=data['category'],
+        )
+        numbers = ('income', 'expenses', 'net', 'balance')
+        return {
+            'bucket': series['bucket'],
+            'labels': [start.isoformat() for start in series['labels']],
+            **{
+                name: None if series[name] is None else [float(value) for value in series[name]]
+                for name in numbers
+            },
+        }
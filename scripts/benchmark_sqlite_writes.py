@@ -0,0 +1,138 @@
+"""
+Concurrent write benchmark for the Finanpy SQLite settings.
+
+Starts N writer processes at once, each booking transactions through
+the same write path as the transaction views (the insert and
+apply_transaction_changes in one atomic block) on the same account, so
+every write contends for the same balance row. It runs once with the
+development settings and once with the production profile, each on a
+fresh temporary database, and prints the throughput and how many
+writes failed with "database is locked".
+
+Usage (from the project root):
+
+    python scripts/benchmark_sqlite_writes.py --writers 8 --writes 200
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+PROFILES = ('development', 'production')
+
+
+def setup_django(profile, path):
+    """Configure Django in this process for a profile and a database file."""
+    sys.path.insert(0, str(BASE_DIR))
+    os.environ['DJANGO_SETTINGS_MODULE'] = 'core.settings'
+    os.environ['FINANPY_PROFILE'] = profile
+    os.environ['FINANPY_SQLITE_PATH'] = path
+    os.environ.setdefault('DJANGO_SECRET_KEY', 'benchmark-only')
+    import django
+    django.setup()
+
+
+def prepare(profile, path, result):
+    """Create the schema, a user and the account every writer books on."""
+    setup_django(profile, path)
+    from django.contrib.auth import get_user_model
+    from django.core.management import call_command
+
+    from accounts.models import Account
+    from categories.models import Category
+
+    call_command('migrate', verbosity=0)
+    user = get_user_model().objects.create_user(
+        email='benchmark@example.com', password='benchmark',
+    )
+    account = Account.objects.create(user=user, name='Benchmark', account_type='checking')
+    category = Category.objects.create(user=user, name='Benchmark', category_type='expense')
+    result.put((user.pk, account.pk, category.pk))
+
+
+def write(profile, path, ids, writes, barrier, results):
+    """Book ``writes`` transactions, one DB transaction each."""
+    setup_django(profile, path)
+    import datetime
+    from decimal import Decimal
+
+    from django.db import OperationalError
+    from django.db import transaction as db_transaction
+
+    from transactions.models import Transaction
+    from transactions.services import apply_transaction_changes
+
+    user_id, account_id, category_id = ids
+    today = datetime.date.today()
+    done = failed = 0
+    barrier.wait()
+    for _ in range(writes):
+        try:
+            with db_transaction.atomic():
+                transaction = Transaction.objects.create(
+                    user_id=user_id,
+                    account_id=account_id,
+                    category_id=category_id,
+                    transaction_type='expense',
+                    amount=Decimal('1.00'),
+                    date=today,
+                    description='Benchmark',
+                )
+                apply_transaction_changes(added=[transaction])
+            done += 1
+        except OperationalError:
+            failed += 1
+    results.put((done, failed))
+
+
+def run(profile, writers, writes):
+    """Return (seconds, writes done, writes failed) for one profile."""
+    context = multiprocessing.get_context('spawn')
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'benchmark.sqlite3')
+        queue = context.Queue()
+        process = context.Process(target=prepare, args=(profile, path, queue))
+        process.start()
+        ids = queue.get()
+        process.join()
+
+        barrier = context.Barrier(writers + 1)
+        results = context.Queue()
+        processes = [
+            context.Process(target=write, args=(profile, path, ids, writes, barrier, results))
+            for _ in range(writers)
+        ]
+        for process in processes:
+            process.start()
+        # Every writer has set Django up; start the clock with them.
+        barrier.wait()
+        start = time.perf_counter()
+        totals = [results.get() for _ in processes]
+        elapsed = time.perf_counter() - start
+        for process in processes:
+            process.join()
+    done = sum(total[0] for total in totals)
+    failed = sum(total[1] for total in totals)
+    return elapsed, done, failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--writers', type=int, default=8, help='concurrent writer processes')
+    parser.add_argument('--writes', type=int, default=200, help='transactions per writer')
+    args = parser.parse_args()
+
+    print(f'{args.writers} writers x {args.writes} transactions')
+    print(f'{"profile":<12} {"seconds":>8} {"done":>6} {"locked":>7} {"writes/s":>9}')
+    for profile in PROFILES:
+        elapsed, done, failed = run(profile, args.writers, args.writes)
+        print(f'{profile:<12} {elapsed:>8.2f} {done:>6} {failed:>7} {done / elapsed:>9.1f}')
+
+
+if __name__ == '__main__':
+    main()
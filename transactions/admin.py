@@ -1,6 +1,14 @@
 from django.contrib import admin
 
-from transactions.models import Transaction
+from transactions.models import (
+    AccountBalanceSnapshot,
+    DeletionJob,
+    MonthlySummary,
+    RecurringTransaction,
+    Transaction,
+    Transfer,
+)
+from transactions.recurring import schedule
 
 
 @admin.register(Transaction)
@@ -14,3 +22,86 @@ class TransactionAdmin(admin.ModelAdmin):
     list_per_page = 25
     readonly_fields = ('created_at', 'updated_at')
     list_select_related = ('user', 'account', 'category')
+
+
+@admin.register(Transfer)
+class TransferAdmin(admin.ModelAdmin):
+    """Read-only admin for transfers (their legs must change together)."""
+
+    list_display = ('description', 'user', 'amount', 'from_account', 'to_account', 'date')
+    search_fields = ('description', 'user__email')
+    date_hierarchy = 'date'
+    list_per_page = 25
+    list_select_related = ('user', 'from_account', 'to_account')
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(RecurringTransaction)
+class RecurringTransactionAdmin(admin.ModelAdmin):
+    """Admin configuration for the RecurringTransaction model."""
+
+    list_display = ('description', 'user', 'transaction_type', 'amount', 'frequency', 'next_occurrence', 'is_active')
+    list_filter = ('frequency', 'is_active', 'transaction_type')
+    search_fields = ('description', 'user__email')
+    list_per_page = 25
+    readonly_fields = ('next_occurrence', 'created_at', 'updated_at')
+    list_select_related = ('user',)
+
+    def save_model(self, request, obj, form, change):
+        schedule(obj)
+        super().save_model(request, obj, form, change)
+
+
+@admin.register(MonthlySummary)
+class MonthlySummaryAdmin(admin.ModelAdmin):
+    """Read-only admin for the monthly rollup (maintained automatically)."""
+
+    list_display = ('year_month', 'user', 'account', 'category', 'transaction_type', 'total', 'count')
+    list_filter = ('transaction_type', 'user')
+    date_hierarchy = 'year_month'
+    list_per_page = 25
+    list_select_related = ('user', 'account', 'category')
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(AccountBalanceSnapshot)
+class AccountBalanceSnapshotAdmin(admin.ModelAdmin):
+    """Read-only admin for the month-end balances (maintained automatically)."""
+
+    list_display = ('month_end', 'account', 'balance')
+    list_filter = ('account__user',)
+    date_hierarchy = 'month_end'
+    list_per_page = 25
+    list_select_related = ('account',)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(DeletionJob)
+class DeletionJobAdmin(admin.ModelAdmin):
+    """Read-only admin to follow background deletions (run by process_deletions)."""
+
+    list_display = ('label', 'kind', 'status', 'deleted', 'total', 'created_at', 'finished_at')
+    list_filter = ('kind', 'status')
+    search_fields = ('label',)
+    list_per_page = 25
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
@@ -1,5 +1,28 @@
 from django.apps import AppConfig
+from django.db import connections
+from django.db.models.signals import post_migrate
+
+
+def restore_search_index(sender, using, plan=None, **kwargs):
+    """
+    Recreate the SQLite search triggers after migrations.
+
+    SQLite cannot alter most columns in place, so Django rebuilds the
+    transaction table for such migrations, and dropping the old table
+    drops its triggers with it.
+    """
+    from transactions.search import FTS_TABLE, install_search_index
+
+    connection = connections[using]
+    if connection.vendor != 'sqlite':
+        return
+    tables = connection.introspection.table_names()
+    if 'transactions_transaction' in tables and FTS_TABLE in tables:
+        install_search_index(connection)
 
 
 class TransactionsConfig(AppConfig):
     name = 'transactions'
+
+    def ready(self):
+        post_migrate.connect(restore_search_index, sender=self)
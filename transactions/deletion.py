@@ -0,0 +1,169 @@
+"""
+Background deletion of accounts and users for the Finanpy project.
+
+Deleting an account with the ORM makes Django collect and remove all
+of its transactions, with their rollup and snapshot rows, in one DB
+transaction that grows with the history and holds the write lock (on
+SQLite, the whole database) until it is done. Instead, the delete
+views only schedule a DeletionJob: the account (or user) is marked
+inactive in the same request, and ``manage.py process_deletions``
+runs the job later.
+
+A job deletes the transactions ``batch_size`` at a time, each batch in
+a DB transaction of its own: the ids are read from the account's index,
+the rows are removed with one ``DELETE ... WHERE id IN (...)`` and
+apply_transaction_changes takes them out of the balance, the
+MonthlySummary rollup and the snapshots, so what is left stays
+consistent between batches and other writers never wait long. Once no
+transactions remain the row itself is deleted with the ORM, which only
+has a few small related rows left to cascade to. The work is
+idempotent, so a job that failed simply resumes on the next run.
+"""
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.db import transaction as db_transaction
+from django.db.models import F
+from django.utils import timezone
+
+from accounts.models import Account
+from api.tombstones import record_deletion
+from core.cache import invalidate_reference_data
+from transactions.models import DeletionJob, RecurringTransaction, Transaction
+from transactions.services import TransactionSnapshot, apply_transaction_changes
+
+DELETION_BATCH_SIZE = 1000
+
+
+def schedule_account_deletion(account):
+    """Mark ``account`` as being deleted and return its new DeletionJob."""
+    with db_transaction.atomic():
+        account.is_active = False
+        account.save(update_fields=['is_active', 'updated_at'])
+        # No new occurrences on an account that is going away.
+        RecurringTransaction.objects.filter(account=account).update(is_active=False)
+        return DeletionJob.objects.create(
+            kind=DeletionJob.ACCOUNT,
+            user_id=account.user_id,
+            account=account,
+            label=account.name,
+        )
+
+
+def schedule_user_deletion(user):
+    """Deactivate ``user`` (which ends their sessions) and return a DeletionJob."""
+    with db_transaction.atomic():
+        user.is_active = False
+        user.save(update_fields=['is_active'])
+        RecurringTransaction.objects.filter(user=user).update(is_active=False)
+        return DeletionJob.objects.create(
+            kind=DeletionJob.USER,
+            user=user,
+            label=user.email,
+        )
+
+
+def pending_deletion_jobs():
+    """Return the jobs still to run (failed ones are retried), oldest first."""
+    return DeletionJob.objects.filter(
+        status__in=[DeletionJob.PENDING, DeletionJob.FAILED],
+    ).order_by('created_at')
+
+
+def delete_rows(model, pks):
+    """Delete rows of ``model`` by primary key with one plain DELETE."""
+    table = connection.ops.quote_name(model._meta.db_table)
+    column = connection.ops.quote_name(model._meta.pk.column)
+    placeholders = ', '.join(['%s'] * len(pks))
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {table} WHERE {column} IN ({placeholders})', list(pks))
+        return cursor.rowcount
+
+
+def delete_account_transactions(job, account_id, batch_size=DELETION_BATCH_SIZE, progress=None):
+    """
+    Delete the transactions of an account in batches; return how many.
+
+    Each batch is read in the order of the account's index, so finding
+    the next one never sorts or scans the rows already deleted. The
+    job's ``deleted`` counter moves in the same DB transaction as the
+    rows. Transfer legs go like any other transaction: the leg in the
+    other account and the transfer itself stay, as with CASCADE.
+    """
+    transactions = (
+        Transaction.objects.filter(account_id=account_id)
+        .order_by('date', 'created_at', 'id')
+        .values_list('pk', *TransactionSnapshot._fields)
+    )
+    if connection.features.has_select_for_update:
+        # A transaction deleted from the list meanwhile must not be
+        # taken out of the balance twice.
+        transactions = transactions.select_for_update()
+    deleted = 0
+    while True:
+        with db_transaction.atomic():
+            rows = list(transactions[:batch_size])
+            if not rows:
+                return deleted
+            delete_rows(Transaction, [row[0] for row in rows])
+            apply_transaction_changes(removed=[TransactionSnapshot(*row[1:]) for row in rows])
+            DeletionJob.objects.filter(pk=job.pk).update(deleted=F('deleted') + len(rows))
+        deleted += len(rows)
+        job.deleted += len(rows)
+        if progress is not None:
+            progress(job)
+
+
+def run_deletion_job(job, batch_size=DELETION_BATCH_SIZE, progress=None):
+    """
+    Run one job to the end and return it with its final status.
+
+    The job is claimed with a conditional UPDATE, so two workers never
+    run the same one; a job another worker holds is returned unchanged.
+    ``progress``, if given, is called with the job after every batch.
+    An error stops the job as FAILED, with the message in ``error``.
+    """
+    claimed = DeletionJob.objects.filter(
+        pk=job.pk,
+        status__in=[DeletionJob.PENDING, DeletionJob.FAILED],
+    ).update(status=DeletionJob.RUNNING, error='')
+    if not claimed:
+        return job
+    job.refresh_from_db()
+    if job.kind == DeletionJob.ACCOUNT:
+        account_ids = [job.account_id] if job.account_id else []
+        transactions = Transaction.objects.filter(account_id__in=account_ids)
+    else:
+        account_ids = list(
+            Account.objects.filter(user_id=job.user_id).order_by('pk').values_list('pk', flat=True)
+        )
+        transactions = Transaction.objects.filter(user_id=job.user_id)
+    try:
+        if not job.total:
+            job.total = transactions.count()
+            DeletionJob.objects.filter(pk=job.pk).update(total=job.total)
+        for account_id in account_ids:
+            delete_account_transactions(job, account_id, batch_size, progress)
+        with db_transaction.atomic():
+            if job.kind == DeletionJob.ACCOUNT:
+                account = Account.objects.filter(pk=job.account_id).first()
+                if account is not None:
+                    # Synced clients drop the deleted transactions
+                    # along with the account.
+                    record_deletion(account)
+                    account.delete()
+                    invalidate_reference_data(job.user_id)
+            else:
+                get_user_model().objects.filter(pk=job.user_id).delete()
+            # Not job.save(): the deletes above have set its foreign
+            # keys to NULL.
+            DeletionJob.objects.filter(pk=job.pk).update(
+                status=DeletionJob.DONE,
+                finished_at=timezone.now(),
+            )
+    except Exception as error:
+        DeletionJob.objects.filter(pk=job.pk).update(
+            status=DeletionJob.FAILED,
+            error=str(error) or error.__class__.__name__,
+        )
+    job.refresh_from_db()
+    return job
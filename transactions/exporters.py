@@ -0,0 +1,105 @@
+"""
+CSV export of transactions for the Finanpy project.
+
+Rows are read with QuerySet.iterator() over a values_list projection
+(account and category names come from the join, not from extra
+queries) and written out as they arrive, optionally gzip-compressed on
+the fly. Memory stays flat whatever the history size, and the first
+bytes are sent as soon as the first chunk of rows is read. On
+PostgreSQL iterator() reads through a server-side cursor, so the
+database also sends the rows one chunk at a time.
+
+The output uses the same layout accepted by the statement importer:
+``;`` separated columns, dd/mm/yyyy dates and pt-BR amounts.
+"""
+import csv
+import zlib
+
+from transactions.models import Transaction
+
+DEFAULT_CHUNK_SIZE = 2000
+
+EXPORT_HEADER = ['data', 'descricao', 'tipo', 'valor', 'conta', 'categoria']
+
+EXPORT_FIELDS = (
+    'date',
+    'description',
+    'transaction_type',
+    'amount',
+    'account__name',
+    'category__name',
+)
+
+TYPE_LABELS = dict(Transaction.TRANSACTION_TYPES)
+
+
+class _LineBuffer:
+    """File-like object whose write() returns the line instead of storing it."""
+
+    def write(self, value):
+        return value
+
+
+def export_queryset(user, date_from=None, date_to=None, account=None, category=None):
+    """Return the export projection of ``user``'s transactions, oldest first."""
+    queryset = Transaction.objects.filter(user=user)
+    if date_from:
+        queryset = queryset.filter(date__gte=date_from)
+    if date_to:
+        queryset = queryset.filter(date__lte=date_to)
+    if account:
+        queryset = queryset.filter(account=account)
+    if category:
+        queryset = queryset.filter(category=category)
+    return (
+        queryset.order_by('date', 'created_at', 'id')
+        .values_list(*EXPORT_FIELDS)
+    )
+
+
+def _format_amount(amount):
+    return f'{amount:.2f}'.replace('.', ',')
+
+
+def iter_csv(queryset, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Yield the CSV text for ``queryset`` one chunk of rows at a time.
+
+    ``queryset`` must be an ``export_queryset`` projection. Rows are
+    fetched with ``iterator(chunk_size=...)`` so they are never all in
+    memory at once.
+    """
+    writer = csv.writer(_LineBuffer(), delimiter=';')
+    yield writer.writerow(EXPORT_HEADER)
+    lines = []
+    for tx_date, description, tx_type, amount, account, category in (
+        queryset.iterator(chunk_size=chunk_size)
+    ):
+        lines.append(writer.writerow([
+            tx_date.strftime('%d/%m/%Y'),
+            description,
+            TYPE_LABELS.get(tx_type, tx_type),
+            _format_amount(amount),
+            account,
+            category or '',
+        ]))
+        if len(lines) >= chunk_size:
+            yield ''.join(lines)
+            lines = []
+    if lines:
+        yield ''.join(lines)
+
+
+def iter_encoded(chunks, compress=False):
+    """Encode text chunks as UTF-8, gzip-compressing them if requested."""
+    if not compress:
+        for chunk in chunks:
+            yield chunk.encode('utf-8')
+        return
+    # wbits=31 writes a gzip header/trailer around the deflate stream.
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode('utf-8'))
+        if data:
+            yield data
+    yield compressor.flush()
@@ -0,0 +1,89 @@
+"""
+Filtering and sorting of the transaction list for the Finanpy project.
+
+Every sort maps to a keyset ordering that ends in the primary key and
+is the exact (or exactly reversed) column order of an index, so a page
+is always an index range read, never a scan-then-sort:
+
+- date: ``transaction_user_date_idx`` (user, -date, -created_at, -id),
+  or ``transaction_account_date_idx`` / ``transaction_category_date_idx``
+  when filtering by account or category.
+- amount: ``transaction_user_amount_idx`` (user, amount, id).
+
+The remaining filters (a second equality filter, or a range on the
+column the list is not sorted by) are applied while walking the chosen
+index.
+"""
+from django.db.models import F
+from django.db.models.functions import Coalesce
+
+from transactions.models import Transaction
+
+SORT_CHOICES = [
+    ('-date', 'Mais recentes'),
+    ('date', 'Mais antigas'),
+    ('-amount', 'Maior valor'),
+    ('amount', 'Menor valor'),
+]
+
+SORT_ORDERINGS = {
+    '-date': ('-date', '-created_at', '-id'),
+    'date': ('date', 'created_at', 'id'),
+    '-amount': ('-amount', '-id'),
+    'amount': ('amount', 'id'),
+}
+
+DEFAULT_SORT = '-date'
+
+
+def _unindexed(field):
+    """
+    Reference a column so the planner will not pick an index for it.
+
+    Used for range filters on the column the list is *not* sorted by.
+    Otherwise the database may prefer to range-scan that column's index
+    and sort every match, instead of walking the sort index and
+    stopping as soon as a page is filled.
+    """
+    return Coalesce(F(field), F(field))
+
+
+def filter_transactions(queryset, date_from=None, date_to=None, account=None,
+                        category=None, transaction_type=None,
+                        amount_min=None, amount_max=None, sort=DEFAULT_SORT):
+    """Apply the list filters that were given (None/empty means any)."""
+    by_amount = sort.lstrip('-') == 'amount'
+    date_field = 'date'
+    amount_field = 'amount'
+    if by_amount and (date_from or date_to):
+        queryset = queryset.alias(_date=_unindexed('date'))
+        date_field = '_date'
+    if not by_amount and (amount_min is not None or amount_max is not None):
+        queryset = queryset.alias(_amount=_unindexed('amount'))
+        amount_field = '_amount'
+
+    if date_from:
+        queryset = queryset.filter(**{f'{date_field}__gte': date_from})
+    if date_to:
+        queryset = queryset.filter(**{f'{date_field}__lte': date_to})
+    if account:
+        queryset = queryset.filter(account=account)
+    if category:
+        queryset = queryset.filter(category=category)
+    if transaction_type:
+        queryset = queryset.filter(transaction_type=transaction_type)
+    if amount_min is not None:
+        queryset = queryset.filter(**{f'{amount_field}__gte': amount_min})
+    if amount_max is not None:
+        queryset = queryset.filter(**{f'{amount_field}__lte': amount_max})
+    return queryset
+
+
+def transaction_list_queryset(user, sort=DEFAULT_SORT, **filters):
+    """Return ``user``'s filtered transactions in the keyset order of ``sort``."""
+    if sort not in SORT_ORDERINGS:
+        sort = DEFAULT_SORT
+    queryset = filter_transactions(
+        Transaction.objects.filter(user=user), sort=sort, **filters,
+    )
+    return queryset.order_by(*SORT_ORDERINGS[sort])
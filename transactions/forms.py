@@ -2,13 +2,17 @@
 Transaction forms for the Finanpy project.
 
 Provides the TransactionForm for creating and editing transactions,
-styled with TailwindCSS and filtering accounts/categories by user.
+styled with TailwindCSS and offering the user's accounts/categories
+from the reference data cache, plus the transfer, recurring
+transaction, list filter, import and export forms.
 """
 from django import forms
 
 from accounts.models import Account
 from categories.models import Category
-from transactions.models import Transaction
+from core.reference import reference_data
+from transactions.filters import DEFAULT_SORT, SORT_CHOICES
+from transactions.models import RecurringTransaction, Transaction, Transfer
 
 # Shared Tailwind CSS classes for form widgets
 TAILWIND_INPUT_CLASSES = (
@@ -24,12 +28,64 @@ TAILWIND_SELECT_CLASSES = (
 )
 
 
-class TransactionForm(forms.ModelForm):
+class CachedModelChoiceField(forms.ModelChoiceField):
+    """
+    ModelChoiceField that can offer a list of already loaded objects.
+
+    After ``set_objects`` the choices are rendered from that list and a
+    submitted id is looked up in it, without querying the database. An
+    id missing from the list (created since the list was cached) is
+    still looked up in the queryset.
+    """
+
+    objects = None
+
+    def set_objects(self, objects, queryset):
+        """Offer ``objects`` (in that order), all of them in ``queryset``."""
+        self.queryset = queryset
+        self.objects = {str(obj.pk): obj for obj in objects}
+        choices = [(obj.pk, self.label_from_instance(obj)) for obj in objects]
+        if self.empty_label is not None:
+            choices.insert(0, ('', self.empty_label))
+        self.choices = choices
+
+    def to_python(self, value):
+        if self.objects is None:
+            return super().to_python(value)
+        if value in self.empty_values:
+            return None
+        if isinstance(value, self.queryset.model):
+            value = value.pk
+        try:
+            return self.objects[str(value)]
+        except KeyError:
+            return super().to_python(value)
+
+
+class CachedChoicesMixin:
+    """
+    ModelForm mixin for forms with CachedModelChoiceField fields.
+
+    An object picked from the cached list was already checked to be
+    one of the user's, so the model validation does not query the
+    database again to check that it exists.
+    """
+
+    def _get_validation_exclusions(self):
+        exclude = super()._get_validation_exclusions()
+        for name, field in self.fields.items():
+            if isinstance(field, CachedModelChoiceField) and field.objects is not None:
+                exclude.add(name)
+        return exclude
+
+
+class TransactionForm(CachedChoicesMixin, forms.ModelForm):
     """
     Form for creating and editing transactions.
 
     Fields: transaction_type, account, category, amount, date, description.
-    Account and category querysets are filtered by user in __init__.
+    The user's accounts and categories are offered from the reference
+    data cache (see core.reference), set in __init__.
     The user field is assigned in the view's form_valid method.
     """
 
@@ -43,6 +99,10 @@ class TransactionForm(forms.ModelForm):
             'date',
             'description',
         ]
+        field_classes = {
+            'account': CachedModelChoiceField,
+            'category': CachedModelChoiceField,
+        }
         labels = {
             'transaction_type': 'Tipo',
             'account': 'Conta',
@@ -81,6 +141,388 @@ class TransactionForm(forms.ModelForm):
             }),
         }
 
+    def __init__(self, *args, user=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if user is not None:
+            reference = reference_data(user.pk)
+            self.fields['account'].set_objects(
+                reference.accounts, Account.objects.filter(user=user, deletion_jobs__isnull=True),
+            )
+            self.fields['category'].set_objects(
+                reference.categories, Category.objects.filter(user=user),
+            )
+
+
+class TransferForm(CachedChoicesMixin, forms.ModelForm):
+    """
+    Form for moving money between two of the user's accounts.
+
+    The user's accounts are offered from the reference data cache,
+    set in __init__.
+    """
+
+    class Meta:
+        model = Transfer
+        fields = ['from_account', 'to_account', 'amount', 'date', 'description']
+        field_classes = {
+            'from_account': CachedModelChoiceField,
+            'to_account': CachedModelChoiceField,
+        }
+        labels = {
+            'from_account': 'Conta de origem',
+            'to_account': 'Conta de destino',
+            'amount': 'Valor',
+            'date': 'Data',
+            'description': 'Descrição',
+        }
+        help_texts = {
+            'description': 'Opcional. Em branco, as contas são citadas na descrição.',
+        }
+        widgets = {
+            'from_account': forms.Select(attrs={
+                'class': TAILWIND_SELECT_CLASSES,
+            }),
+            'to_account': forms.Select(attrs={
+                'class': TAILWIND_SELECT_CLASSES,
+            }),
+            'amount': forms.NumberInput(attrs={
+                'class': TAILWIND_INPUT_CLASSES,
+                'placeholder': '0.00',
+                'step': '0.01',
+                'min': '0.01',
+            }),
+            'date': forms.DateInput(attrs={
+                'type': 'date',
+                'class': TAILWIND_INPUT_CLASSES,
+            }),
+            'description': forms.TextInput(attrs={
+                'class': TAILWIND_INPUT_CLASSES,
+                'placeholder': 'Ex: Reserva de emergência',
+                'autocomplete': 'off',
+            }),
+        }
+
+    def __init__(self, *args, user=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields['from_account'].required = True
+        self.fields['to_account'].required = True
+        if user is not None:
+            accounts = reference_data(user.pk).accounts
+            queryset = Account.objects.filter(user=user, deletion_jobs__isnull=True)
+            self.fields['from_account'].set_objects(accounts, queryset)
+            self.fields['to_account'].set_objects(accounts, queryset)
+
+    def clean_amount(self):
+        amount = self.cleaned_data['amount']
+        if amount <= 0:
+            raise forms.ValidationError('O valor deve ser maior que zero.')
+        return amount
+
+    def clean(self):
+        cleaned_data = super().clean()
+        from_account = cleaned_data.get('from_account')
+        if from_account and from_account == cleaned_data.get('to_account'):
+            self.add_error('to_account', 'A conta de destino deve ser diferente da de origem.')
+        return cleaned_data
+
+
+class RecurringTransactionForm(CachedChoicesMixin, forms.ModelForm):
+    """
+    Form for creating and editing a recurring transaction rule.
+
+    The user's accounts and categories are offered from the reference
+    data cache, set in __init__.
+    """
+
+    class Meta:
+        model = RecurringTransaction
+        fields = [
+            'transaction_type',
+            'account',
+            'category',
+            'amount',
+            'description',
+            'frequency',
+            'interval',
+            'day_of_month',
+            'business_day',
+            'start_date',
+            'end_date',
+            'is_active',
+        ]
+        field_classes = {
+            'account': CachedModelChoiceField,
+            'category': CachedModelChoiceField,
+        }
+        labels = {
+            'transaction_type': 'Tipo',
+            'account': 'Conta',
+            'category': 'Categoria',
+            'amount': 'Valor',
+            'description': 'Descrição',
+            'frequency': 'Frequência',
+            'interval': 'A cada',
+            'day_of_month': 'Dia do mês',
+            'business_day': 'Fins de semana',
+            'start_date': 'Data inicial',
+            'end_date': 'Data final',
+            'is_active': 'Ativa',
+        }
+        help_texts = {
+            'end_date': 'Opcional. Em branco, a recorrência não termina.',
+        }
+        widgets = {
+            'transaction_type': forms.Select(attrs={
+                'class': TAILWIND_SELECT_CLASSES,
+            }),
+            'account': forms.Select(attrs={
+                'class': TAILWIND_SELECT_CLASSES,
+            }),
+            'category': forms.Select(attrs={
+                'class': TAILWIND_SELECT_CLASSES,
+            }),
+            'amount': forms.NumberInput(attrs={
+                'class': TAILWIND_INPUT_CLASSES,
+                'placeholder': '0.00',
+                'step': '0.01',
+                'min': '0.01',
+            }),
+            'description': forms.TextInput(attrs={
+                'class': TAILWIND_INPUT_CLASSES,
+                'placeholder': 'Ex: Aluguel, Salário...',
+                'autocomplete': 'off',
+            }),
+            'frequency': forms.Select(attrs={
+                'class': TAILWIND_SELECT_CLASSES,
+            }),
+            'interval': forms.NumberInput(attrs={
+                'class': TAILWIND_INPUT_CLASSES,
+                'min': '1',
+            }),
+            'day_of_month': forms.NumberInput(attrs={
+                'class': TAILWIND_INPUT_CLASSES,
+                'min': '1',
+                'max': '31',
+            }),
+            'business_day': forms.Select(attrs={
+                'class': TAILWIND_SELECT_CLASSES,
+            }),
+            'start_date': forms.DateInput(attrs={
+                'type': 'date',
+                'class': TAILWIND_INPUT_CLASSES,
+            }),
+            'end_date': forms.DateInput(attrs={
+                'type': 'date',
+                'class': TAILWIND_INPUT_CLASSES,
+            }),
+        }
+
+    def __init__(self, *args, user=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if user is not None:
+            reference = reference_data(user.pk)
+            self.fields['account'].set_objects(
+                reference.accounts, Account.objects.filter(user=user, deletion_jobs__isnull=True),
+            )
+            self.fields['category'].set_objects(
+                reference.categories, Category.objects.filter(user=user),
+            )
+
+    def clean_amount(self):
+        amount = self.cleaned_data['amount']
+        if amount <= 0:
+            raise forms.ValidationError('O valor deve ser maior que zero.')
+        return amount
+
+    def clean_interval(self):
+        interval = self.cleaned_data['interval']
+        if interval < 1:
+            raise forms.ValidationError('Use um número maior que zero.')
+        return interval
+
+    def clean_day_of_month(self):
+        day_of_month = self.cleaned_data['day_of_month']
+        if day_of_month is not None and not 1 <= day_of_month <= 31:
+            raise forms.ValidationError('Use um dia entre 1 e 31.')
+        return day_of_month
+
+    def clean(self):
+        cleaned_data = super().clean()
+        start_date = cleaned_data.get('start_date')
+        end_date = cleaned_data.get('end_date')
+        if start_date and end_date and end_date < start_date:
+            self.add_error('end_date', 'A data final deve ser posterior à inicial.')
+        return cleaned_data
+
+
+class TransactionImportForm(forms.Form):
+    """
+    Upload form for importing a CSV bank statement.
+
+    The default account is used for rows without a "conta" column.
+    The account queryset is filtered by user in __init__.
+    """
+
+    ENCODINGS = [
+        ('utf-8-sig', 'UTF-8'),
+        ('latin-1', 'Latin-1 (ISO-8859-1)'),
+    ]
+
+    file = forms.FileField(
+        label='Arquivo CSV',
+        help_text='Colunas: data, descrição, valor e, opcionalmente, tipo, conta e categoria.',
+        widget=forms.ClearableFileInput(attrs={
+            'class': TAILWIND_INPUT_CLASSES,
+            'accept': '.csv,text/csv',
+        }),
+    )
+    account = forms.ModelChoiceField(
+        label='Conta padrão',
+        queryset=Account.objects.none(),
+        required=False,
+        help_text='Usada nas linhas sem a coluna "conta".',
+        widget=forms.Select(attrs={
+            'class': TAILWIND_SELECT_CLASSES,
+        }),
+    )
+    encoding = forms.ChoiceField(
+        label='Codificação',
+        choices=ENCODINGS,
+        initial='utf-8-sig',
+        widget=forms.Select(attrs={
+            'class': TAILWIND_SELECT_CLASSES,
+        }),
+    )
+
+    def __init__(self, *args, user=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if user is not None:
+            self.fields['account'].queryset = (
+                Account.objects.filter(user=user, deletion_jobs__isnull=True).order_by('name')
+            )
+
+
+class TransactionExportForm(forms.Form):
+    """
+    Filters for the CSV export (all optional).
+
+    Account and category querysets are filtered by user in __init__.
+    """
+
+    date_from = forms.DateField(label='De', required=False)
+    date_to = forms.DateField(label='Até', required=False)
+    account = forms.ModelChoiceField(
+        label='Conta',
+        queryset=Account.objects.none(),
+        required=False,
+    )
+    category = forms.ModelChoiceField(
+        label='Categoria',
+        queryset=Category.objects.none(),
+        required=False,
+    )
+    compress = forms.BooleanField(label='Compactar (gzip)', required=False)
+
+    def __init__(self, *args, user=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if user is not None:
+            self.fields['account'].queryset = Account.objects.filter(user=user)
+            self.fields['category'].queryset = Category.objects.filter(user=user)
+
+
+class TransactionFilterForm(forms.Form):
+    """
+    Filters and sort order for the transaction list (all optional).
+
+    Submitted with GET. Account and category querysets are filtered by
+    user in __init__. A search text (``q``) lists the best matches
+    instead of the chosen sort.
+    """
+
+    q = forms.CharField(
+        label='Buscar',
+        required=False,
+        max_length=100,
+        widget=forms.TextInput(attrs={
+            'class': TAILWIND_INPUT_CLASSES,
+            'placeholder': 'Descrição...',
+            'type': 'search',
+        }),
+    )
+    date_from = forms.DateField(
+        label='De',
+        required=False,
+        widget=forms.DateInput(attrs={
+            'type': 'date',
+            'class': TAILWIND_INPUT_CLASSES,
+        }),
+    )
+    date_to = forms.DateField(
+        label='Até',
+        required=False,
+        widget=forms.DateInput(attrs={
+            'type': 'date',
+            'class': TAILWIND_INPUT_CLASSES,
+        }),
+    )
+    account = forms.ModelChoiceField(
+        label='Conta',
+        queryset=Account.objects.none(),
+        required=False,
+        empty_label='Todas',
+        widget=forms.Select(attrs={
+            'class': TAILWIND_SELECT_CLASSES,
+        }),
+    )
+    category = forms.ModelChoiceField(
+        label='Categoria',
+        queryset=Category.objects.none(),
+        required=False,
+        empty_label='Todas',
+        widget=forms.Select(attrs={
+            'class': TAILWIND_SELECT_CLASSES,
+        }),
+    )
+    transaction_type = forms.ChoiceField(
+        label='Tipo',
+        choices=[('', 'Todos')] + Transaction.TRANSACTION_TYPES,
+        required=False,
+        widget=forms.Select(attrs={
+            'class': TAILWIND_SELECT_CLASSES,
+        }),
+    )
+    amount_min = forms.DecimalField(
+        label='Valor mínimo',
+        required=False,
+        min_value=0,
+        decimal_places=2,
+        widget=forms.NumberInput(attrs={
+            'class': TAILWIND_INPUT_CLASSES,
+            'placeholder': '0.00',
+            'step': '0.01',
+        }),
+    )
+    amount_max = forms.DecimalField(
+        label='Valor máximo',
+        required=False,
+        min_value=0,
+        decimal_places=2,
+        widget=forms.NumberInput(attrs={
+            'class': TAILWIND_INPUT_CLASSES,
+            'placeholder': '0.00',
+            'step': '0.01',
+        }),
+    )
+    sort = forms.ChoiceField(
+        label='Ordenar por',
+        choices=SORT_CHOICES,
+        required=False,
+        initial=DEFAULT_SORT,
+        widget=forms.Select(attrs={
+            'class': TAILWIND_SELECT_CLASSES,
+        }),
+    )
+
     def __init__(self, *args, user=None, **kwargs):
         super().__init__(*args, **kwargs)
         if user is not None:
@@ -90,3 +532,25 @@ class TransactionForm(forms.ModelForm):
             self.fields['category'].queryset = (
                 Category.objects.filter(user=user).order_by('category_type', 'name')
             )
+
+    def clean(self):
+        cleaned_data = super().clean()
+        date_from = cleaned_data.get('date_from')
+        date_to = cleaned_data.get('date_to')
+        if date_from and date_to and date_from > date_to:
+            self.add_error('date_to', 'A data final deve ser posterior à inicial.')
+        amount_min = cleaned_data.get('amount_min')
+        amount_max = cleaned_data.get('amount_max')
+        if amount_min is not None and amount_max is not None and amount_min > amount_max:
+            self.add_error('amount_max', 'O valor máximo deve ser maior que o mínimo.')
+        if not cleaned_data.get('sort'):
+            cleaned_data['sort'] = DEFAULT_SORT
+        return cleaned_data
+
+    def is_filtered(self):
+        """Return True when any filter (not just the sort) is set."""
+        return self.is_valid() and any(
+            value not in (None, '')
+            for name, value in self.cleaned_data.items()
+            if name != 'sort'
+        )
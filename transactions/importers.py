@@ -0,0 +1,283 @@
+"""
+CSV statement import for the Finanpy project.
+
+Parses bank statements as a stream and records them in batches: rows
+are mapped to the user's accounts and categories through in-memory
+lookups loaded once per import, inserted with bulk_create, and each
+touched account's balance is adjusted once per batch with the summed
+deltas. Memory use is bounded by the batch size, not the file size.
+
+Expected columns (header names are matched without case or accents):
+
+- data / date: ``dd/mm/yyyy`` or ``yyyy-mm-dd``.
+- valor / amount: pt-BR (``1.234,56``) or plain (``1234.56``) numbers.
+  When there is no type column, negative values are expenses.
+- descricao / description / historico (optional).
+- tipo / type (optional): receita/despesa, income/expense, C/D.
+- conta / account (optional when a default account is given).
+- categoria / category (optional).
+"""
+import csv
+import itertools
+import unicodedata
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+
+from django.db import transaction as db_transaction
+
+from accounts.models import Account
+from categories.models import Category
+from transactions.models import Transaction
+from transactions.services import apply_transaction_changes
+
+DEFAULT_BATCH_SIZE = 1000
+
+# Transaction.amount is max_digits=12, decimal_places=2.
+CENT = Decimal('0.01')
+MAX_AMOUNT = Decimal('1e10')
+
+# Maximum number of row errors kept for display; all are counted.
+MAX_REPORTED_ERRORS = 50
+
+COLUMN_ALIASES = {
+    'date': ('data', 'date', 'data lancamento', 'data da transacao'),
+    'amount': ('valor', 'amount', 'valor (r$)'),
+    'description': ('descricao', 'description', 'historico', 'memo'),
+    'transaction_type': ('tipo', 'type'),
+    'account': ('conta', 'account'),
+    'category': ('categoria', 'category'),
+}
+
+TYPE_ALIASES = {
+    'receita': 'income',
+    'income': 'income',
+    'credito': 'income',
+    'c': 'income',
+    'despesa': 'expense',
+    'expense': 'expense',
+    'debito': 'expense',
+    'd': 'expense',
+}
+
+
+class StatementError(ValueError):
+    """Raised for a row that cannot be imported."""
+
+
+def _normalize(text):
+    """Lowercase and strip accents, for matching headers and names."""
+    text = unicodedata.normalize('NFKD', text.strip().casefold())
+    return ''.join(c for c in text if not unicodedata.combining(c))
+
+
+def parse_amount(text):
+    """
+    Parse a monetary value in pt-BR or plain notation.
+
+    ``'1.234,56'`` and ``'1234.56'`` both return ``Decimal('1234.56')``;
+    a leading minus sign or surrounding parentheses make it negative.
+    Values that do not fit Transaction.amount (NaN, infinity, exponent
+    notation, more than 2 decimals or 10 integer digits) are rejected:
+    SQLite would store them as they are.
+    """
+    value = text.strip().replace('R$', '').replace(' ', '')
+    negative = value.startswith('(') and value.endswith(')')
+    value = value.strip('()')
+    if ',' in value:
+        value = value.replace('.', '').replace(',', '.')
+    try:
+        amount = Decimal(value)
+    except InvalidOperation:
+        raise StatementError(f'Valor inválido: {text!r}.')
+    if not amount.is_finite() or 'e' in value.casefold():
+        raise StatementError(f'Valor inválido: {text!r}.')
+    if amount != amount.quantize(CENT) or abs(amount) >= MAX_AMOUNT:
+        raise StatementError(
+            f'Valor inválido: {text!r}. Use no máximo 10 dígitos e 2 casas decimais.'
+        )
+    return -amount if negative else amount
+
+
+def parse_date(text):
+    """Parse ``dd/mm/yyyy`` (or ISO ``yyyy-mm-dd``) into a date."""
+    value = text.strip()
+    # Fast path for the common dd/mm/yyyy case; strptime is slow.
+    parts = value.split('/')
+    if len(parts) == 3 and len(parts[2]) == 4:
+        try:
+            return date(int(parts[2]), int(parts[1]), int(parts[0]))
+        except ValueError:
+            raise StatementError(f'Data inválida: {text!r}.')
+    for fmt in ('%Y-%m-%d', '%d/%m/%y'):
+        try:
+            return datetime.strptime(value, fmt).date()
+        except ValueError:
+            continue
+    raise StatementError(f'Data inválida: {text!r}.')
+
+
+class ImportResult:
+    """Counters and sample errors collected during an import."""
+
+    def __init__(self):
+        self.created = 0
+        self.error_count = 0
+        self.errors = []
+
+    def add_error(self, line_number, message):
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append(f'Linha {line_number}: {message}')
+
+
+class StatementImporter:
+    """
+    Import CSV statement rows for a single user.
+
+    Account and category names are resolved against dictionaries loaded
+    once per import, so mapping a row never hits the database.
+    """
+
+    def __init__(self, user, default_account=None, batch_size=DEFAULT_BATCH_SIZE):
+        self.user = user
+        self.default_account_id = default_account.pk if default_account else None
+        self.batch_size = max(1, int(batch_size))
+        self.accounts = {
+            _normalize(name): pk
+            for pk, name in (
+                Account.objects.filter(user=user, deletion_jobs__isnull=True)
+                .values_list('pk', 'name')
+            )
+        }
+        self.categories = {}
+        for pk, name, category_type in (
+            Category.objects.filter(user=user)
+            .values_list('pk', 'name', 'category_type')
+        ):
+            self.categories.setdefault(_normalize(name), {})[category_type] = pk
+
+    def _map_columns(self, header):
+        columns = {}
+        normalized = [_normalize(h) for h in header]
+        for key, aliases in COLUMN_ALIASES.items():
+            for index, name in enumerate(normalized):
+                if name in aliases:
+                    columns[key] = index
+                    break
+        missing = {'date', 'amount'} - columns.keys()
+        if missing:
+            raise StatementError(
+                'Cabeçalho sem as colunas obrigatórias: data e valor.'
+            )
+        if 'account' not in columns and self.default_account_id is None:
+            raise StatementError(
+                'Informe uma conta padrão ou inclua a coluna "conta".'
+            )
+        return columns
+
+    def _build(self, row, columns):
+        def cell(key):
+            index = columns.get(key)
+            if index is None or index >= len(row):
+                return ''
+            return row[index].strip()
+
+        amount = parse_amount(cell('amount'))
+        raw_type = _normalize(cell('transaction_type'))
+        if raw_type:
+            transaction_type = TYPE_ALIASES.get(raw_type)
+            if transaction_type is None:
+                raise StatementError(f'Tipo inválido: {cell("transaction_type")!r}.')
+        else:
+            transaction_type = 'expense' if amount < 0 else 'income'
+        amount = abs(amount)
+        if not amount:
+            raise StatementError('Valor deve ser maior que zero.')
+
+        account_name = cell('account')
+        if account_name:
+            account_id = self.accounts.get(_normalize(account_name))
+            if account_id is None:
+                raise StatementError(f'Conta não encontrada: {account_name!r}.')
+        else:
+            account_id = self.default_account_id
+            if account_id is None:
+                raise StatementError('Conta não informada.')
+
+        category_id = None
+        category_name = cell('category')
+        if category_name:
+            by_type = self.categories.get(_normalize(category_name))
+            if not by_type:
+                raise StatementError(f'Categoria não encontrada: {category_name!r}.')
+            # An income is never filed under an expense category (or
+            # the other way round): the rollup and budgets would count it.
+            category_id = by_type.get(transaction_type)
+            if category_id is None:
+                kind = 'receita' if transaction_type == 'income' else 'despesa'
+                raise StatementError(
+                    f'Categoria de {kind} não encontrada: {category_name!r}.'
+                )
+
+        return Transaction(
+            user=self.user,
+            account_id=account_id,
+            category_id=category_id,
+            transaction_type=transaction_type,
+            amount=amount,
+            date=parse_date(cell('date')),
+            description=cell('description')[:255],
+        )
+
+    def _flush(self, batch):
+        with db_transaction.atomic():
+            Transaction.objects.bulk_create(batch)
+            apply_transaction_changes(added=batch)
+
+    def run(self, stream, delimiter=None):
+        """Import every row of a text stream and return an ImportResult."""
+        result = ImportResult()
+        first_line = stream.readline()
+        if not first_line.strip():
+            result.add_error(1, 'Arquivo vazio.')
+            return result
+        if delimiter is None:
+            delimiter = ';' if first_line.count(';') > first_line.count(',') else ','
+        reader = csv.reader(
+            itertools.chain([first_line], stream),
+            delimiter=delimiter,
+        )
+        try:
+            columns = self._map_columns(next(reader))
+        except StatementError as exc:
+            result.add_error(1, str(exc))
+            return result
+
+        batch = []
+        for line_number, row in enumerate(reader, start=2):
+            if not any(cell.strip() for cell in row):
+                continue
+            try:
+                batch.append(self._build(row, columns))
+            except StatementError as exc:
+                result.add_error(line_number, str(exc))
+                continue
+            if len(batch) >= self.batch_size:
+                self._flush(batch)
+                result.created += len(batch)
+                batch = []
+        if batch:
+            self._flush(batch)
+            result.created += len(batch)
+        return result
+
+
+def import_statement(user, stream, default_account=None,
+                     batch_size=DEFAULT_BATCH_SIZE, delimiter=None):
+    """Import a CSV statement text stream for ``user``."""
+    importer = StatementImporter(
+        user,
+        default_account=default_account,
+        batch_size=batch_size,
+    )
+    return importer.run(stream, delimiter=delimiter)
@@ -0,0 +1,72 @@
+"""
+Export a user's transactions to CSV.
+
+Usage:
+    python manage.py export_transactions --user email@exemplo.com > extrato.csv
+    python manage.py export_transactions --user email@exemplo.com \
+        --from 2025-01-01 --to 2025-12-31 --gzip --output extrato.csv.gz
+"""
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from transactions.exporters import (
+    DEFAULT_CHUNK_SIZE,
+    export_queryset,
+    iter_csv,
+    iter_encoded,
+)
+from transactions.forms import TransactionExportForm
+
+
+class Command(BaseCommand):
+    help = 'Exporta as transações de um usuário em CSV, sem carregar tudo na memória.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', required=True, help='Email do usuário.')
+        parser.add_argument('--output', help='Arquivo de saída (padrão: stdout).')
+        parser.add_argument('--from', dest='date_from', help='Data inicial (AAAA-MM-DD).')
+        parser.add_argument('--to', dest='date_to', help='Data final (AAAA-MM-DD).')
+        parser.add_argument('--account', type=int, help='ID da conta.')
+        parser.add_argument('--category', type=int, help='ID da categoria.')
+        parser.add_argument('--gzip', action='store_true', help='Compacta a saída.')
+        parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        User = get_user_model()
+        try:
+            user = User.objects.get(email=options['user'])
+        except User.DoesNotExist:
+            raise CommandError(f'Usuário não encontrado: {options["user"]}')
+
+        form = TransactionExportForm({
+            'date_from': options['date_from'],
+            'date_to': options['date_to'],
+            'account': options['account'],
+            'category': options['category'],
+        }, user=user)
+        if not form.is_valid():
+            raise CommandError(form.errors.as_text())
+        data = form.cleaned_data
+
+        queryset = export_queryset(
+            user,
+            date_from=data['date_from'],
+            date_to=data['date_to'],
+            account=data['account'],
+            category=data['category'],
+        )
+        chunks = iter_encoded(
+            iter_csv(queryset, chunk_size=options['chunk_size']),
+            compress=options['gzip'],
+        )
+        if options['output']:
+            with open(options['output'], 'wb') as handle:
+                for chunk in chunks:
+                    handle.write(chunk)
+        else:
+            stream = getattr(self.stdout, 'buffer', None)
+            if stream is None:
+                raise CommandError('A saída atual não aceita bytes; use --output.')
+            for chunk in chunks:
+                stream.write(chunk)
+            stream.flush()
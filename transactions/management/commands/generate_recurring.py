@@ -0,0 +1,38 @@
+"""
+Create the transactions of every recurring rule that is due.
+
+Meant to run daily (e.g. from cron). Each scheduled date of a rule is
+created once: running it again on the same day, or after a failure,
+only creates what is still missing.
+
+Usage:
+    python manage.py generate_recurring
+    python manage.py generate_recurring --date 2025-01-31
+"""
+import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from transactions.recurring import generate_recurring
+
+
+class Command(BaseCommand):
+    help = 'Cria as transações recorrentes vencidas de todos os usuários.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--date',
+            help='Data de referência AAAA-MM-DD (padrão: hoje).',
+        )
+
+    def handle(self, *args, **options):
+        today = None
+        if options['date']:
+            try:
+                today = datetime.date.fromisoformat(options['date'])
+            except ValueError:
+                raise CommandError(f'Data inválida: {options["date"]}')
+        rules, created = generate_recurring(today)
+        self.stdout.write(self.style.SUCCESS(
+            f'{created} transação(ões) criada(s) a partir de {rules} recorrência(s).'
+        ))
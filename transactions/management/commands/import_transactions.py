@@ -0,0 +1,75 @@
+"""
+Import transactions from a CSV bank statement.
+
+Usage:
+    python manage.py import_transactions extrato.csv --user email@exemplo.com
+    python manage.py import_transactions extrato.csv --user email@exemplo.com \
+        --account Nubank --batch-size 5000 --encoding latin-1
+"""
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.models import Account
+from transactions.importers import DEFAULT_BATCH_SIZE, import_statement
+
+
+class Command(BaseCommand):
+    help = 'Importa transações de um extrato CSV para um usuário.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Caminho do arquivo CSV.')
+        parser.add_argument('--user', required=True, help='Email do usuário.')
+        parser.add_argument(
+            '--account',
+            help='Nome da conta padrão para linhas sem a coluna "conta".',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=DEFAULT_BATCH_SIZE,
+            help=f'Linhas por lote de inserção (padrão: {DEFAULT_BATCH_SIZE}).',
+        )
+        parser.add_argument('--encoding', default='utf-8-sig')
+        parser.add_argument(
+            '--delimiter',
+            help='Separador de colunas (padrão: detecta ";" ou ",").',
+        )
+
+    def handle(self, *args, **options):
+        User = get_user_model()
+        try:
+            user = User.objects.get(email=options['user'])
+        except User.DoesNotExist:
+            raise CommandError(f'Usuário não encontrado: {options["user"]}')
+
+        account = None
+        if options['account']:
+            account = Account.objects.filter(
+                user=user, name__iexact=options['account'], deletion_jobs__isnull=True,
+            ).first()
+            if account is None:
+                raise CommandError(f'Conta não encontrada: {options["account"]}')
+
+        try:
+            stream = open(options['path'], encoding=options['encoding'], newline='')
+        except OSError as exc:
+            raise CommandError(str(exc))
+        with stream:
+            result = import_statement(
+                user,
+                stream,
+                default_account=account,
+                batch_size=options['batch_size'],
+                delimiter=options['delimiter'],
+            )
+
+        for error in result.errors:
+            self.stderr.write(error)
+        if result.error_count > len(result.errors):
+            self.stderr.write(
+                f'... e mais {result.error_count - len(result.errors)} erro(s).'
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f'{result.created} transação(ões) importada(s), '
+            f'{result.error_count} linha(s) ignorada(s).'
+        ))
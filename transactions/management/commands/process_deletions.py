@@ -0,0 +1,56 @@
+"""
+Run the background deletions of accounts and users.
+
+The delete views only schedule a DeletionJob; this command removes the
+transactions in batches and then the account or user (see
+transactions.deletion). Meant to run periodically (e.g. every minute).
+Failed jobs are retried on the next run and resume where they stopped.
+
+Usage:
+    python manage.py process_deletions
+    python manage.py process_deletions --batch-size 5000 -v 2
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from transactions.deletion import DELETION_BATCH_SIZE, pending_deletion_jobs, run_deletion_job
+from transactions.models import DeletionJob
+
+
+class Command(BaseCommand):
+    help = 'Executa as exclusões de contas e usuários pendentes.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=DELETION_BATCH_SIZE,
+            help=f'Transações excluídas por vez (padrão: {DELETION_BATCH_SIZE}).',
+        )
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('O lote deve ter pelo menos 1 transação.')
+
+        def progress(job):
+            if options['verbosity'] >= 2:
+                self.stdout.write(f'  {job.label}: {job.deleted}/{job.total} transações')
+
+        jobs = list(pending_deletion_jobs())
+        failed = 0
+        for job in jobs:
+            job = run_deletion_job(job, options['batch_size'], progress)
+            if job.status == DeletionJob.DONE:
+                self.stdout.write(
+                    f'{job.get_kind_display()} {job.label}: {job.deleted} transação(ões) excluída(s).'
+                )
+            elif job.status == DeletionJob.FAILED:
+                failed += 1
+                self.stderr.write(f'{job.get_kind_display()} {job.label}: {job.error}')
+        if failed:
+            self.stdout.write(self.style.WARNING(
+                f'{failed} exclusão(ões) falharam e serão retomadas na próxima execução.'
+            ))
+        else:
+            self.stdout.write(self.style.SUCCESS(
+                f'{len(jobs)} exclusão(ões) processada(s).'
+            ))
@@ -0,0 +1,42 @@
+"""
+Regenerate the MonthlySummary rollup from the transactions table.
+
+Usage:
+    python manage.py rebuild_monthly_summaries
+    python manage.py rebuild_monthly_summaries --user email@exemplo.com
+"""
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from transactions.rollups import rebuild_monthly_summaries
+
+# Users rebuilt per DB transaction, to keep each one short.
+USER_CHUNK_SIZE = 500
+
+
+class Command(BaseCommand):
+    help = 'Recalcula do zero a tabela de resumos mensais.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', help='Email do usuário (padrão: todos).')
+
+    def handle(self, *args, **options):
+        User = get_user_model()
+        users = User.objects.order_by('pk')
+        if options['user']:
+            users = users.filter(email=options['user'])
+            if not users.exists():
+                raise CommandError(f'Usuário não encontrado: {options["user"]}')
+
+        written = 0
+        chunk = []
+        for user_id in users.values_list('pk', flat=True).iterator(chunk_size=USER_CHUNK_SIZE):
+            chunk.append(user_id)
+            if len(chunk) >= USER_CHUNK_SIZE:
+                written += rebuild_monthly_summaries(chunk)
+                chunk = []
+        if chunk:
+            written += rebuild_monthly_summaries(chunk)
+        self.stdout.write(self.style.SUCCESS(
+            f'{written} resumo(s) mensal(is) recalculado(s).'
+        ))
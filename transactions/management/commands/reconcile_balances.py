@@ -0,0 +1,165 @@
+"""
+Check (and optionally fix) Account.balance against the transactions.
+
+Users are processed in chunks, each checked with one grouped query
+(on PostgreSQL the user ids are streamed from a server-side cursor).
+Chunks run concurrently on a thread pool: the work is done by the
+database, and the DB driver releases the GIL while it waits, so threads
+parallelize as well as processes would without forking Django. Workers
+only read; with --fix the drift they find is corrected afterwards with
+bulk UPDATEs from the main thread, so there is a single writer (SQLite
+locks the whole database for each write).
+
+Usage:
+    python manage.py reconcile_balances
+    python manage.py reconcile_balances --fix --workers 8
+    python manage.py reconcile_balances --since 2025-03-01
+    python manage.py reconcile_balances --user email@exemplo.com --fix
+"""
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from transactions.reconciliation import find_drift, fix_drift
+
+DEFAULT_CHUNK_SIZE = 500
+
+
+def parse_since(value):
+    """Parse an ISO date or datetime into an aware datetime."""
+    moment = parse_datetime(value)
+    if moment is None:
+        day = parse_date(value)
+        if day is None:
+            raise ValueError(value)
+        moment = datetime.combine(day, time.min)
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment
+
+
+def user_chunks(users, chunk_size):
+    """
+    Yield lists of user pks, ``chunk_size`` at a time.
+
+    On PostgreSQL the pks are streamed from one server-side cursor,
+    which can stay open while other connections write. Elsewhere they
+    are read one keyset page at a time, so no cursor stays open between
+    chunks and the reader never blocks a writer (SQLite locks the whole
+    file).
+    """
+    pks = users.values_list('pk', flat=True)
+    if connections[users.db].vendor == 'postgresql':
+        chunk = []
+        for pk in pks.iterator(chunk_size=chunk_size):
+            chunk.append(pk)
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+        return
+    last_pk = None
+    while True:
+        page = pks if last_pk is None else pks.filter(pk__gt=last_pk)
+        chunk = list(page[:chunk_size])
+        if not chunk:
+            return
+        yield chunk
+        last_pk = chunk[-1]
+
+
+def _find_drift(user_ids, since):
+    try:
+        return find_drift(user_ids, since=since)
+    finally:
+        # Worker threads open their own connections; don't leak them.
+        connections.close_all()
+
+
+class Command(BaseCommand):
+    help = 'Confere o saldo das contas com a soma das transações.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', help='Email do usuário (padrão: todos).')
+        parser.add_argument(
+            '--since',
+            help='Só contas alteradas desde esta data (AAAA-MM-DD ou ISO 8601).',
+        )
+        parser.add_argument(
+            '--fix',
+            action='store_true',
+            help='Corrige os saldos divergentes.',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=min(4, os.cpu_count() or 1),
+            help='Lotes de usuários processados em paralelo.',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=DEFAULT_CHUNK_SIZE,
+            help='Usuários por consulta.',
+        )
+
+    def handle(self, *args, **options):
+        User = get_user_model()
+        users = User.objects.order_by('pk')
+        if options['user']:
+            users = users.filter(email=options['user'])
+            if not users.exists():
+                raise CommandError(f'Usuário não encontrado: {options["user"]}')
+
+        since = None
+        if options['since']:
+            try:
+                since = parse_since(options['since'])
+            except ValueError:
+                raise CommandError(f'Data inválida: {options["since"]}')
+
+        chunk_size = max(1, options['chunk_size'])
+        workers = max(1, options['workers'])
+        chunks = user_chunks(users, chunk_size)
+
+        drifts = []
+        if workers == 1:
+            for chunk in chunks:
+                drifts.extend(find_drift(chunk, since=since))
+        else:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                # Keep only a few chunks in flight so the user ids are
+                # never all in memory.
+                pending = deque()
+                for chunk in chunks:
+                    pending.append(executor.submit(_find_drift, chunk, since))
+                    if len(pending) >= workers * 2:
+                        drifts.extend(pending.popleft().result())
+                while pending:
+                    drifts.extend(pending.popleft().result())
+        if options['fix'] and drifts:
+            fix_drift(drifts)
+
+        for drift in sorted(drifts, key=lambda d: d.account_id):
+            self.stdout.write(
+                f'Conta {drift.account_id} ({drift.name}): saldo {drift.balance}, '
+                f'esperado {drift.expected}, diferença {drift.drift}'
+            )
+        if not drifts:
+            self.stdout.write(self.style.SUCCESS('Nenhuma divergência encontrada.'))
+        elif options['fix']:
+            self.stdout.write(self.style.SUCCESS(
+                f'{len(drifts)} saldo(s) corrigido(s).'
+            ))
+        else:
+            self.stdout.write(self.style.WARNING(
+                f'{len(drifts)} saldo(s) divergente(s). Use --fix para corrigir.'
+            ))
@@ -0,0 +1,46 @@
+"""
+Regenerate the month-end account balance snapshots.
+
+Meant to run periodically (e.g. on the first day of each month) so the
+month that just ended gets its snapshots; back-dated writes keep the
+existing ones up to date in between.
+
+Usage:
+    python manage.py snapshot_balances
+    python manage.py snapshot_balances --user email@exemplo.com
+"""
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from transactions.snapshots import rebuild_balance_snapshots
+
+# Users rebuilt per DB transaction, to keep each one short.
+USER_CHUNK_SIZE = 500
+
+
+class Command(BaseCommand):
+    help = 'Recalcula os saldos de fim de mês de cada conta.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', help='Email do usuário (padrão: todos).')
+
+    def handle(self, *args, **options):
+        User = get_user_model()
+        users = User.objects.order_by('pk')
+        if options['user']:
+            users = users.filter(email=options['user'])
+            if not users.exists():
+                raise CommandError(f'Usuário não encontrado: {options["user"]}')
+
+        written = 0
+        chunk = []
+        for user_id in users.values_list('pk', flat=True).iterator(chunk_size=USER_CHUNK_SIZE):
+            chunk.append(user_id)
+            if len(chunk) >= USER_CHUNK_SIZE:
+                written += rebuild_balance_snapshots(chunk)
+                chunk = []
+        if chunk:
+            written += rebuild_balance_snapshots(chunk)
+        self.stdout.write(self.style.SUCCESS(
+            f'{written} saldo(s) de fim de mês gravado(s).'
+        ))
@@ -0,0 +1,25 @@
+# Generated by Django 6.0.1 on 2026-10-18 06:17
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0002_account_account_user_active_name_idx'),
+        ('categories', '0002_category_category_user_type_name_idx'),
+        ('transactions', '0002_transaction_transaction_user_date_idx_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='transaction',
+            name='transaction_user_date_idx',
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['user', '-date', '-created_at', '-id'], name='transaction_user_date_idx'),
+        ),
+    ]
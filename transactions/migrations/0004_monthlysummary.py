@@ -0,0 +1,57 @@
+# Generated by Django 6.0.1 on 2026-10-18 06:21
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncMonth
+
+
+def build_monthly_summaries(apps, schema_editor):
+    """Fill the rollup from the transactions that already exist."""
+    Transaction = apps.get_model('transactions', 'Transaction')
+    MonthlySummary = apps.get_model('transactions', 'MonthlySummary')
+    rows = (
+        Transaction.objects.annotate(year_month=TruncMonth('date'))
+        .values('user_id', 'account_id', 'category_id', 'transaction_type', 'year_month')
+        .annotate(total=Sum('amount'), count=Count('id'))
+        .order_by()
+    )
+    MonthlySummary.objects.bulk_create(
+        (MonthlySummary(**row) for row in rows.iterator(chunk_size=1000)),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0002_account_account_user_active_name_idx'),
+        ('categories', '0002_category_category_user_type_name_idx'),
+        ('transactions', '0003_transaction_list_keyset_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MonthlySummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('transaction_type', models.CharField(choices=[('income', 'Receita'), ('expense', 'Despesa')], max_length=10, verbose_name='tipo')),
+                ('year_month', models.DateField(help_text='Primeiro dia do mês.', verbose_name='mês')),
+                ('total', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='total')),
+                ('count', models.IntegerField(default=0, verbose_name='quantidade')),
+                ('account', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='monthly_summaries', to='accounts.account', verbose_name='conta')),
+                ('category', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='monthly_summaries', to='categories.category', verbose_name='categoria')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='monthly_summaries', to=settings.AUTH_USER_MODEL, verbose_name='usuário')),
+            ],
+            options={
+                'verbose_name': 'resumo mensal',
+                'verbose_name_plural': 'resumos mensais',
+                'ordering': ['-year_month'],
+                'indexes': [models.Index(fields=['user', 'year_month', 'transaction_type'], name='monthly_summary_user_month_idx')],
+                'constraints': [models.UniqueConstraint(condition=models.Q(('category__isnull', False)), fields=('user', 'account', 'category', 'transaction_type', 'year_month'), name='monthly_summary_unique_key'), models.UniqueConstraint(condition=models.Q(('category__isnull', True)), fields=('user', 'account', 'transaction_type', 'year_month'), name='monthly_summary_unique_nocat')],
+            },
+        ),
+        migrations.RunPython(build_monthly_summaries, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 6.0.1 on 2026-10-18 06:28
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0003_account_opening_balance'),
+        ('categories', '0002_category_category_user_type_name_idx'),
+        ('transactions', '0004_monthlysummary'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AccountBalanceSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month_end', models.DateField(help_text='Último dia do mês.', verbose_name='fim do mês')),
+                ('balance', models.DecimalField(decimal_places=2, max_digits=14, verbose_name='saldo')),
+            ],
+            options={
+                'verbose_name': 'saldo mensal da conta',
+                'verbose_name_plural': 'saldos mensais das contas',
+                'ordering': ['-month_end'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['account', 'date', 'transaction_type', 'amount'], name='transaction_account_date_idx'),
+        ),
+        migrations.AddField(
+            model_name='accountbalancesnapshot',
+            name='account',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='balance_snapshots', to='accounts.account', verbose_name='conta'),
+        ),
+        migrations.AddConstraint(
+            model_name='accountbalancesnapshot',
+            constraint=models.UniqueConstraint(fields=('account', 'month_end'), name='balance_snapshot_unique_month'),
+        ),
+    ]
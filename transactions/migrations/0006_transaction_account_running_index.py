@@ -0,0 +1,25 @@
+# Generated by Django 6.0.1 on 2026-10-18 06:30
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0003_account_opening_balance'),
+        ('categories', '0002_category_category_user_type_name_idx'),
+        ('transactions', '0005_accountbalancesnapshot'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='transaction',
+            name='transaction_account_date_idx',
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['account', 'date', 'created_at', 'id'], name='transaction_account_date_idx'),
+        ),
+    ]
@@ -0,0 +1,101 @@
+# Generated by Django 6.0.1 on 2026-10-18 06:37
+
+import django.db.models.deletion
+import transactions.models
+from django.db import migrations, models
+
+# Frozen copy of the search DDL as of this migration; later changes to
+# transactions.search must not change what this migration does.
+FTS_TABLE = 'transactions_transaction_fts'
+SEARCH_CONFIG = 'portuguese'
+GIN_INDEX_NAME = 'transaction_description_gin_idx'
+
+SQLITE_CREATE = [
+    f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5("
+    "user_id, description, "
+    "content='transactions_transaction', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2', prefix='2 3 4')",
+    # Rank by the description only; the user id column scopes queries.
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rank) VALUES ('rank', 'bm25(0.0, 1.0)')",
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai
+    AFTER INSERT ON transactions_transaction BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, user_id, description)
+        VALUES (new.id, new.user_id, new.description);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad
+    AFTER DELETE ON transactions_transaction BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, user_id, description)
+        VALUES ('delete', old.id, old.user_id, old.description);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au
+    AFTER UPDATE OF user_id, description ON transactions_transaction BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, user_id, description)
+        VALUES ('delete', old.id, old.user_id, old.description);
+        INSERT INTO {FTS_TABLE}(rowid, user_id, description)
+        VALUES (new.id, new.user_id, new.description);
+    END
+    """,
+    # Index the transactions that already exist.
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')",
+]
+
+SQLITE_DROP = [
+    f'DROP TRIGGER IF EXISTS {FTS_TABLE}_ai',
+    f'DROP TRIGGER IF EXISTS {FTS_TABLE}_ad',
+    f'DROP TRIGGER IF EXISTS {FTS_TABLE}_au',
+    f'DROP TABLE IF EXISTS {FTS_TABLE}',
+]
+
+
+def create_search_index(apps, schema_editor):
+    """Create the FTS5 table (SQLite) or the tsvector GIN index (PostgreSQL)."""
+    connection = schema_editor.connection
+    if connection.vendor == 'postgresql':
+        from django.contrib.postgres.indexes import GinIndex
+        from django.contrib.postgres.search import SearchVector
+
+        Transaction = apps.get_model('transactions', 'Transaction')
+        schema_editor.add_index(Transaction, GinIndex(
+            SearchVector('description', config=SEARCH_CONFIG),
+            name=GIN_INDEX_NAME,
+        ))
+    elif connection.vendor == 'sqlite':
+        for sql in SQLITE_CREATE:
+            schema_editor.execute(sql, params=None)
+
+
+def drop_search_index(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor == 'postgresql':
+        schema_editor.execute(f'DROP INDEX IF EXISTS {GIN_INDEX_NAME}')
+    elif connection.vendor == 'sqlite':
+        for sql in SQLITE_DROP:
+            schema_editor.execute(sql, params=None)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('transactions', '0007_transaction_list_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TransactionSearchEntry',
+            fields=[
+                ('transaction', models.OneToOneField(db_column='rowid', db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='search_entry', serialize=False, to='transactions.transaction')),
+                ('document', transactions.models.SearchDocumentField(db_column='transactions_transaction_fts')),
+                ('rank', models.FloatField(db_column='rank')),
+            ],
+            options={
+                'db_table': 'transactions_transaction_fts',
+                'managed': False,
+            },
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
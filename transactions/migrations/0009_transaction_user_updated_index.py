@@ -0,0 +1,21 @@
+# Generated by Django 6.0.1 on 2026-10-18 06:49
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0004_account_user_name_idx'),
+        ('categories', '0002_category_category_user_type_name_idx'),
+        ('transactions', '0008_transaction_search'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['user', 'updated_at'], name='transaction_user_updated_idx'),
+        ),
+    ]
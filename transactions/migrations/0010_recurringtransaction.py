@@ -0,0 +1,63 @@
+# Generated by Django 6.0.1 on 2026-10-18 06:54
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0004_account_user_name_idx'),
+        ('categories', '0002_category_category_user_type_name_idx'),
+        ('transactions', '0009_transaction_user_updated_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='transaction',
+            name='occurrence_date',
+            field=models.DateField(blank=True, editable=False, null=True, verbose_name='data prevista'),
+        ),
+        migrations.CreateModel(
+            name='RecurringTransaction',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('transaction_type', models.CharField(choices=[('income', 'Receita'), ('expense', 'Despesa')], max_length=10, verbose_name='tipo')),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=12, verbose_name='valor')),
+                ('description', models.CharField(blank=True, max_length=255, verbose_name='descrição')),
+                ('frequency', models.CharField(choices=[('monthly', 'Mensal'), ('weekly', 'Semanal'), ('daily', 'Diária')], default='monthly', max_length=10, verbose_name='frequência')),
+                ('interval', models.PositiveSmallIntegerField(default=1, help_text='Número de meses, semanas ou dias entre as ocorrências.', verbose_name='a cada')),
+                ('day_of_month', models.PositiveSmallIntegerField(blank=True, help_text='Recorrência mensal: dia do vencimento (padrão: o dia da data inicial).', null=True, verbose_name='dia do mês')),
+                ('business_day', models.CharField(choices=[('none', 'Não ajustar'), ('following', 'Próximo dia útil'), ('preceding', 'Dia útil anterior')], default='none', max_length=10, verbose_name='fins de semana')),
+                ('start_date', models.DateField(verbose_name='data inicial')),
+                ('end_date', models.DateField(blank=True, null=True, verbose_name='data final')),
+                ('next_occurrence', models.DateField(blank=True, editable=False, null=True, verbose_name='próxima ocorrência')),
+                ('is_active', models.BooleanField(default=True, verbose_name='ativa')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='criado em')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='atualizado em')),
+                ('account', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='recurring_transactions', to='accounts.account', verbose_name='conta')),
+                ('category', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='recurring_transactions', to='categories.category', verbose_name='categoria')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='recurring_transactions', to=settings.AUTH_USER_MODEL, verbose_name='usuário')),
+            ],
+            options={
+                'verbose_name': 'transação recorrente',
+                'verbose_name_plural': 'transações recorrentes',
+                'ordering': ['next_occurrence', 'id'],
+            },
+        ),
+        migrations.AddField(
+            model_name='transaction',
+            name='recurring_rule',
+            field=models.ForeignKey(blank=True, db_index=False, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='transactions', to='transactions.recurringtransaction', verbose_name='recorrência'),
+        ),
+        migrations.AddConstraint(
+            model_name='transaction',
+            constraint=models.UniqueConstraint(condition=models.Q(('recurring_rule__isnull', False)), fields=('recurring_rule', 'occurrence_date'), name='transaction_recurring_occurrence'),
+        ),
+        migrations.AddIndex(
+            model_name='recurringtransaction',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['next_occurrence'], name='recurring_due_idx'),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 6.0.1 on 2026-10-18 07:27
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0004_account_user_name_idx'),
+        ('transactions', '0011_transfer'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DeletionJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('account', 'Conta'), ('user', 'Usuário')], max_length=10, verbose_name='tipo')),
+                ('label', models.CharField(max_length=255, verbose_name='descrição')),
+                ('status', models.CharField(choices=[('pending', 'Aguardando'), ('running', 'Em andamento'), ('done', 'Concluída'), ('failed', 'Falhou')], default='pending', max_length=10, verbose_name='situação')),
+                ('total', models.PositiveIntegerField(default=0, verbose_name='transações')),
+                ('deleted', models.PositiveIntegerField(default=0, verbose_name='transações excluídas')),
+                ('error', models.TextField(blank=True, verbose_name='erro')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='criado em')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='concluído em')),
+                ('account', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='deletion_jobs', to='accounts.account', verbose_name='conta')),
+                ('user', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='deletion_jobs', to=settings.AUTH_USER_MODEL, verbose_name='usuário')),
+            ],
+            options={
+                'verbose_name': 'exclusão em segundo plano',
+                'verbose_name_plural': 'exclusões em segundo plano',
+                'ordering': ['created_at'],
+                'indexes': [models.Index(fields=['status', 'created_at'], name='deletion_job_status_idx')],
+            },
+        ),
+    ]
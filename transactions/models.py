@@ -2,7 +2,10 @@
 Transaction models for the Finanpy project.
 
 Defines the Transaction model representing financial movements
-(income and expenses) linked to accounts and categories.
+(income and expenses) linked to accounts and categories, and the
+Transfer between two accounts, booked as a pair of transactions, and
+the DeletionJob that removes an account or user with a long history in
+the background.
 """
 from django.conf import settings
 from django.db import models
@@ -28,12 +31,14 @@ class Transaction(models.Model):
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
         related_name='transactions',
+        db_index=False,
         verbose_name='usuário',
     )
     account = models.ForeignKey(
         'accounts.Account',
         on_delete=models.CASCADE,
         related_name='transactions',
+        db_index=False,
         verbose_name='conta',
     )
     category = models.ForeignKey(
@@ -42,6 +47,7 @@ class Transaction(models.Model):
         null=True,
         blank=True,
         related_name='transactions',
+        db_index=False,
         verbose_name='categoria',
     )
     transaction_type = models.CharField(
@@ -70,13 +76,582 @@ class Transaction(models.Model):
         auto_now=True,
         verbose_name='atualizado em',
     )
+    # Set on the transactions generated from a RecurringTransaction:
+    # the rule and the scheduled date (before any business-day shift)
+    # are the idempotency key of the generation.
+    recurring_rule = models.ForeignKey(
+        'transactions.RecurringTransaction',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='transactions',
+        db_index=False,
+        editable=False,
+        verbose_name='recorrência',
+    )
+    occurrence_date = models.DateField(
+        null=True,
+        blank=True,
+        editable=False,
+        verbose_name='data prevista',
+    )
+
+    # Set on the two legs of a Transfer: the outgoing leg is an expense
+    # of the source account and the incoming leg an income of the
+    # destination. Legs move balances but are not income or expenses,
+    # so they stay out of the MonthlySummary rollup and the reports.
+    transfer = models.ForeignKey(
+        'transactions.Transfer',
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='legs',
+        db_index=False,
+        editable=False,
+        verbose_name='transferência',
+    )
 
     class Meta:
         verbose_name = 'transação'
         verbose_name_plural = 'transações'
         ordering = ['-date', '-created_at']
+        # The list can be filtered by account, category or type and
+        # sorted by date or amount (see transactions.filters); each
+        # equality filter has one index per sort so no combination needs
+        # a scan-then-sort. Every index ends in the keyset tiebreaker.
+        # The composite indexes also cover the foreign key lookups, so
+        # the FKs above skip their single-column indexes.
+        indexes = [
+            # Transaction list (keyset pagination) and "recent
+            # transactions" on the dashboard; id is the final tiebreaker.
+            models.Index(
+                fields=['user', '-date', '-created_at', '-id'],
+                name='transaction_user_date_idx',
+            ),
+            models.Index(
+                fields=['user', 'amount', 'id'],
+                name='transaction_user_amount_idx',
+            ),
+            # Income/expense by date (list filter and date-range sums).
+            models.Index(
+                fields=['user', 'transaction_type', '-date', '-created_at', '-id'],
+                name='transaction_user_type_date_idx',
+            ),
+            models.Index(
+                fields=['user', 'transaction_type', 'amount', 'id'],
+                name='transaction_type_amount_idx',
+            ),
+            # One account in chronological order: range sums after a
+            # balance snapshot and the running balance of the list.
+            models.Index(
+                fields=['account', 'date', 'created_at', 'id'],
+                name='transaction_account_date_idx',
+            ),
+            models.Index(
+                fields=['account', 'amount', 'id'],
+                name='transaction_account_amount_idx',
+            ),
+            models.Index(
+                fields=['category', 'date', 'created_at', 'id'],
+                name='transaction_category_date_idx',
+            ),
+            models.Index(
+                fields=['category', 'amount', 'id'],
+                name='transaction_cat_amount_idx',
+            ),
+            # ETag of the API (see api.etags): the newest row is an index
+            # seek and the row count a scan of this narrow index.
+            models.Index(
+                fields=['user', 'updated_at'],
+                name='transaction_user_updated_idx',
+            ),
+            # The legs of a transfer. Partial, so the planner never picks
+            # it for the "not a transfer" filters of the reports.
+            models.Index(
+                fields=['transfer'],
+                condition=models.Q(transfer__isnull=False),
+                name='transaction_transfer_idx',
+            ),
+        ]
+        constraints = [
+            # Also serves the rule's foreign key.
+            models.UniqueConstraint(
+                fields=['recurring_rule', 'occurrence_date'],
+                condition=models.Q(recurring_rule__isnull=False),
+                name='transaction_recurring_occurrence',
+            ),
+        ]
 
     def __str__(self):
         if self.description:
             return self.description
         return f'{self.get_transaction_type_display()} - R$ {self.amount}'
+
+
+class Transfer(models.Model):
+    """
+    Money moved between two accounts of a user.
+
+    Booked as two Transaction legs (see ``Transaction.transfer``) created,
+    and deleted, together with the transfer in one DB transaction (see
+    transactions.transfers). Deleting an account keeps the transfer and
+    the leg in the other account; the deleted side becomes None.
+    """
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='transfers',
+        verbose_name='usuário',
+    )
+    from_account = models.ForeignKey(
+        'accounts.Account',
+        on_delete=models.SET_NULL,
+        null=True,
+        related_name='transfers_out',
+        verbose_name='conta de origem',
+    )
+    to_account = models.ForeignKey(
+        'accounts.Account',
+        on_delete=models.SET_NULL,
+        null=True,
+        related_name='transfers_in',
+        verbose_name='conta de destino',
+    )
+    amount = models.DecimalField(
+        max_digits=12,
+        decimal_places=2,
+        verbose_name='valor',
+    )
+    date = models.DateField(
+        verbose_name='data',
+    )
+    description = models.CharField(
+        max_length=255,
+        blank=True,
+        verbose_name='descrição',
+    )
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='criado em',
+    )
+
+    class Meta:
+        verbose_name = 'transferência'
+        verbose_name_plural = 'transferências'
+        ordering = ['-date', '-created_at']
+
+    def __str__(self):
+        if self.description:
+            return self.description
+        return f'Transferência - R$ {self.amount}'
+
+
+class RecurringTransaction(models.Model):
+    """
+    A rule that creates the same transaction on a schedule.
+
+    The schedule is every ``interval`` months (on ``day_of_month``,
+    clamped to the last day of shorter months), weeks (on the weekday
+    of ``start_date``) or days, from ``start_date`` until ``end_date``.
+    Occurrences falling on a weekend can be moved to the next or the
+    previous weekday. ``next_occurrence`` is the next scheduled date
+    still to be created (None once the rule has ended); ``manage.py
+    generate_recurring`` creates the due transactions (see
+    transactions.recurring).
+    """
+
+    FREQUENCIES = [
+        ('monthly', 'Mensal'),
+        ('weekly', 'Semanal'),
+        ('daily', 'Diária'),
+    ]
+
+    BUSINESS_DAY_RULES = [
+        ('none', 'Não ajustar'),
+        ('following', 'Próximo dia útil'),
+        ('preceding', 'Dia útil anterior'),
+    ]
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='recurring_transactions',
+        verbose_name='usuário',
+    )
+    account = models.ForeignKey(
+        'accounts.Account',
+        on_delete=models.CASCADE,
+        related_name='recurring_transactions',
+        verbose_name='conta',
+    )
+    category = models.ForeignKey(
+        'categories.Category',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='recurring_transactions',
+        verbose_name='categoria',
+    )
+    transaction_type = models.CharField(
+        max_length=10,
+        choices=Transaction.TRANSACTION_TYPES,
+        verbose_name='tipo',
+    )
+    amount = models.DecimalField(
+        max_digits=12,
+        decimal_places=2,
+        verbose_name='valor',
+    )
+    description = models.CharField(
+        max_length=255,
+        blank=True,
+        verbose_name='descrição',
+    )
+    frequency = models.CharField(
+        max_length=10,
+        choices=FREQUENCIES,
+        default='monthly',
+        verbose_name='frequência',
+    )
+    interval = models.PositiveSmallIntegerField(
+        default=1,
+        verbose_name='a cada',
+        help_text='Número de meses, semanas ou dias entre as ocorrências.',
+    )
+    day_of_month = models.PositiveSmallIntegerField(
+        null=True,
+        blank=True,
+        verbose_name='dia do mês',
+        help_text='Recorrência mensal: dia do vencimento (padrão: o dia da data inicial).',
+    )
+    business_day = models.CharField(
+        max_length=10,
+        choices=BUSINESS_DAY_RULES,
+        default='none',
+        verbose_name='fins de semana',
+    )
+    start_date = models.DateField(
+        verbose_name='data inicial',
+    )
+    end_date = models.DateField(
+        null=True,
+        blank=True,
+        verbose_name='data final',
+    )
+    next_occurrence = models.DateField(
+        null=True,
+        blank=True,
+        editable=False,
+        verbose_name='próxima ocorrência',
+    )
+    is_active = models.BooleanField(
+        default=True,
+        verbose_name='ativa',
+    )
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='criado em',
+    )
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        verbose_name='atualizado em',
+    )
+
+    class Meta:
+        verbose_name = 'transação recorrente'
+        verbose_name_plural = 'transações recorrentes'
+        ordering = ['next_occurrence', 'id']
+        indexes = [
+            # generate_recurring: the active rules that are due.
+            models.Index(
+                fields=['next_occurrence'],
+                condition=models.Q(is_active=True),
+                name='recurring_due_idx',
+            ),
+        ]
+
+    def __str__(self):
+        if self.description:
+            return self.description
+        return f'{self.get_transaction_type_display()} - R$ {self.amount}'
+
+
+class MonthlySummary(models.Model):
+    """
+    Monthly rollup of transactions per user/account/category/type.
+
+    Holds the sum and count of the transactions of one month, keyed by
+    (user, account, category, transaction_type, year_month). Kept up to
+    date inside the same DB transaction as every transaction write (see
+    transactions.rollups), so the dashboard and reports read a handful
+    of rows instead of scanning transactions. Rebuild with
+    ``manage.py rebuild_monthly_summaries``.
+    """
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='monthly_summaries',
+        verbose_name='usuário',
+    )
+    account = models.ForeignKey(
+        'accounts.Account',
+        on_delete=models.CASCADE,
+        related_name='monthly_summaries',
+        verbose_name='conta',
+    )
+    # Rows of a category are folded into the uncategorized row before
+    # the category is deleted (see CategoryDeleteView).
+    category = models.ForeignKey(
+        'categories.Category',
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='monthly_summaries',
+        verbose_name='categoria',
+    )
+    transaction_type = models.CharField(
+        max_length=10,
+        choices=Transaction.TRANSACTION_TYPES,
+        verbose_name='tipo',
+    )
+    year_month = models.DateField(
+        verbose_name='mês',
+        help_text='Primeiro dia do mês.',
+    )
+    total = models.DecimalField(
+        max_digits=14,
+        decimal_places=2,
+        default=0,
+        verbose_name='total',
+    )
+    count = models.IntegerField(
+        default=0,
+        verbose_name='quantidade',
+    )
+
+    class Meta:
+        verbose_name = 'resumo mensal'
+        verbose_name_plural = 'resumos mensais'
+        ordering = ['-year_month']
+        constraints = [
+            # NULLs are distinct in unique indexes, so uncategorized rows
+            # need their own partial constraint.
+            models.UniqueConstraint(
+                fields=['user', 'account', 'category', 'transaction_type', 'year_month'],
+                condition=models.Q(category__isnull=False),
+                name='monthly_summary_unique_key',
+            ),
+            models.UniqueConstraint(
+                fields=['user', 'account', 'transaction_type', 'year_month'],
+                condition=models.Q(category__isnull=True),
+                name='monthly_summary_unique_nocat',
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=['user', 'year_month', 'transaction_type'],
+                name='monthly_summary_user_month_idx',
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.year_month:%m/%Y} - {self.get_transaction_type_display()} - R$ {self.total}'
+
+
+class AccountBalanceSnapshot(models.Model):
+    """
+    Closing balance of an account at the end of a month.
+
+    Lets ``balance_as_of`` start from the nearest month end instead of
+    summing the account's whole history. Written by ``manage.py
+    snapshot_balances`` for completed months and patched by every
+    transaction write dated on or before a snapshot (see
+    transactions.snapshots).
+    """
+
+    account = models.ForeignKey(
+        'accounts.Account',
+        on_delete=models.CASCADE,
+        related_name='balance_snapshots',
+        verbose_name='conta',
+    )
+    month_end = models.DateField(
+        verbose_name='fim do mês',
+        help_text='Último dia do mês.',
+    )
+    balance = models.DecimalField(
+        max_digits=14,
+        decimal_places=2,
+        verbose_name='saldo',
+    )
+
+    class Meta:
+        verbose_name = 'saldo mensal da conta'
+        verbose_name_plural = 'saldos mensais das contas'
+        ordering = ['-month_end']
+        constraints = [
+            # Also the index for "latest snapshot on or before a date".
+            models.UniqueConstraint(
+                fields=['account', 'month_end'],
+                name='balance_snapshot_unique_month',
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.account} - {self.month_end:%d/%m/%Y} - R$ {self.balance}'
+
+
+class DeletionJob(models.Model):
+    """
+    Background deletion of an account or a user with all its transactions.
+
+    Deleting a row with a long history in one statement would hold the
+    database (SQLite: the whole file) for as long as the cascade takes.
+    The delete views only mark the row (inactive, with a pending job)
+    and return; ``manage.py process_deletions`` then removes the
+    transactions in bounded batches, keeping the balances and rollups
+    right after each one, and finally deletes the row itself (see
+    transactions.deletion). ``deleted`` out of ``total`` transactions is
+    the progress shown to the user.
+    """
+
+    ACCOUNT = 'account'
+    USER = 'user'
+    KINDS = [
+        (ACCOUNT, 'Conta'),
+        (USER, 'Usuário'),
+    ]
+
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUSES = [
+        (PENDING, 'Aguardando'),
+        (RUNNING, 'Em andamento'),
+        (DONE, 'Concluída'),
+        (FAILED, 'Falhou'),
+    ]
+
+    kind = models.CharField(
+        max_length=10,
+        choices=KINDS,
+        verbose_name='tipo',
+    )
+    # Both become None when the job deletes the row; ``label`` keeps
+    # what it was.
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        related_name='deletion_jobs',
+        verbose_name='usuário',
+    )
+    account = models.ForeignKey(
+        'accounts.Account',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='deletion_jobs',
+        verbose_name='conta',
+    )
+    label = models.CharField(
+        max_length=255,
+        verbose_name='descrição',
+    )
+    status = models.CharField(
+        max_length=10,
+        choices=STATUSES,
+        default=PENDING,
+        verbose_name='situação',
+    )
+    total = models.PositiveIntegerField(
+        default=0,
+        verbose_name='transações',
+    )
+    deleted = models.PositiveIntegerField(
+        default=0,
+        verbose_name='transações excluídas',
+    )
+    error = models.TextField(
+        blank=True,
+        verbose_name='erro',
+    )
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='criado em',
+    )
+    finished_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='concluído em',
+    )
+
+    class Meta:
+        verbose_name = 'exclusão em segundo plano'
+        verbose_name_plural = 'exclusões em segundo plano'
+        ordering = ['created_at']
+        indexes = [
+            # The worker's queue: unfinished jobs, oldest first.
+            models.Index(
+                fields=['status', 'created_at'],
+                name='deletion_job_status_idx',
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.get_kind_display()} {self.label} - {self.get_status_display()}'
+
+    @property
+    def progress(self):
+        """Percentage of the transactions deleted so far."""
+        if self.status == self.DONE:
+            return 100
+        if not self.total:
+            return 0
+        return min(100, self.deleted * 100 // self.total)
+
+
+class SearchDocumentField(models.TextField):
+    """The hidden column of an FTS5 table, which accepts MATCH queries."""
+
+
+@SearchDocumentField.register_lookup
+class Match(models.Lookup):
+    """``document__match=query`` renders an FTS5 ``MATCH``."""
+
+    lookup_name = 'match'
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f'{lhs} MATCH {rhs}', (*lhs_params, *rhs_params)
+
+
+class TransactionSearchEntry(models.Model):
+    """
+    Row of the SQLite FTS5 index over transaction descriptions.
+
+    Not managed by Django: the virtual table and the triggers that keep
+    it in sync with every write to transactions_transaction (including
+    bulk_create, queryset updates and cascades) are created by
+    transactions.search. Only used for joins, through
+    ``Transaction.objects.filter(search_entry__document__match=...)``.
+    """
+
+    transaction = models.OneToOneField(
+        Transaction,
+        on_delete=models.DO_NOTHING,
+        primary_key=True,
+        db_column='rowid',
+        db_constraint=False,
+        related_name='search_entry',
+    )
+    document = SearchDocumentField(db_column='transactions_transaction_fts')
+    rank = models.FloatField(db_column='rank')
+
+    class Meta:
+        managed = False
+        db_table = 'transactions_transaction_fts'
@@ -0,0 +1,113 @@
+"""
+Balance reconciliation for the Finanpy project.
+
+Account.balance is a denormalized value: it must always equal the
+account's opening_balance plus the net of its transactions. Writes
+that bypass the transaction services (admin edits, shell fixes, raw
+SQL) make it drift silently. This module recomputes the expected
+balance of many accounts with a single grouped query per chunk of
+users and corrects any drift with bulk UPDATEs.
+
+The stored balance and the transaction sums are read in the same
+statement, so the drift they reveal is unaffected by writers that go
+through the services concurrently (those change both sides at once).
+Fixes are therefore applied as relative updates (``balance = balance
+- drift``) and never overwrite a concurrent change.
+"""
+from collections import namedtuple
+from decimal import Decimal
+
+from django.db import transaction as db_transaction
+from django.db.models import Case, DecimalField, F, Q, Sum, Value, When
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from accounts.models import Account
+from core.cache import invalidate_user_data
+from transactions.models import Transaction
+
+# Accounts corrected per UPDATE statement (keeps the CASE and the
+# parameter list well under the database limits).
+FIX_BATCH_SIZE = 500
+
+CENT = Decimal('0.01')
+
+
+class BalanceDrift(namedtuple(
+    'BalanceDrift',
+    ['account_id', 'user_id', 'name', 'balance', 'expected'],
+)):
+    """An account whose stored balance differs from the expected one."""
+
+    __slots__ = ()
+
+    @property
+    def drift(self):
+        return self.balance - self.expected
+
+
+def accounts_to_check(user_ids, since=None):
+    """
+    Return the accounts of ``user_ids`` to reconcile.
+
+    With ``since``, only accounts changed at or after that moment, or
+    holding a transaction changed since then, are returned.
+    """
+    accounts = Account.objects.filter(user_id__in=user_ids)
+    if since is not None:
+        recent = Transaction.objects.filter(
+            user_id__in=user_ids,
+            updated_at__gte=since,
+        ).values('account_id')
+        accounts = accounts.filter(Q(updated_at__gte=since) | Q(pk__in=recent))
+    return accounts
+
+
+def find_drift(user_ids, since=None):
+    """
+    Return a BalanceDrift for every account whose balance is wrong.
+
+    One grouped ``SUM(CASE ...)`` query covers all the accounts of the
+    given users.
+    """
+    net = Coalesce(
+        Sum(Case(
+            When(transactions__transaction_type='income', then=F('transactions__amount')),
+            default=-F('transactions__amount'),
+        )),
+        Value(Decimal('0')),
+        output_field=DecimalField(max_digits=14, decimal_places=2),
+    )
+    rows = (
+        accounts_to_check(user_ids, since)
+        .annotate(net=net)
+        .values_list('pk', 'user_id', 'name', 'balance', 'opening_balance', 'net')
+        .order_by()
+    )
+    drifts = []
+    for account_id, user_id, name, balance, opening_balance, net in rows:
+        # SQLite sums decimals as floats; round back to cents.
+        expected = (opening_balance + net).quantize(CENT)
+        if balance != expected:
+            drifts.append(BalanceDrift(account_id, user_id, name, balance, expected))
+    return drifts
+
+
+def fix_drift(drifts):
+    """Correct the balances in ``drifts`` with relative bulk UPDATEs."""
+    drifts = sorted(drifts, key=lambda d: d.account_id)
+    now = timezone.now()
+    with db_transaction.atomic():
+        for start in range(0, len(drifts), FIX_BATCH_SIZE):
+            batch = drifts[start:start + FIX_BATCH_SIZE]
+            correction = Case(
+                *[When(pk=d.account_id, then=Value(-d.drift)) for d in batch],
+                output_field=DecimalField(max_digits=12, decimal_places=2),
+            )
+            Account.objects.filter(pk__in=[d.account_id for d in batch]).update(
+                balance=F('balance') + correction,
+                updated_at=now,
+            )
+        for user_id in {d.user_id for d in drifts}:
+            invalidate_user_data(user_id)
+    return len(drifts)
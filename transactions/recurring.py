@@ -0,0 +1,180 @@
+"""
+Generation of recurring transactions for the Finanpy project.
+
+Each RecurringTransaction keeps the next scheduled date still to be
+created (``next_occurrence``), so finding the due rules is one range
+read of a partial index over the active rules. ``generate_recurring``
+walks them in batches; each batch is one DB transaction that
+bulk-creates the due transactions, moves the rules' next dates forward
+and applies the balance, rollup and snapshot changes of the whole
+batch at once, aggregated per account and per rollup row (see
+transactions.services.apply_transaction_changes).
+
+A generated transaction records its rule and scheduled date, which are
+unique together, so a rerun (or a concurrent run) can never create an
+occurrence twice: the due rules are locked and re-read inside the
+batch, and an occurrence already created is a constraint violation
+rather than a duplicate.
+"""
+import calendar
+import datetime
+from collections import defaultdict
+
+from django.db import transaction as db_transaction
+from django.utils import timezone
+
+from transactions.models import RecurringTransaction, Transaction
+from transactions.services import apply_transaction_changes
+
+GENERATE_BATCH_SIZE = 1000
+
+# A weekend occurrence moved to the previous weekday is due up to two
+# days before its scheduled date.
+LOOKAHEAD = datetime.timedelta(days=2)
+
+
+def add_months(day, months, day_of_month):
+    """Return ``day_of_month`` of the month ``months`` after ``day``'s, clamped."""
+    index = day.year * 12 + day.month - 1 + months
+    year, month = divmod(index, 12)
+    month += 1
+    return datetime.date(year, month, min(day_of_month, calendar.monthrange(year, month)[1]))
+
+
+def first_occurrence(rule, on_or_after):
+    """Return the first scheduled date of a rule on or after a date."""
+    start = rule.start_date
+    if rule.frequency == 'monthly':
+        day_of_month = rule.day_of_month or start.day
+        occurrence = add_months(start, 0, day_of_month)
+        if occurrence < start:
+            occurrence = add_months(start, rule.interval, day_of_month)
+        while occurrence < on_or_after:
+            occurrence = following_occurrence(rule, occurrence)
+        return occurrence
+    step = rule.interval * (7 if rule.frequency == 'weekly' else 1)
+    if on_or_after <= start:
+        return start
+    periods = -(-(on_or_after - start).days // step)
+    return start + datetime.timedelta(days=periods * step)
+
+
+def following_occurrence(rule, occurrence):
+    """Return the scheduled date after ``occurrence``."""
+    if rule.frequency == 'monthly':
+        return add_months(occurrence, rule.interval, rule.day_of_month or rule.start_date.day)
+    step = rule.interval * (7 if rule.frequency == 'weekly' else 1)
+    return occurrence + datetime.timedelta(days=step)
+
+
+def business_day(rule, occurrence):
+    """Return the date a scheduled occurrence is booked on."""
+    weekday = occurrence.weekday()
+    if weekday < 5 or rule.business_day == 'none':
+        return occurrence
+    if rule.business_day == 'following':
+        return occurrence + datetime.timedelta(days=7 - weekday)
+    return occurrence - datetime.timedelta(days=weekday - 4)
+
+
+def schedule(rule):
+    """
+    Set ``next_occurrence`` after the rule was created or edited.
+
+    Resumes after the last occurrence already created, so editing a
+    rule never books a scheduled date twice. A start date in the past
+    makes the next generation create the missed occurrences.
+    """
+    last = (
+        Transaction.objects.filter(recurring_rule=rule)
+        .order_by('-occurrence_date').values_list('occurrence_date', flat=True).first()
+    ) if rule.pk else None
+    after = rule.start_date
+    if last is not None:
+        after = max(after, last + datetime.timedelta(days=1))
+    occurrence = first_occurrence(rule, after)
+    if rule.end_date and occurrence > rule.end_date:
+        occurrence = None
+    rule.next_occurrence = occurrence
+
+
+def due_occurrences(rule, today):
+    """
+    Return the scheduled dates of a rule that are due on ``today``.
+
+    Also moves ``rule.next_occurrence`` past them (to None when the
+    rule has ended).
+    """
+    due = []
+    occurrence = rule.next_occurrence
+    while occurrence is not None and business_day(rule, occurrence) <= today:
+        due.append(occurrence)
+        occurrence = following_occurrence(rule, occurrence)
+        if rule.end_date and occurrence > rule.end_date:
+            occurrence = None
+    rule.next_occurrence = occurrence
+    return due
+
+
+def _generate_batch(rule_ids, today):
+    """Create the due occurrences of some rules; return (rules, transactions)."""
+    with db_transaction.atomic():
+        # Locked and re-checked: a concurrent run that got here first
+        # has already moved next_occurrence past ``today``.
+        rules = list(
+            RecurringTransaction.objects.select_for_update()
+            .filter(pk__in=rule_ids, is_active=True, next_occurrence__lte=today + LOOKAHEAD)
+            .order_by('pk')
+        )
+        transactions = []
+        changed = []
+        for rule in rules:
+            for occurrence in due_occurrences(rule, today):
+                transactions.append(Transaction(
+                    user_id=rule.user_id,
+                    account_id=rule.account_id,
+                    category_id=rule.category_id,
+                    transaction_type=rule.transaction_type,
+                    amount=rule.amount,
+                    date=business_day(rule, occurrence),
+                    description=rule.description,
+                    recurring_rule=rule,
+                    occurrence_date=occurrence,
+                ))
+                changed.append(rule)
+        if not transactions:
+            return 0, 0
+        Transaction.objects.bulk_create(transactions, batch_size=GENERATE_BATCH_SIZE)
+        # Rules due on the same day move to a handful of next dates:
+        # one UPDATE per date.
+        next_dates = defaultdict(set)
+        for rule in changed:
+            next_dates[rule.next_occurrence].add(rule.pk)
+        for next_occurrence, pks in next_dates.items():
+            RecurringTransaction.objects.filter(pk__in=pks).update(next_occurrence=next_occurrence)
+        apply_transaction_changes(added=transactions)
+    return len({rule.pk for rule in changed}), len(transactions)
+
+
+def generate_recurring(today=None, batch_size=GENERATE_BATCH_SIZE):
+    """
+    Create every occurrence due on ``today`` (default: now) for all users.
+
+    Returns ``(rules, transactions)``: how many rules had occurrences
+    due and how many transactions were created. Running it again
+    creates nothing.
+    """
+    today = today or timezone.localdate()
+    rule_ids = list(
+        RecurringTransaction.objects
+        .filter(is_active=True, next_occurrence__lte=today + LOOKAHEAD)
+        .order_by()
+        .values_list('pk', flat=True)
+    )
+    rule_ids.sort()
+    rules = created = 0
+    for start in range(0, len(rule_ids), batch_size):
+        batch_rules, batch_created = _generate_batch(rule_ids[start:start + batch_size], today)
+        rules += batch_rules
+        created += batch_created
+    return rules, created
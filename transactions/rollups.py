@@ -0,0 +1,213 @@
+"""
+Maintenance of the MonthlySummary rollup table.
+
+Every transaction write turns into (key, total, count) deltas that are
+applied with in-database arithmetic in the same DB transaction as the
+write itself, so the rollup never disagrees with committed data. Rows
+are visited in key order, the same lock order for every writer.
+The legs of transfers are not income or expenses and are left out.
+"""
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import IntegrityError, connection, transaction as db_transaction
+from django.db.models import Case, Count, DecimalField, F, IntegerField, Sum, Value, When
+from django.db.models.functions import TruncMonth
+
+from transactions.models import MonthlySummary, Transaction
+
+REBUILD_BATCH_SIZE = 1000
+
+# From this many rows on, deltas are applied with one CASE UPDATE per
+# chunk of BULK_CHUNK_SIZE rows instead of one UPDATE per row (keeps
+# the CASE and the parameter list well under the database limits).
+BULK_MIN_ROWS = 8
+BULK_CHUNK_SIZE = 500
+
+
+def month_start(value):
+    """Return the first day of the month of a date."""
+    return value.replace(day=1)
+
+
+def summary_key(tx):
+    """Return the MonthlySummary key of a transaction (or snapshot)."""
+    return (
+        tx.user_id,
+        tx.account_id,
+        tx.category_id,
+        tx.transaction_type,
+        month_start(tx.date),
+    )
+
+
+def _sort_key(key):
+    user_id, account_id, category_id, transaction_type, year_month = key
+    return (user_id, account_id, category_id or 0, transaction_type, year_month)
+
+
+def summary_deltas(added=(), removed=()):
+    """Return {key: [total, count]} deltas for added/removed transactions."""
+    deltas = defaultdict(lambda: [Decimal('0'), 0])
+    added = [tx for tx in added if tx.transfer_id is None]
+    removed = [tx for tx in removed if tx.transfer_id is None]
+    for tx in added:
+        delta = deltas[summary_key(tx)]
+        delta[0] += Decimal(str(tx.amount))
+        delta[1] += 1
+    for tx in removed:
+        delta = deltas[summary_key(tx)]
+        delta[0] -= Decimal(str(tx.amount))
+        delta[1] -= 1
+    return deltas
+
+
+def _apply_summary_delta(key, total, count):
+    """Add one (total, count) delta to its row, creating it if missing."""
+    user_id, account_id, category_id, transaction_type, year_month = key
+    lookup = {
+        'user_id': user_id,
+        'account_id': account_id,
+        'category_id': category_id,
+        'transaction_type': transaction_type,
+        'year_month': year_month,
+    }
+    changes = {'total': F('total') + total, 'count': F('count') + count}
+    if MonthlySummary.objects.filter(**lookup).update(**changes):
+        return
+    try:
+        with db_transaction.atomic():
+            MonthlySummary.objects.create(total=total, count=count, **lookup)
+    except IntegrityError:
+        MonthlySummary.objects.filter(**lookup).update(**changes)
+
+
+def _apply_summary_chunk(deltas):
+    """
+    Apply many deltas with one SELECT, one CASE UPDATE and one INSERT.
+
+    If a concurrent writer created one of the missing rows first, the
+    missing rows fall back to ``_apply_summary_delta``.
+    """
+    rows = MonthlySummary.objects.filter(
+        user_id__in={key[0] for key in deltas},
+        account_id__in={key[1] for key in deltas},
+        year_month__in={key[4] for key in deltas},
+    ).order_by('pk')
+    if connection.features.has_select_for_update:
+        rows = rows.select_for_update()
+    existing = {}
+    for pk, *key in rows.values_list(
+        'pk', 'user_id', 'account_id', 'category_id', 'transaction_type', 'year_month',
+    ):
+        if tuple(key) in deltas:
+            existing[tuple(key)] = pk
+    if existing:
+        MonthlySummary.objects.filter(pk__in=existing.values()).update(
+            total=F('total') + Case(
+                *[When(pk=pk, then=Value(deltas[key][0])) for key, pk in existing.items()],
+                output_field=DecimalField(max_digits=14, decimal_places=2),
+            ),
+            count=F('count') + Case(
+                *[When(pk=pk, then=Value(deltas[key][1])) for key, pk in existing.items()],
+                output_field=IntegerField(),
+            ),
+        )
+    missing = [key for key in deltas if key not in existing]
+    if not missing:
+        return
+    try:
+        with db_transaction.atomic():
+            MonthlySummary.objects.bulk_create([
+                MonthlySummary(
+                    user_id=key[0],
+                    account_id=key[1],
+                    category_id=key[2],
+                    transaction_type=key[3],
+                    year_month=key[4],
+                    total=deltas[key][0],
+                    count=deltas[key][1],
+                )
+                for key in missing
+            ])
+    except IntegrityError:
+        for key in missing:
+            _apply_summary_delta(key, *deltas[key])
+
+
+def apply_summary_deltas(deltas):
+    """
+    Add each (total, count) delta to its MonthlySummary row.
+
+    Existing rows are changed with one UPDATE; missing rows are created.
+    A concurrent insert of the same key is caught through a savepoint
+    and retried as an UPDATE. From BULK_MIN_ROWS keys on (imports,
+    recurring transactions) the rows are changed in chunks with a CASE
+    UPDATE and a bulk INSERT instead. Must be called inside a
+    transaction.
+    """
+    keys = [key for key in sorted(deltas, key=_sort_key) if any(deltas[key])]
+    if len(keys) < BULK_MIN_ROWS:
+        for key in keys:
+            _apply_summary_delta(key, *deltas[key])
+        return
+    for start in range(0, len(keys), BULK_CHUNK_SIZE):
+        _apply_summary_chunk({key: deltas[key] for key in keys[start:start + BULK_CHUNK_SIZE]})
+
+
+def merge_category_into_uncategorized(category):
+    """
+    Fold a category's rollup rows into the uncategorized rows.
+
+    Call before deleting a category: its transactions become
+    uncategorized (SET_NULL) and the rollup must follow.
+    """
+    rows = list(MonthlySummary.objects.filter(category=category))
+    if not rows:
+        return
+    deltas = defaultdict(lambda: [Decimal('0'), 0])
+    for row in rows:
+        delta = deltas[(row.user_id, row.account_id, None, row.transaction_type, row.year_month)]
+        delta[0] += row.total
+        delta[1] += row.count
+    MonthlySummary.objects.filter(category=category).delete()
+    apply_summary_deltas(deltas)
+
+
+def grouped_summaries(transactions):
+    """Return the MonthlySummary values of a Transaction queryset, grouped."""
+    return (
+        transactions.annotate(year_month=TruncMonth('date'))
+        .values('user_id', 'account_id', 'category_id', 'transaction_type', 'year_month')
+        .annotate(total=Sum('amount'), count=Count('id'))
+        .order_by()
+    )
+
+
+def rebuild_monthly_summaries(user_ids=None):
+    """
+    Regenerate the rollup from the transactions table.
+
+    Rebuilds the given users (or everyone) in one DB transaction per
+    call and returns the number of rollup rows written.
+    """
+    summaries = MonthlySummary.objects.all()
+    transactions = Transaction.objects.filter(transfer__isnull=True)
+    if user_ids is not None:
+        summaries = summaries.filter(user_id__in=user_ids)
+        transactions = transactions.filter(user_id__in=user_ids)
+
+    written = 0
+    with db_transaction.atomic():
+        summaries.delete()
+        batch = []
+        for row in grouped_summaries(transactions).iterator(chunk_size=REBUILD_BATCH_SIZE):
+            batch.append(MonthlySummary(**row))
+            if len(batch) >= REBUILD_BATCH_SIZE:
+                MonthlySummary.objects.bulk_create(batch)
+                written += len(batch)
+                batch = []
+        if batch:
+            MonthlySummary.objects.bulk_create(batch)
+            written += len(batch)
+    return written
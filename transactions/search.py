@@ -0,0 +1,152 @@
+"""
+Full-text search over transaction descriptions for the Finanpy project.
+
+On SQLite the descriptions are indexed by an FTS5 virtual table with
+external content (it stores only the index, the text stays in
+transactions_transaction). Triggers on the transaction table keep it in
+sync, so every write path is covered, including bulk_create, queryset
+update()/delete() and FK cascades. The user id is indexed as a second
+column, so a query only walks the posting lists of that user's rows
+instead of filtering every match in the table. On PostgreSQL the same
+searches use a GIN index on the description's tsvector. Other
+databases fall back to a LIKE scan.
+
+Every word typed is a prefix ("merc" finds "Mercado") and all of them
+must match; results are ordered by relevance (bm25 / ts_rank).
+"""
+import re
+
+from django.db import connections
+from django.db.models import F, Q
+
+FTS_TABLE = 'transactions_transaction_fts'
+
+# Text search configuration used on PostgreSQL.
+SEARCH_CONFIG = 'portuguese'
+
+GIN_INDEX_NAME = 'transaction_description_gin_idx'
+
+# Results shown for a search. Ranked results are not paged: the best
+# matches come first and a longer query narrows them down.
+SEARCH_LIMIT = 50
+
+MAX_TERMS = 8
+
+_SQLITE_TRIGGERS = {
+    f'{FTS_TABLE}_ai': f"""
+        CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai
+        AFTER INSERT ON transactions_transaction BEGIN
+            INSERT INTO {FTS_TABLE}(rowid, user_id, description)
+            VALUES (new.id, new.user_id, new.description);
+        END
+    """,
+    f'{FTS_TABLE}_ad': f"""
+        CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad
+        AFTER DELETE ON transactions_transaction BEGIN
+            INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, user_id, description)
+            VALUES ('delete', old.id, old.user_id, old.description);
+        END
+    """,
+    f'{FTS_TABLE}_au': f"""
+        CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au
+        AFTER UPDATE OF user_id, description ON transactions_transaction BEGIN
+            INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, user_id, description)
+            VALUES ('delete', old.id, old.user_id, old.description);
+            INSERT INTO {FTS_TABLE}(rowid, user_id, description)
+            VALUES (new.id, new.user_id, new.description);
+        END
+    """,
+}
+
+
+def search_terms(text):
+    """Split a search box input into lowercase words."""
+    return re.findall(r'\w+', (text or '').lower())[:MAX_TERMS]
+
+
+def fts_query(user_id, terms):
+    """Return the FTS5 MATCH expression for a user's prefix search."""
+    phrases = ' '.join(f'"{term}"*' for term in terms)
+    return f'user_id : {int(user_id)} AND description : ({phrases})'
+
+
+def search_transactions(queryset, user, text):
+    """
+    Return the transactions of ``queryset`` matching ``text``, best first.
+
+    ``queryset`` must already be limited to ``user``'s transactions (it
+    may carry further filters). Returns an unsliced queryset, or an
+    empty one when the text has no words.
+    """
+    terms = search_terms(text)
+    if not terms:
+        return queryset.none()
+    vendor = connections[queryset.db].vendor
+    if vendor == 'sqlite':
+        return queryset.filter(
+            search_entry__document__match=fts_query(user.pk, terms),
+        ).order_by('search_entry__rank', '-date', '-id')
+    if vendor == 'postgresql':
+        from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+
+        vector = SearchVector('description', config=SEARCH_CONFIG)
+        query = SearchQuery(
+            ' & '.join(f'{term}:*' for term in terms),
+            config=SEARCH_CONFIG,
+            search_type='raw',
+        )
+        return (
+            queryset.annotate(search_vector=vector)
+            .filter(search_vector=query)
+            .annotate(search_rank=SearchRank(F('search_vector'), query))
+            .order_by('-search_rank', '-date', '-id')
+        )
+    match = Q()
+    for term in terms:
+        match &= Q(description__icontains=term)
+    return queryset.filter(match).order_by('-date', '-id')
+
+
+def install_search_index(connection):
+    """
+    Create the search index and its sync triggers if they are missing.
+
+    On SQLite the FTS table is filled from the transactions when it is
+    created or when any trigger was missing (writes may have skipped the
+    index meanwhile). Idempotent; other databases are left alone.
+    """
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT name FROM sqlite_master WHERE name = %s OR (type = 'trigger' AND name IN (%s, %s, %s))",
+            [FTS_TABLE, *_SQLITE_TRIGGERS],
+        )
+        existing = {row[0] for row in cursor.fetchall()}
+        if FTS_TABLE not in existing:
+            cursor.execute(
+                f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5("
+                "user_id, description, "
+                "content='transactions_transaction', content_rowid='id', "
+                "tokenize='unicode61 remove_diacritics 2', prefix='2 3 4')"
+            )
+            # Rank by the description only; the user id column is there
+            # to scope queries.
+            cursor.execute(
+                f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rank) VALUES ('rank', 'bm25(0.0, 1.0)')"
+            )
+        for name, sql in _SQLITE_TRIGGERS.items():
+            if name not in existing:
+                cursor.execute(sql)
+        if not existing.issuperset({FTS_TABLE, *_SQLITE_TRIGGERS}):
+            cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+
+
+def remove_search_index(connection):
+    """Drop the SQLite search index and its triggers."""
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        for name in _SQLITE_TRIGGERS:
+            cursor.execute(f'DROP TRIGGER IF EXISTS {name}')
+        cursor.execute(f'DROP TABLE IF EXISTS {FTS_TABLE}')
@@ -0,0 +1,121 @@
+"""
+Transaction services for the Finanpy project.
+
+Keeps the data derived from transactions in sync with every write:
+the denormalized Account.balance, the MonthlySummary rollup and the
+AccountBalanceSnapshot month-end balances.
+Balances are changed with in-database arithmetic (UPDATE ... SET
+balance = balance + delta) so concurrent writers never lose updates,
+and accounts are always touched in primary-key order so two writers
+moving money between the same pair of accounts cannot deadlock.
+"""
+from collections import defaultdict, namedtuple
+from decimal import Decimal
+
+from django.db import connection
+from django.db.models import Case, DecimalField, F, Value, When
+from django.utils import timezone
+
+from accounts.models import Account
+from core.cache import invalidate_user_data
+from transactions.rollups import (
+    BULK_CHUNK_SIZE,
+    BULK_MIN_ROWS,
+    apply_summary_deltas,
+    summary_deltas,
+)
+from transactions.snapshots import apply_snapshot_deltas, snapshot_deltas
+
+# Minimal, immutable view of the fields that drive derived data
+# (balances, rollups). Used to remember a transaction's state before
+# an edit.
+TransactionSnapshot = namedtuple(
+    'TransactionSnapshot',
+    ['user_id', 'account_id', 'category_id', 'transaction_type', 'amount', 'date', 'transfer_id'],
+)
+
+
+def snapshot(transaction):
+    """Return a TransactionSnapshot with the current state of a transaction."""
+    return TransactionSnapshot(
+        user_id=transaction.user_id,
+        account_id=transaction.account_id,
+        category_id=transaction.category_id,
+        transaction_type=transaction.transaction_type,
+        amount=transaction.amount,
+        date=transaction.date,
+        transfer_id=transaction.transfer_id,
+    )
+
+
+def balance_delta(transaction_type, amount):
+    """Return the signed effect of a transaction on its account balance."""
+    amount = Decimal(str(amount))
+    if transaction_type == 'income':
+        return amount
+    return -amount
+
+
+def apply_balance_deltas(deltas):
+    """
+    Add each delta to its account balance in the database.
+
+    ``deltas`` maps account pk to a Decimal. Each account is changed
+    with a single atomic UPDATE and accounts are visited in ascending
+    pk order, which is the lock order every writer follows. Zero deltas
+    are skipped. ``updated_at`` is bumped so ``reconcile_balances
+    --since`` sees the account. From BULK_MIN_ROWS accounts on, they
+    are locked in pk order and changed with one CASE UPDATE per chunk.
+    Must be called inside a transaction when more than one account is
+    involved.
+    """
+    now = timezone.now()
+    account_ids = sorted(pk for pk, delta in deltas.items() if delta)
+    if len(account_ids) < BULK_MIN_ROWS:
+        for account_id in account_ids:
+            Account.objects.filter(pk=account_id).update(
+                balance=F('balance') + deltas[account_id],
+                updated_at=now,
+            )
+        return
+    for start in range(0, len(account_ids), BULK_CHUNK_SIZE):
+        chunk = account_ids[start:start + BULK_CHUNK_SIZE]
+        if connection.features.has_select_for_update:
+            # A multi-row UPDATE locks rows in plan order; take the
+            # locks in pk order first.
+            list(
+                Account.objects.select_for_update().filter(pk__in=chunk)
+                .order_by('pk').values_list('pk', flat=True)
+            )
+        Account.objects.filter(pk__in=chunk).update(
+            balance=F('balance') + Case(
+                *[When(pk=pk, then=Value(deltas[pk])) for pk in chunk],
+                output_field=DecimalField(max_digits=12, decimal_places=2),
+            ),
+            updated_at=now,
+        )
+
+
+def apply_transaction_changes(added=(), removed=()):
+    """
+    Update balances, rollups and snapshots for transactions added/removed.
+
+    An edit is expressed as removing the old snapshot and adding the
+    new state, so moving a transaction between accounts, categories or
+    months touches both sides, and an edit that stays put costs a single
+    UPDATE per derived row with the net delta. Must be called inside
+    the DB transaction that writes the transactions. The cached data of
+    every affected user is invalidated when that transaction commits.
+    """
+    added = list(added)
+    removed = list(removed)
+    deltas = defaultdict(Decimal)
+    for tx in added:
+        deltas[tx.account_id] += balance_delta(tx.transaction_type, tx.amount)
+    for tx in removed:
+        deltas[tx.account_id] -= balance_delta(tx.transaction_type, tx.amount)
+    apply_balance_deltas(deltas)
+    apply_summary_deltas(summary_deltas(added, removed))
+    apply_snapshot_deltas(snapshot_deltas(added, removed))
+    for user_id in {tx.user_id for tx in added} | {tx.user_id for tx in removed}:
+        invalidate_user_data(user_id)
@@ -0,0 +1,282 @@
+"""
+Account balance snapshots for the Finanpy project.
+
+AccountBalanceSnapshot holds the closing balance of each account at the
+end of each month with activity. The balance on any date is the nearest
+snapshot on or before it (one lookup on the unique (account, month_end)
+index) plus the transactions dated after that snapshot (a short range
+on the (account, date) index), instead of a sum over the account's
+whole history.
+
+Snapshots are built from the MonthlySummary rollup (plus the transfer
+legs, which the rollup leaves out) by ``manage.py snapshot_balances``
+and patched in the same DB transaction as every write that changes a
+transaction dated on or before them.
+"""
+import calendar
+import datetime
+from collections import defaultdict
+from decimal import Decimal
+from itertools import groupby
+
+from django.db import transaction as db_transaction
+from django.db.models import (
+    Case,
+    DateField,
+    DecimalField,
+    F,
+    OuterRef,
+    Subquery,
+    Sum,
+    Value,
+    When,
+    Window,
+)
+from django.db.models.expressions import RowRange
+from django.db.models.functions import Coalesce, TruncMonth
+from django.utils import timezone
+
+from accounts.models import Account
+from transactions.models import AccountBalanceSnapshot, MonthlySummary, Transaction
+
+CENT = Decimal('0.01')
+
+REBUILD_BATCH_SIZE = 1000
+
+
+def month_end(value):
+    """Return the last day of the month of a date."""
+    return value.replace(day=calendar.monthrange(value.year, value.month)[1])
+
+
+def signed_amount():
+    """Return an expression for the amount signed by transaction type."""
+    return Case(
+        When(transaction_type='income', then=F('amount')),
+        default=-F('amount'),
+    )
+
+
+def annotate_balance_as_of(accounts, day, name='balance_as_of'):
+    """
+    Annotate an Account queryset with each account's balance at ``day``.
+
+    The balance is taken at the end of ``day``. Everything is computed
+    in the same query with two correlated subqueries per account, both
+    served by an index.
+    """
+    nearest = AccountBalanceSnapshot.objects.filter(
+        account=OuterRef('pk'),
+        month_end__lte=day,
+    ).order_by('-month_end')
+    accounts = accounts.annotate(
+        _snapshot_end=Coalesce(
+            Subquery(nearest.values('month_end')[:1]),
+            Value(datetime.date.min),
+            output_field=DateField(),
+        ),
+        _snapshot_balance=Coalesce(
+            Subquery(nearest.values('balance')[:1]),
+            F('opening_balance'),
+            output_field=DecimalField(max_digits=14, decimal_places=2),
+        ),
+    )
+    after = (
+        Transaction.objects.filter(
+            account=OuterRef('pk'),
+            date__gt=OuterRef('_snapshot_end'),
+            date__lte=day,
+        )
+        .order_by()
+        .values('account')
+        .annotate(net=Sum(signed_amount()))
+        .values('net')
+    )
+    return accounts.annotate(**{
+        name: F('_snapshot_balance') + Coalesce(
+            Subquery(after),
+            Value(Decimal('0')),
+            output_field=DecimalField(max_digits=14, decimal_places=2),
+        ),
+    })
+
+
+def balances_as_of(accounts, day):
+    """Return {account pk: balance at the end of ``day``} for accounts."""
+    rows = annotate_balance_as_of(accounts, day).values_list('pk', 'balance_as_of')
+    # SQLite sums decimals as floats; round back to cents.
+    return {pk: Decimal(balance).quantize(CENT) for pk, balance in rows}
+
+
+def balance_as_of(account, day):
+    """Return the balance of ``account`` at the end of ``day``."""
+    return balances_as_of(Account.objects.filter(pk=account.pk), day)[account.pk]
+
+
+def running_balances(transactions):
+    """
+    Return {transaction pk: account balance right after it} for a page.
+
+    ``transactions`` is a list of transactions spanning a short date
+    range (a list page). Costs two queries whatever the page depth: the
+    balance of each account on the eve of the oldest date (from the
+    snapshots) and a running SUM() window over the accounts'
+    transactions inside the page's date range, in (date, created_at,
+    id) order. Rows of the range that are not on the page only feed the
+    window; older history is never read.
+    """
+    if not transactions:
+        return {}
+    first_day = min(tx.date for tx in transactions)
+    last_day = max(tx.date for tx in transactions)
+    account_ids = {tx.account_id for tx in transactions}
+    page = {tx.pk for tx in transactions}
+    opening = balances_as_of(
+        Account.objects.filter(pk__in=account_ids),
+        first_day - datetime.timedelta(days=1),
+    )
+    rows = (
+        Transaction.objects.filter(
+            account_id__in=account_ids,
+            date__gte=first_day,
+            date__lte=last_day,
+        )
+        .annotate(running=Window(
+            Sum(signed_amount()),
+            partition_by=F('account_id'),
+            order_by=[F('date').asc(), F('created_at').asc(), F('id').asc()],
+            frame=RowRange(start=None, end=0),
+        ))
+        .order_by('account_id', 'date', 'created_at', 'id')
+        .values_list('pk', 'account_id', 'running')
+    )
+    return {
+        pk: (opening[account_id] + Decimal(running)).quantize(CENT)
+        for pk, account_id, running in rows
+        if pk in page
+    }
+
+
+def snapshot_deltas(added=(), removed=()):
+    """Return {(account_id, month_end): delta} for added/removed transactions."""
+    deltas = defaultdict(Decimal)
+    for sign, transactions in ((1, added), (-1, removed)):
+        for tx in transactions:
+            amount = Decimal(str(tx.amount))
+            if tx.transaction_type != 'income':
+                amount = -amount
+            deltas[(tx.account_id, month_end(tx.date))] += sign * amount
+    return deltas
+
+
+def apply_snapshot_deltas(deltas):
+    """
+    Add each delta to the snapshots from its month onwards.
+
+    A transaction dated in a month is part of the closing balance of
+    that month and of every later one. Transactions of the current
+    month have no snapshot yet, so the UPDATE touches no rows; with
+    several deltas, accounts without a snapshot that late are skipped
+    after one lookup. Must be called inside a transaction.
+    """
+    keys = [key for key in sorted(deltas) if deltas[key]]
+    if len(keys) > 1:
+        # Most writes are after the last snapshot; find the accounts
+        # that have one to patch in a single query.
+        patched = set(
+            AccountBalanceSnapshot.objects.filter(
+                account_id__in={account_id for account_id, _ in keys},
+                month_end__gte=min(month_end for _, month_end in keys),
+            ).order_by().values_list('account_id', flat=True).distinct()
+        )
+        keys = [key for key in keys if key[0] in patched]
+    for account_id, first_month_end in keys:
+        delta = deltas[(account_id, first_month_end)]
+        AccountBalanceSnapshot.objects.filter(
+            account_id=account_id,
+            month_end__gte=first_month_end,
+        ).update(balance=F('balance') + delta)
+
+
+def shift_snapshots(account_id, delta):
+    """Move every snapshot of an account (its opening balance changed)."""
+    if delta:
+        AccountBalanceSnapshot.objects.filter(account_id=account_id).update(
+            balance=F('balance') + delta,
+        )
+
+
+def rebuild_balance_snapshots(user_ids=None, until=None):
+    """
+    Regenerate the snapshots of completed months from the rollup.
+
+    One snapshot is written per account and month with activity, up to
+    ``until`` (default: the end of last month). Closing balances are the
+    opening balance plus the running sum of the monthly net amounts.
+    Transfer legs are not in the rollup, so their monthly net is read
+    from the transactions table and added in. Returns the number of
+    snapshots written.
+    """
+    if until is None:
+        until = timezone.localdate().replace(day=1) - datetime.timedelta(days=1)
+    snapshots = AccountBalanceSnapshot.objects.all()
+    accounts = Account.objects.all()
+    months = MonthlySummary.objects.filter(year_month__lte=until)
+    legs = Transaction.objects.filter(transfer__isnull=False, date__lte=until)
+    if user_ids is not None:
+        snapshots = snapshots.filter(account__user_id__in=user_ids)
+        accounts = accounts.filter(user_id__in=user_ids)
+        months = months.filter(user_id__in=user_ids)
+        legs = legs.filter(user_id__in=user_ids)
+    months = (
+        months.values('account_id', 'year_month')
+        .annotate(net=Sum(Case(
+            When(transaction_type='income', then=F('total')),
+            default=-F('total'),
+        )))
+        .order_by('account_id', 'year_month')
+    )
+    leg_months = defaultdict(dict)
+    for row in (
+        legs.annotate(year_month=TruncMonth('date'))
+        .values('account_id', 'year_month')
+        .annotate(net=Sum(signed_amount()))
+        .order_by()
+    ):
+        leg_months[row['account_id']][row['year_month']] = Decimal(row['net'])
+
+    def account_snapshots(account_id, nets):
+        # nets: {year_month: net} of one account.
+        balance = opening[account_id]
+        for year_month in sorted(nets):
+            balance += Decimal(nets[year_month]).quantize(CENT)
+            yield AccountBalanceSnapshot(
+                account_id=account_id,
+                month_end=month_end(year_month),
+                balance=balance,
+            )
+
+    written = 0
+    with db_transaction.atomic():
+        snapshots.delete()
+        opening = dict(accounts.values_list('pk', 'opening_balance'))
+        batch = []
+        per_account = (
+            (account_id, {row['year_month']: row['net'] for row in rows})
+            for account_id, rows in groupby(months, key=lambda row: row['account_id'])
+        )
+        for account_id, nets in per_account:
+            for year_month, net in leg_months.pop(account_id, {}).items():
+                nets[year_month] = Decimal(nets.get(year_month) or 0) + net
+            batch.extend(account_snapshots(account_id, nets))
+            if len(batch) >= REBUILD_BATCH_SIZE:
+                AccountBalanceSnapshot.objects.bulk_create(batch)
+                written += len(batch)
+                batch = []
+        # Accounts whose only activity is transfers.
+        for account_id, nets in leg_months.items():
+            batch.extend(account_snapshots(account_id, nets))
+        if batch:
+            AccountBalanceSnapshot.objects.bulk_create(batch, batch_size=REBUILD_BATCH_SIZE)
+            written += len(batch)
+    return written
@@ -1,23 +1,99 @@
 """
 Unit tests for the transactions app.
 
-Tests Transaction model, CRUD views, permissions, and TransactionForm.
+Tests Transaction model, CRUD views, permissions, TransactionForm,
+the balance services, recurring transactions and transfers.
 """
+import gzip
+import io
+import os
+import re
+import tempfile
+import threading
+import time
 from decimal import Decimal
 from datetime import date
+from unittest import skipUnless
+from unittest import mock
+from urllib.parse import urlencode
 
+from asgiref.sync import async_to_sync
 from django.contrib.auth import get_user_model
-from django.test import Client, TestCase
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.db import IntegrityError, OperationalError, connection, connections
+from django.test import AsyncRequestFactory, Client, TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
 from accounts.models import Account
+from api.models import Tombstone
 from categories.models import Category
-from transactions.forms import TransactionForm
-from transactions.models import Transaction
+from core import dashboard
+from core.views import AsyncDashboardView
+from transactions.filters import SORT_ORDERINGS
+from transactions.forms import TransactionFilterForm, TransactionForm
+from transactions.importers import (
+    StatementError,
+    StatementImporter,
+    parse_amount,
+    parse_date,
+)
+from transactions import deletion
+from transactions.deletion import run_deletion_job, schedule_account_deletion, schedule_user_deletion
+from transactions.models import (
+    AccountBalanceSnapshot,
+    DeletionJob,
+    MonthlySummary,
+    RecurringTransaction,
+    Transaction,
+    Transfer,
+)
+from transactions.recurring import business_day, due_occurrences, generate_recurring, schedule
+from transactions.rollups import rebuild_monthly_summaries
+from transactions.search import FTS_TABLE, install_search_index, search_transactions
+from transactions.services import (
+    apply_balance_deltas,
+    apply_transaction_changes,
+    balance_delta,
+)
+from transactions.snapshots import (
+    balance_as_of,
+    rebuild_balance_snapshots,
+    running_balances,
+)
+from transactions.transfers import create_transfers
 
 User = get_user_model()
 
 
+def query_plan(sql):
+    """Return the SQLite EXPLAIN QUERY PLAN detail lines for a statement."""
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+        return [row[-1] for row in cursor.fetchall()]
+
+
+def plan_problems(sql):
+    """
+    Return plan lines showing a full table scan or a temp B-tree sort.
+
+    Scans of a subquery's own output (e.g. the rows feeding a window
+    function) are not table scans and are ignored.
+    """
+    return [
+        line for line in query_plan(sql)
+        if 'TEMP B-TREE' in line
+        or (
+            line.startswith('SCAN ')
+            and ' USING ' not in line
+            and not line.startswith('SCAN (subquery-')
+        )
+    ]
+
+
 class TransactionModelTests(TestCase):
     """Tests for the Transaction model."""
 
@@ -165,6 +241,68 @@ class TransactionViewTests(TestCase):
         self.assertEqual(self.transaction_a.description, 'Editado')
         self.assertEqual(self.transaction_a.amount, Decimal('75.00'))
 
+    def test_create_transaction_updates_balance(self):
+        """Creating an income adds its amount to the account balance."""
+        self.client.force_login(self.user_a)
+        self.client.post(reverse('transactions:create'), {
+            'transaction_type': 'income',
+            'account': self.account_a.pk,
+            'category': self.category_a.pk,
+            'amount': '100.00',
+            'date': date.today().isoformat(),
+        })
+        self.account_a.refresh_from_db()
+        self.assertEqual(self.account_a.balance, Decimal('600.00'))
+
+    def test_edit_transaction_applies_net_delta(self):
+        """Editing reverts the stored amount and applies the new one."""
+        self.client.force_login(self.user_a)
+        self.client.post(
+            reverse('transactions:edit', args=[self.transaction_a.pk]),
+            {
+                'transaction_type': 'expense',
+                'account': self.account_a.pk,
+                'category': self.category_a.pk,
+                'amount': '75.00',
+                'date': date.today().isoformat(),
+            },
+        )
+        self.account_a.refresh_from_db()
+        self.assertEqual(self.account_a.balance, Decimal('475.00'))
+
+    def test_edit_transaction_moves_between_accounts(self):
+        """Moving a transaction to another account updates both balances."""
+        other = Account.objects.create(
+            user=self.user_a,
+            name='Conta B',
+            account_type='savings',
+            balance=Decimal('100.00'),
+        )
+        self.client.force_login(self.user_a)
+        self.client.post(
+            reverse('transactions:edit', args=[self.transaction_a.pk]),
+            {
+                'transaction_type': 'income',
+                'account': other.pk,
+                'category': self.category_a.pk,
+                'amount': '20.00',
+                'date': date.today().isoformat(),
+            },
+        )
+        self.account_a.refresh_from_db()
+        other.refresh_from_db()
+        self.assertEqual(self.account_a.balance, Decimal('550.00'))
+        self.assertEqual(other.balance, Decimal('120.00'))
+
+    def test_delete_transaction_reverts_balance(self):
+        """Deleting an expense gives its amount back to the account."""
+        self.client.force_login(self.user_a)
+        self.client.post(
+            reverse('transactions:delete', args=[self.transaction_a.pk])
+        )
+        self.account_a.refresh_from_db()
+        self.assertEqual(self.account_a.balance, Decimal('550.00'))
+
     def test_user_cannot_edit_other_user_transaction(self):
         """User cannot edit another user's transaction (404)."""
         self.client.force_login(self.user_b)
@@ -253,3 +391,2083 @@ class TransactionFormTests(TestCase):
         account_pks = list(form.fields['account'].queryset.values_list('pk', flat=True))
         self.assertIn(self.account.pk, account_pks)
         self.assertNotIn(other_account.pk, account_pks)
+
+
+class ReferenceDataTests(TestCase):
+    """The transaction forms offer accounts and categories from the cache."""
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.user = User.objects.create_user(
+            email='reference@example.com',
+            password='testpass123',
+        )
+        self.account = Account.objects.create(
+            user=self.user, name='Conta', account_type='checking', balance=Decimal('100.00'),
+        )
+        self.category = Category.objects.create(
+            user=self.user, name='Mercado', category_type='expense',
+        )
+        self.client.force_login(self.user)
+
+    def reference_queries(self, queries):
+        return [
+            query['sql'] for query in queries
+            if re.search(r'^SELECT .* FROM "(accounts_account|categories_category)"', query['sql'])
+        ]
+
+    def post_expense(self, **overrides):
+        data = {
+            'transaction_type': 'expense',
+            'account': self.account.pk,
+            'category': self.category.pk,
+            'amount': '10.00',
+            'date': date.today().isoformat(),
+            'description': 'Feira',
+        }
+        data.update(overrides)
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(reverse('transactions:create'), data)
+
+    def test_warm_form_reads_no_reference_data(self):
+        self.client.get(reverse('transactions:create'))
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('transactions:create'))
+        self.assertContains(response, 'Mercado')
+        self.assertEqual(self.reference_queries(queries), [])
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.post_expense()
+        self.assertRedirects(response, reverse('transactions:list'), fetch_redirect_response=False)
+        self.assertEqual(self.reference_queries(queries), [])
+        self.assertEqual(Transaction.objects.get().account, self.account)
+
+    def test_transactions_keep_the_cache_warm(self):
+        self.post_expense()
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse('transactions:create'))
+        self.assertEqual(self.reference_queries(queries), [])
+
+    def test_account_and_category_views_invalidate(self):
+        self.client.get(reverse('transactions:create'))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('accounts:create'), {
+                'name': 'Poupança', 'account_type': 'savings', 'balance': '0.00', 'color': '#06B6D4',
+            })
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('categories:edit', args=[self.category.pk]), {
+                'name': 'Supermercado', 'category_type': 'expense', 'color': '#06B6D4',
+            })
+        response = self.client.get(reverse('transactions:create'))
+        self.assertContains(response, 'Poupança')
+        self.assertContains(response, 'Supermercado')
+
+    def test_ids_missing_from_the_cache_are_looked_up(self):
+        self.client.get(reverse('transactions:create'))
+        # Created without going through the views.
+        other = Account.objects.create(user=self.user, name='Carteira', account_type='cash')
+        response = self.post_expense(account=other.pk)
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(Transaction.objects.get().account, other)
+
+    def test_other_users_ids_are_rejected(self):
+        other_user = User.objects.create_user(email='outro@example.com', password='pass123')
+        other_account = Account.objects.create(
+            user=other_user, name='Outra', account_type='checking',
+        )
+        response = self.post_expense(account=other_account.pk)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('account', response.context['form'].errors)
+        self.assertFalse(Transaction.objects.exists())
+
+
+class BalanceServiceTests(TestCase):
+    """Tests for the in-database balance arithmetic."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email='balance@example.com',
+            password='testpass123',
+        )
+        self.account_a = Account.objects.create(
+            user=self.user,
+            name='A',
+            account_type='checking',
+            balance=Decimal('100.00'),
+        )
+        self.account_b = Account.objects.create(
+            user=self.user,
+            name='B',
+            account_type='checking',
+            balance=Decimal('100.00'),
+        )
+
+    def test_single_account_change_is_one_update(self):
+        """A change on one account costs exactly one UPDATE."""
+        with self.assertNumQueries(1):
+            apply_balance_deltas({self.account_a.pk: Decimal('-30.00')})
+        self.account_a.refresh_from_db()
+        self.assertEqual(self.account_a.balance, Decimal('70.00'))
+
+    def test_accounts_updated_in_pk_order(self):
+        """Multi-account changes are applied in ascending pk order."""
+        deltas = {
+            self.account_b.pk: Decimal('1.00'),
+            self.account_a.pk: Decimal('-1.00'),
+        }
+        with self.assertNumQueries(2) as ctx:
+            apply_balance_deltas(deltas)
+        first, second = (q['sql'] for q in ctx.captured_queries)
+        low, high = sorted([self.account_a.pk, self.account_b.pk])
+        self.assertTrue(first.rstrip().endswith(f'= {low}'))
+        self.assertTrue(second.rstrip().endswith(f'= {high}'))
+
+    def test_zero_delta_is_skipped(self):
+        """Edits that do not change the balance issue no query."""
+        with self.assertNumQueries(0):
+            apply_balance_deltas({self.account_a.pk: Decimal('0')})
+
+
+class ConcurrentBalanceTests(TransactionTestCase):
+    """Stress test: concurrent writers must not lose balance updates."""
+
+    THREADS = 8
+    ITERATIONS = 25
+
+    def setUp(self):
+        user = User.objects.create_user(
+            email='stress@example.com',
+            password='testpass123',
+        )
+        self.account = Account.objects.create(
+            user=user,
+            name='Stress',
+            account_type='checking',
+            balance=Decimal('0'),
+        )
+
+    def test_concurrent_deltas_do_not_drift(self):
+        """N threads adding M deltas each end at exactly N * M."""
+        barrier = threading.Barrier(self.THREADS)
+        errors = []
+
+        def worker():
+            try:
+                barrier.wait()
+                for _ in range(self.ITERATIONS):
+                    apply_balance_deltas({self.account.pk: Decimal('1.00')})
+            except Exception as exc:  # pragma: no cover - surfaced below
+                errors.append(exc)
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=worker) for _ in range(self.THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        self.account.refresh_from_db()
+        self.assertEqual(
+            self.account.balance,
+            Decimal(self.THREADS * self.ITERATIONS),
+        )
+
+
+@skipUnless(connection.vendor == 'sqlite', 'EXPLAIN QUERY PLAN is SQLite syntax')
+class QueryPlanTests(TestCase):
+    """Hot queries must be served by an index, never scan-then-sort."""
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.user = User.objects.create_user(
+            email='plan@example.com',
+            password='testpass123',
+        )
+        account = Account.objects.create(
+            user=self.user,
+            name='Conta',
+            account_type='checking',
+        )
+        category = Category.objects.create(
+            user=self.user,
+            name='Mercado',
+            category_type='expense',
+        )
+        Transaction.objects.bulk_create([
+            Transaction(
+                user=self.user,
+                account=account,
+                category=category,
+                transaction_type='expense' if i % 2 else 'income',
+                amount=Decimal('10.00'),
+                date=date.today(),
+            )
+            for i in range(30)
+        ])
+        self.client.force_login(self.user)
+
+    def assert_view_queries_use_indexes(self, url):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        for query in ctx.captured_queries:
+            if not query['sql'].startswith('SELECT'):
+                continue
+            with self.subTest(sql=query['sql']):
+                self.assertEqual(plan_problems(query['sql']), [])
+
+    def test_transaction_list_uses_indexes(self):
+        """Transaction list queries use indexes for filtering and ordering."""
+        self.assert_view_queries_use_indexes(reverse('transactions:list'))
+
+    def test_transaction_list_cursor_page_uses_indexes(self):
+        """Seeking past a cursor is an index range, not a scan."""
+        first = self.client.get(reverse('transactions:list'))
+        cursor = first.context['page_obj'].next_cursor
+        self.assert_view_queries_use_indexes(
+            reverse('transactions:list') + f'?cursor={cursor}'
+        )
+
+    def test_dashboard_uses_indexes(self):
+        """Dashboard accounts, monthly sums and recent list use indexes."""
+        self.assert_view_queries_use_indexes(reverse('dashboard'))
+
+    def test_category_list_uses_indexes(self):
+        """Category list ordering is served by the composite index."""
+        self.assert_view_queries_use_indexes(reverse('categories:list'))
+
+    def test_filter_and_sort_combinations_use_indexes(self):
+        """Every list filter and sort, first page and next page, is indexed."""
+        account = Account.objects.get(user=self.user)
+        category = Category.objects.get(user=self.user)
+        filter_sets = [
+            {},
+            {'account': account.pk},
+            {'category': category.pk},
+            {'transaction_type': 'expense'},
+            {'date_from': '2025-01-01', 'date_to': '2030-12-31'},
+            {'amount_min': '5', 'amount_max': '50'},
+            {'account': account.pk, 'transaction_type': 'income'},
+            {'category': category.pk, 'date_from': '2025-01-01'},
+            {'account': account.pk, 'category': category.pk, 'amount_min': '1'},
+        ]
+        url = reverse('transactions:list')
+        for sort in SORT_ORDERINGS:
+            for filters in filter_sets:
+                params = {'sort': sort, **filters}
+                with self.subTest(params=params):
+                    response = self.client.get(url, params)
+                    cursor = response.context['page_obj'].next_cursor
+                    self.assertEqual(response.status_code, 200)
+                    self.assert_view_queries_use_indexes(
+                        f'{url}?{urlencode(params)}'
+                    )
+                    if cursor:
+                        self.assert_view_queries_use_indexes(
+                            f'{url}?{urlencode({**params, "cursor": cursor})}'
+                        )
+
+
+class KeysetPaginationTests(TestCase):
+    """Tests for cursor pagination of the transaction list."""
+
+    def setUp(self):
+        self.client = Client()
+        self.user = User.objects.create_user(
+            email='pages@example.com',
+            password='testpass123',
+        )
+        self.account = Account.objects.create(
+            user=self.user,
+            name='Conta',
+            account_type='checking',
+        )
+        # Several rows share a date so ties are broken by created_at/id.
+        Transaction.objects.bulk_create([
+            Transaction(
+                user=self.user,
+                account=self.account,
+                transaction_type='expense',
+                amount=Decimal(i + 1),
+                date=date(2025, 1, 1 + i // 5),
+            )
+            for i in range(45)
+        ])
+        self.client.force_login(self.user)
+        self.url = reverse('transactions:list')
+
+    def walk(self):
+        """Follow next cursors from the first page, returning all pks."""
+        seen = []
+        response = self.client.get(self.url)
+        while True:
+            page = response.context['page_obj']
+            seen.extend(t.pk for t in page)
+            if not page.has_next():
+                return seen
+            response = self.client.get(self.url, {'cursor': page.next_cursor})
+
+    def test_pages_cover_all_rows_once_in_order(self):
+        """Walking the cursors yields every row once, newest first."""
+        expected = list(
+            Transaction.objects.filter(user=self.user)
+            .order_by('-date', '-created_at', '-id')
+            .values_list('pk', flat=True)
+        )
+        self.assertEqual(self.walk(), expected)
+
+    def test_list_never_counts(self):
+        """No COUNT(*) is issued to render a page."""
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get(self.url)
+        self.assertFalse(
+            any('COUNT(' in q['sql'] for q in ctx.captured_queries)
+        )
+
+    def test_deep_page_costs_same_as_first(self):
+        """A deep page issues the same number of queries as page 1."""
+        first = self.client.get(self.url)
+        second = self.client.get(
+            self.url, {'cursor': first.context['page_obj'].next_cursor}
+        )
+        with CaptureQueriesContext(connection) as shallow:
+            self.client.get(self.url)
+        with CaptureQueriesContext(connection) as deep:
+            self.client.get(
+                self.url, {'cursor': second.context['page_obj'].next_cursor}
+            )
+        self.assertEqual(len(deep), len(shallow))
+
+    def test_insert_between_pages_does_not_shift_rows(self):
+        """New rows do not duplicate or skip rows on the next page."""
+        first = self.client.get(self.url).context['page_obj']
+        Transaction.objects.create(
+            user=self.user,
+            account=self.account,
+            transaction_type='income',
+            amount=Decimal('1.00'),
+            date=date(2025, 12, 31),
+        )
+        second = self.client.get(
+            self.url, {'cursor': first.next_cursor}
+        ).context['page_obj']
+        def key(t):
+            return (t.date, t.created_at, t.pk)
+
+        self.assertFalse({t.pk for t in first} & {t.pk for t in second})
+        self.assertLess(key(second.object_list[0]), key(first.object_list[-1]))
+
+    def test_previous_cursor_returns_previous_page(self):
+        """Following next then previous lands on the original page."""
+        first = self.client.get(self.url).context['page_obj']
+        second = self.client.get(
+            self.url, {'cursor': first.next_cursor}
+        ).context['page_obj']
+        back = self.client.get(
+            self.url, {'cursor': second.previous_cursor}
+        ).context['page_obj']
+        self.assertEqual([t.pk for t in back], [t.pk for t in first])
+        self.assertFalse(back.has_previous())
+
+    def test_invalid_cursor_returns_404(self):
+        """A tampered cursor is a 404, like an invalid page number."""
+        response = self.client.get(self.url, {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, 404)
+
+
+class StatementImportTests(TestCase):
+    """Tests for CSV statement parsing and batched import."""
+
+    def setUp(self):
+        self.client = Client()
+        self.user = User.objects.create_user(
+            email='import@example.com',
+            password='testpass123',
+        )
+        self.checking = Account.objects.create(
+            user=self.user,
+            name='Corrente',
+            account_type='checking',
+            balance=Decimal('100.00'),
+        )
+        self.wallet = Account.objects.create(
+            user=self.user,
+            name='Carteira',
+            account_type='cash',
+            balance=Decimal('0'),
+        )
+        self.food = Category.objects.create(
+            user=self.user,
+            name='Alimentação',
+            category_type='expense',
+        )
+
+    def test_parse_amount_pt_br(self):
+        """pt-BR and plain notations parse to the same Decimal."""
+        self.assertEqual(parse_amount('1.234,56'), Decimal('1234.56'))
+        self.assertEqual(parse_amount('1234.56'), Decimal('1234.56'))
+        self.assertEqual(parse_amount('-R$ 10,00'), Decimal('-10.00'))
+        self.assertEqual(parse_amount('(5,50)'), Decimal('-5.50'))
+        with self.assertRaises(StatementError):
+            parse_amount('abc')
+
+    def test_parse_amount_rejects_what_the_field_cannot_hold(self):
+        """Non-finite, exponent, over-precise and too large values are errors."""
+        for text in ('NaN', '-Infinity', '1e3', '10,005', '99999999999999,00', '10000000000'):
+            with self.subTest(text=text), self.assertRaises(StatementError):
+                parse_amount(text)
+        self.assertEqual(parse_amount('9.999.999.999,99'), Decimal('9999999999.99'))
+
+    def test_invalid_amounts_are_row_errors(self):
+        """A bad amount is reported for its line and the rest is imported."""
+        csv_text = 'data;valor;descricao\n01/03/2025;NaN;X\n02/03/2025;10,005;Y\n03/03/2025;-20,00;Z\n'
+        result = StatementImporter(self.user, default_account=self.checking).run(io.StringIO(csv_text))
+        self.assertEqual(result.created, 1)
+        self.assertEqual(result.error_count, 2)
+        self.assertTrue(result.errors[0].startswith('Linha 2:'))
+        self.checking.refresh_from_db()
+        self.assertEqual(self.checking.balance, Decimal('80.00'))
+
+    def test_category_of_the_other_type_is_an_error(self):
+        """An income is not filed under an expense category of the same name."""
+        csv_text = (
+            'data;valor;conta;categoria\n'
+            '01/03/2025;200,00;Corrente;Alimentação\n'
+            '02/03/2025;-30,00;Corrente;Alimentação\n'
+        )
+        result = StatementImporter(self.user).run(io.StringIO(csv_text))
+        self.assertEqual((result.created, result.error_count), (1, 1))
+        self.assertEqual(result.errors, ["Linha 2: Categoria de receita não encontrada: 'Alimentação'."])
+        self.assertEqual(
+            list(Transaction.objects.filter(user=self.user).values_list('transaction_type', 'category')),
+            [('expense', self.food.pk)],
+        )
+
+    def test_parse_date_formats(self):
+        """dd/mm/yyyy and ISO dates are accepted."""
+        self.assertEqual(parse_date('31/01/2025'), date(2025, 1, 31))
+        self.assertEqual(parse_date('2025-01-31'), date(2025, 1, 31))
+        with self.assertRaises(StatementError):
+            parse_date('31-31-2025')
+
+    def test_import_maps_rows_and_updates_balances(self):
+        """Rows resolve account/category names and adjust balances."""
+        csv_text = (
+            'Data;Descrição;Valor;Conta;Categoria\n'
+            '01/02/2025;Mercado;-1.000,50;corrente;alimentacao\n'
+            '02/02/2025;Salário;2.500,00;Corrente;\n'
+            '03/02/2025;Lanche;-10,00;Carteira;Alimentação\n'
+        )
+        result = StatementImporter(self.user).run(io.StringIO(csv_text))
+        self.assertEqual(result.created, 3)
+        self.assertEqual(result.error_count, 0)
+        self.checking.refresh_from_db()
+        self.wallet.refresh_from_db()
+        self.assertEqual(self.checking.balance, Decimal('1599.50'))
+        self.assertEqual(self.wallet.balance, Decimal('-10.00'))
+        market = Transaction.objects.get(description='Mercado')
+        self.assertEqual(market.transaction_type, 'expense')
+        self.assertEqual(market.amount, Decimal('1000.50'))
+        self.assertEqual(market.category, self.food)
+
+    def test_one_balance_update_per_account_per_batch(self):
+        """A batch costs one INSERT plus one UPDATE per touched account."""
+        lines = ['data,valor,tipo'] + [
+            f'0{i % 9 + 1}/03/2025,{i + 1}.00,despesa' for i in range(10)
+        ]
+        importer = StatementImporter(
+            self.user, default_account=self.checking, batch_size=5,
+        )
+        with CaptureQueriesContext(connection) as ctx:
+            result = importer.run(io.StringIO('\n'.join(lines)))
+        statements = [q['sql'] for q in ctx.captured_queries]
+        self.assertEqual(result.created, 10)
+        self.assertEqual(
+            sum(s.startswith('INSERT INTO "transactions_transaction"') for s in statements), 2
+        )
+        self.assertEqual(
+            sum(s.startswith('UPDATE "accounts_account"') for s in statements), 2
+        )
+        self.checking.refresh_from_db()
+        self.assertEqual(self.checking.balance, Decimal('45.00'))
+
+    def test_bad_rows_are_reported_and_skipped(self):
+        """Invalid rows are counted with line numbers; valid ones import."""
+        csv_text = (
+            'data,valor,conta\n'
+            '01/02/2025,10,Inexistente\n'
+            'xx,10,Corrente\n'
+            '01/02/2025,10,Corrente\n'
+        )
+        result = StatementImporter(self.user).run(io.StringIO(csv_text))
+        self.assertEqual(result.created, 1)
+        self.assertEqual(result.error_count, 2)
+        self.assertTrue(result.errors[0].startswith('Linha 2:'))
+
+    def test_missing_account_column_requires_default(self):
+        """Without a conta column a default account is mandatory."""
+        result = StatementImporter(self.user).run(
+            io.StringIO('data,valor\n01/02/2025,10\n')
+        )
+        self.assertEqual(result.created, 0)
+        self.assertEqual(result.error_count, 1)
+
+    def test_upload_view_imports_file(self):
+        """The upload view imports into the default account."""
+        self.client.force_login(self.user)
+        upload = SimpleUploadedFile(
+            'extrato.csv',
+            'data;valor\n01/02/2025;-20,00\n'.encode('latin-1'),
+            content_type='text/csv',
+        )
+        response = self.client.post(reverse('transactions:import'), {
+            'file': upload,
+            'account': self.checking.pk,
+            'encoding': 'latin-1',
+        })
+        self.assertRedirects(response, reverse('transactions:list'))
+        self.checking.refresh_from_db()
+        self.assertEqual(self.checking.balance, Decimal('80.00'))
+
+    def test_management_command_imports_file(self):
+        """import_transactions reads a file path for the given user."""
+        with tempfile.NamedTemporaryFile(
+            'w', suffix='.csv', delete=False, encoding='utf-8'
+        ) as handle:
+            handle.write('data;valor;conta\n01/02/2025;5,00;Carteira\n')
+        self.addCleanup(os.remove, handle.name)
+        out = io.StringIO()
+        call_command(
+            'import_transactions', handle.name,
+            user=self.user.email, batch_size=1, stdout=out,
+        )
+        self.assertIn('1 transação(ões) importada(s)', out.getvalue())
+        self.wallet.refresh_from_db()
+        self.assertEqual(self.wallet.balance, Decimal('5.00'))
+
+
+class TransactionExportTests(TestCase):
+    """Tests for the streaming CSV export."""
+
+    def setUp(self):
+        self.client = Client()
+        self.user = User.objects.create_user(
+            email='export@example.com',
+            password='testpass123',
+        )
+        self.account = Account.objects.create(
+            user=self.user,
+            name='Corrente',
+            account_type='checking',
+        )
+        self.category = Category.objects.create(
+            user=self.user,
+            name='Mercado',
+            category_type='expense',
+        )
+        Transaction.objects.create(
+            user=self.user,
+            account=self.account,
+            category=self.category,
+            transaction_type='expense',
+            amount=Decimal('1234.56'),
+            date=date(2025, 1, 10),
+            description='Compras',
+        )
+        Transaction.objects.create(
+            user=self.user,
+            account=self.account,
+            transaction_type='income',
+            amount=Decimal('10.00'),
+            date=date(2025, 2, 1),
+        )
+        other = User.objects.create_user(
+            email='other-export@example.com',
+            password='testpass123',
+        )
+        Transaction.objects.create(
+            user=other,
+            account=Account.objects.create(
+                user=other, name='X', account_type='cash',
+            ),
+            transaction_type='income',
+            amount=Decimal('99.00'),
+            date=date(2025, 1, 1),
+            description='Alheia',
+        )
+        self.client.force_login(self.user)
+
+    def get_lines(self, params=None):
+        response = self.client.get(reverse('transactions:export'), params or {})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return b''.join(response.streaming_content).decode().splitlines()
+
+    def test_export_streams_own_rows_in_importer_format(self):
+        """Export lists only the user's rows, oldest first, pt-BR format."""
+        lines = self.get_lines()
+        self.assertEqual(lines[0], 'data;descricao;tipo;valor;conta;categoria')
+        self.assertEqual(lines[1], '10/01/2025;Compras;Despesa;1234,56;Corrente;Mercado')
+        self.assertEqual(lines[2], '01/02/2025;;Receita;10,00;Corrente;')
+        self.assertEqual(len(lines), 3)
+
+    def test_export_filters(self):
+        """Date and category filters narrow the export."""
+        self.assertEqual(len(self.get_lines({'date_from': '2025-02-01'})), 2)
+        lines = self.get_lines({'category': self.category.pk})
+        self.assertEqual(len(lines), 2)
+        self.assertIn('Compras', lines[1])
+
+    def test_export_gzip(self):
+        """compress=1 gzips the stream on the fly."""
+        response = self.client.get(reverse('transactions:export'), {'compress': '1'})
+        self.assertEqual(response['Content-Type'], 'application/gzip')
+        body = gzip.decompress(b''.join(response.streaming_content)).decode()
+        self.assertIn('Compras', body)
+
+    def test_export_rejects_other_users_account(self):
+        """Filtering by an account the user does not own is a 400."""
+        other_account = Account.objects.exclude(user=self.user).get()
+        response = self.client.get(
+            reverse('transactions:export'), {'account': other_account.pk}
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_export_reads_in_chunks_with_one_query(self):
+        """Rows and names come from one joined query, never per row."""
+        response = self.client.get(reverse('transactions:export'))
+        with CaptureQueriesContext(connection) as ctx:
+            b''.join(response.streaming_content)
+        self.assertEqual(len(ctx.captured_queries), 1)
+
+    def test_management_command_writes_file(self):
+        """export_transactions writes the same CSV to --output."""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'out.csv.gz')
+            call_command(
+                'export_transactions',
+                user=self.user.email, output=path, gzip=True,
+            )
+            with gzip.open(path, 'rt') as handle:
+                lines = handle.read().splitlines()
+        self.assertEqual(len(lines), 3)
+
+
+class MonthlySummaryTests(TestCase):
+    """The rollup follows every write path and matches a rebuild."""
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.user = User.objects.create_user(
+            email='rollup@example.com',
+            password='testpass123',
+        )
+        self.account = Account.objects.create(
+            user=self.user,
+            name='Corrente',
+            account_type='checking',
+        )
+        self.other_account = Account.objects.create(
+            user=self.user,
+            name='Poupança',
+            account_type='savings',
+        )
+        self.food = Category.objects.create(
+            user=self.user,
+            name='Mercado',
+            category_type='expense',
+        )
+        self.client.force_login(self.user)
+
+    def post_transaction(self, url, **overrides):
+        data = {
+            'transaction_type': 'expense',
+            'account': self.account.pk,
+            'category': self.food.pk,
+            'amount': '100.00',
+            'date': '2025-03-10',
+            'description': 'Compra',
+        }
+        data.update(overrides)
+        return self.client.post(url, data)
+
+    def summary_rows(self):
+        return sorted(
+            MonthlySummary.objects.filter(user=self.user)
+            .exclude(count=0)
+            .values_list(
+                'account_id', 'category_id', 'transaction_type',
+                'year_month', 'total', 'count',
+            )
+        )
+
+    def assert_matches_rebuild(self):
+        live = self.summary_rows()
+        rebuild_monthly_summaries([self.user.pk])
+        self.assertEqual(live, self.summary_rows())
+
+    def test_create_updates_rollup(self):
+        """Creating transactions adds to the month row."""
+        self.post_transaction(reverse('transactions:create'))
+        self.post_transaction(reverse('transactions:create'), amount='50.00')
+        row = MonthlySummary.objects.get(user=self.user)
+        self.assertEqual(row.year_month, date(2025, 3, 1))
+        self.assertEqual(row.total, Decimal('150.00'))
+        self.assertEqual(row.count, 2)
+
+    def test_edit_moves_between_month_account_and_category(self):
+        """An edit moves the amount between rollup rows."""
+        self.post_transaction(reverse('transactions:create'))
+        tx = Transaction.objects.get(user=self.user)
+        self.post_transaction(
+            reverse('transactions:edit', args=[tx.pk]),
+            account=self.other_account.pk,
+            category='',
+            date='2025-04-02',
+            amount='80.00',
+        )
+        self.assertEqual(self.summary_rows(), [
+            (self.other_account.pk, None, 'expense', date(2025, 4, 1), Decimal('80.00'), 1),
+        ])
+        self.assert_matches_rebuild()
+
+    def test_delete_updates_rollup(self):
+        """Deleting a transaction subtracts it from its row."""
+        self.post_transaction(reverse('transactions:create'))
+        tx = Transaction.objects.get(user=self.user)
+        self.client.post(reverse('transactions:delete', args=[tx.pk]))
+        self.assertEqual(self.summary_rows(), [])
+
+    def test_category_delete_folds_into_uncategorized(self):
+        """Deleting a category keeps its totals as uncategorized."""
+        self.post_transaction(reverse('transactions:create'))
+        self.post_transaction(reverse('transactions:create'), category='')
+        self.client.post(reverse('categories:delete', args=[self.food.pk]))
+        self.assertEqual(self.summary_rows(), [
+            (self.account.pk, None, 'expense', date(2025, 3, 1), Decimal('200.00'), 2),
+        ])
+        self.assert_matches_rebuild()
+
+    def test_import_updates_rollup(self):
+        """Bulk imports go through the same rollup maintenance."""
+        csv_text = 'data;valor\n01/03/2025;-10,00\n15/03/2025;-5,00\n01/04/2025;7,00\n'
+        StatementImporter(self.user, default_account=self.account).run(
+            io.StringIO(csv_text)
+        )
+        self.assert_matches_rebuild()
+        self.assertEqual(len(self.summary_rows()), 2)
+
+    def test_rebuild_command(self):
+        """rebuild_monthly_summaries regenerates rows from transactions."""
+        Transaction.objects.create(
+            user=self.user,
+            account=self.account,
+            transaction_type='income',
+            amount=Decimal('10.00'),
+            date=date(2025, 1, 5),
+        )
+        out = io.StringIO()
+        call_command('rebuild_monthly_summaries', stdout=out)
+        self.assertEqual(self.summary_rows(), [
+            (self.account.pk, None, 'income', date(2025, 1, 1), Decimal('10.00'), 1),
+        ])
+
+    def test_dashboard_reads_rollup(self):
+        """Dashboard monthly figures come from the rollup rows."""
+        today = date.today()
+        MonthlySummary.objects.create(
+            user=self.user,
+            account=self.account,
+            transaction_type='income',
+            year_month=today.replace(day=1),
+            total=Decimal('300.00'),
+            count=1,
+        )
+        response = self.client.get(reverse('dashboard'))
+        self.assertEqual(response.context['monthly_income'], Decimal('300.00'))
+        self.assertEqual(response.context['monthly_balance'], Decimal('300.00'))
+
+
+class DashboardCacheTests(TestCase):
+    """The dashboard is cached per user and invalidated by every write."""
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.user = User.objects.create_user(
+            email='cache@example.com',
+            password='testpass123',
+        )
+        self.account = Account.objects.create(
+            user=self.user,
+            name='Corrente',
+            account_type='checking',
+            balance=Decimal('100.00'),
+        )
+        Account.objects.create(
+            user=self.user,
+            name='Poupança',
+            account_type='savings',
+            balance=Decimal('50.00'),
+        )
+        self.client.force_login(self.user)
+
+    def post_transaction(self, **overrides):
+        data = {
+            'transaction_type': 'income',
+            'account': self.account.pk,
+            'amount': '25.00',
+            'date': date.today().isoformat(),
+            'description': 'Salário',
+        }
+        data.update(overrides)
+        return self.client.post(reverse('transactions:create'), data)
+
+    def test_cold_dashboard_queries(self):
+        """A cold dashboard runs one query per block of figures."""
+        self.client.get(reverse('dashboard'))
+        cache.clear()
+        # Session, user, accounts, monthly sums, budgets, recent transactions.
+        with self.assertNumQueries(6):
+            response = self.client.get(reverse('dashboard'))
+        self.assertEqual(response.context['total_balance'], Decimal('150.00'))
+
+    def test_warm_dashboard_skips_dashboard_queries(self):
+        """A warm dashboard reads nothing, not even the session or the user."""
+        self.client.get(reverse('dashboard'))
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('dashboard'))
+        self.assertEqual(response.context['total_balance'], Decimal('150.00'))
+        self.assertEqual(len(response.context['accounts']), 2)
+
+    def test_monthly_figures_in_one_aggregate(self):
+        """Income, expenses and balance come from one conditional aggregate."""
+        self.post_transaction(amount='300.00')
+        self.post_transaction(transaction_type='expense', amount='120.00')
+        response = self.client.get(reverse('dashboard'))
+        self.assertEqual(response.context['monthly_income'], Decimal('300.00'))
+        self.assertEqual(response.context['monthly_expenses'], Decimal('120.00'))
+        self.assertEqual(response.context['monthly_balance'], Decimal('180.00'))
+
+    def test_transaction_write_invalidates_dashboard(self):
+        """Creating a transaction is visible on the next dashboard load."""
+        self.client.get(reverse('dashboard'))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.post_transaction()
+        response = self.client.get(reverse('dashboard'))
+        self.assertEqual(response.context['total_balance'], Decimal('175.00'))
+        self.assertEqual(response.context['monthly_income'], Decimal('25.00'))
+        self.assertEqual(len(response.context['recent_transactions']), 1)
+
+    def test_account_write_invalidates_dashboard(self):
+        """Account create, edit and delete invalidate the cached dashboard."""
+        self.client.get(reverse('dashboard'))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('accounts:create'), {
+                'name': 'Carteira',
+                'account_type': 'cash',
+                'balance': '10.00',
+                'color': '#06b6d4',
+            })
+        response = self.client.get(reverse('dashboard'))
+        self.assertEqual(response.context['total_balance'], Decimal('160.00'))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('accounts:delete', args=[self.account.pk]))
+        response = self.client.get(reverse('dashboard'))
+        self.assertEqual(response.context['total_balance'], Decimal('60.00'))
+
+    def test_cache_is_per_user(self):
+        """Another user's writes leave this user's cached dashboard alone."""
+        other = User.objects.create_user(
+            email='other@example.com',
+            password='testpass123',
+        )
+        self.client.get(reverse('dashboard'))
+        Account.objects.create(
+            user=other, name='Outra', account_type='checking',
+        )
+        with self.assertNumQueries(0):
+            self.client.get(reverse('dashboard'))
+
+
+class AsyncDashboardTests(TransactionTestCase):
+    """The async dashboard gives the same page, reading concurrently."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            email='async@example.com',
+            password='testpass123',
+        )
+        self.account = Account.objects.create(
+            user=self.user,
+            name='Corrente',
+            account_type='checking',
+            balance=Decimal('100.00'),
+        )
+        transaction = Transaction.objects.create(
+            user=self.user,
+            account=self.account,
+            transaction_type='income',
+            amount=Decimal('40.00'),
+            date=date.today(),
+            description='Salário',
+        )
+        apply_transaction_changes(added=[transaction])
+
+    def get(self, user=None):
+        user = user or self.user
+        request = AsyncRequestFactory().get(reverse('dashboard'))
+        request.user = user
+
+        async def auser():
+            return user
+
+        request.auser = auser
+        response = async_to_sync(AsyncDashboardView.as_view())(request)
+        if hasattr(response, 'render'):
+            response.render()
+        return response
+
+    def test_same_figures_as_the_sync_dashboard(self):
+        """Both versions read the same figures."""
+        month_start = date.today().replace(day=1)
+        expected = dashboard.build_dashboard_data(self.user, month_start)
+        response = self.get()
+        self.assertEqual(response.status_code, 200)
+        for name in ('total_balance', 'monthly_income', 'monthly_expenses', 'monthly_balance'):
+            self.assertEqual(response.context_data[name], expected[name])
+        self.assertEqual(response.context_data['accounts'], expected['accounts'])
+        self.assertEqual(
+            response.context_data['recent_transactions'], expected['recent_transactions'],
+        )
+        self.assertContains(response, 'Salário')
+
+    def test_reads_run_concurrently(self):
+        """A cold dashboard waits about as long as its slowest read."""
+        def slow(read):
+            def wrapper(user, month_start):
+                time.sleep(0.2)
+                return read(user, month_start)
+            return wrapper
+
+        reads = tuple(slow(read) for read in dashboard.DASHBOARD_READS)
+        with mock.patch.object(dashboard, 'DASHBOARD_READS', reads):
+            started = time.perf_counter()
+            response = self.get()
+            elapsed = time.perf_counter() - started
+        self.assertEqual(response.status_code, 200)
+        # One after another the reads would take 0.8s.
+        self.assertLess(elapsed, 0.6)
+
+    def test_warm_dashboard_reads_nothing(self):
+        """The async dashboard shares the per-user cache."""
+        self.get()
+        with self.assertNumQueries(0):
+            response = self.get()
+        self.assertEqual(response.context_data['total_balance'], Decimal('140.00'))
+
+    def test_anonymous_user_is_redirected(self):
+        """Anonymous visitors are sent to the login page."""
+        response = self.get(AnonymousUser())
+        self.assertEqual(response.status_code, 302)
+        self.assertIn(reverse('users:login'), response['Location'])
+
+
+class ReconcileBalancesTests(TestCase):
+    """reconcile_balances finds and fixes drifted account balances."""
+
+    def setUp(self):
+        self.client = Client()
+        self.user = User.objects.create_user(
+            email='reconcile@example.com',
+            password='testpass123',
+        )
+        self.client.force_login(self.user)
+        self.client.post(reverse('accounts:create'), {
+            'name': 'Corrente',
+            'account_type': 'checking',
+            'balance': '100.00',
+            'color': '#06b6d4',
+        })
+        self.account = Account.objects.get(user=self.user)
+        for tx_type, amount in (('income', '50.00'), ('expense', '30.00')):
+            self.client.post(reverse('transactions:create'), {
+                'transaction_type': tx_type,
+                'account': self.account.pk,
+                'amount': amount,
+                'date': '2025-03-10',
+            })
+
+    def reconcile(self, *args):
+        out = io.StringIO()
+        call_command('reconcile_balances', '--workers', '1', *args, stdout=out)
+        return out.getvalue()
+
+    def test_view_writes_reconcile(self):
+        """Balances kept by the views match the recomputed ones."""
+        self.account.refresh_from_db()
+        self.assertEqual(self.account.opening_balance, Decimal('100.00'))
+        self.assertEqual(self.account.balance, Decimal('120.00'))
+        self.assertIn('Nenhuma divergência', self.reconcile())
+
+    def test_account_edit_keeps_reconciling(self):
+        """Correcting the balance in the form moves the opening balance."""
+        self.client.post(reverse('accounts:edit', args=[self.account.pk]), {
+            'name': 'Corrente',
+            'account_type': 'checking',
+            'balance': '150.00',
+            'color': '#06b6d4',
+        })
+        self.account.refresh_from_db()
+        self.assertEqual(self.account.opening_balance, Decimal('130.00'))
+        self.assertIn('Nenhuma divergência', self.reconcile())
+
+    def test_reports_drift_without_fixing(self):
+        """Drift from a write that bypassed the services is reported."""
+        Transaction.objects.filter(user=self.user, transaction_type='expense').update(
+            amount=Decimal('40.00'),
+        )
+        output = self.reconcile()
+        self.assertIn('esperado 110.00', output)
+        self.assertIn('1 saldo(s) divergente(s)', output)
+        self.account.refresh_from_db()
+        self.assertEqual(self.account.balance, Decimal('120.00'))
+
+    def test_fix_corrects_drift(self):
+        """--fix applies the correction and a second run is clean."""
+        Account.objects.filter(pk=self.account.pk).update(balance=Decimal('999.00'))
+        self.assertIn('1 saldo(s) corrigido(s)', self.reconcile('--fix'))
+        self.account.refresh_from_db()
+        self.assertEqual(self.account.balance, Decimal('120.00'))
+        self.assertIn('Nenhuma divergência', self.reconcile())
+
+    def test_one_grouped_query_per_chunk(self):
+        """Each user chunk is checked with a single aggregate query."""
+        for i in range(3):
+            user = User.objects.create_user(
+                email=f'chunk{i}@example.com',
+                password='testpass123',
+            )
+            Account.objects.create(user=user, name='Conta', account_type='checking')
+        # Four users in chunks of two: 2 reconcile queries, plus the
+        # user ids from one server-side cursor (PostgreSQL) or 2 keyset
+        # pages and the final empty one.
+        expected = 3 if connection.vendor == 'postgresql' else 5
+        with self.assertNumQueries(expected):
+            self.reconcile('--chunk-size', '2')
+
+    def test_since_skips_untouched_accounts(self):
+        """--since only looks at accounts changed after the given moment."""
+        Account.objects.filter(pk=self.account.pk).update(balance=Decimal('999.00'))
+        self.assertIn('Nenhuma divergência', self.reconcile('--since', '2999-01-01'))
+        self.assertIn('1 saldo(s) divergente(s)', self.reconcile('--since', '2000-01-01'))
+
+    def test_invalid_since(self):
+        """An unparseable --since is a command error."""
+        with self.assertRaises(CommandError):
+            self.reconcile('--since', 'ontem')
+
+
+class ParallelReconcileTests(TransactionTestCase):
+    """Chunks reconciled on the thread pool give the same result."""
+
+    def test_parallel_fix(self):
+        """Drift found by concurrent workers is all reported and fixed."""
+        for i in range(6):
+            user = User.objects.create_user(
+                email=f'parallel{i}@example.com',
+                password='testpass123',
+            )
+            Account.objects.create(
+                user=user,
+                name='Conta',
+                account_type='checking',
+                balance=Decimal(i),
+            )
+        out = io.StringIO()
+        call_command(
+            'reconcile_balances', '--fix', '--workers', '3', '--chunk-size', '1',
+            stdout=out,
+        )
+        self.assertIn('5 saldo(s) corrigido(s)', out.getvalue())
+        self.assertFalse(Account.objects.exclude(balance=0).exists())
+
+
+class BalanceSnapshotTests(TestCase):
+    """Month-end snapshots give past balances and follow every write."""
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.user = User.objects.create_user(
+            email='snapshot@example.com',
+            password='testpass123',
+        )
+        self.client.force_login(self.user)
+        self.client.post(reverse('accounts:create'), {
+            'name': 'Corrente',
+            'account_type': 'checking',
+            'balance': '1000.00',
+            'color': '#06b6d4',
+        })
+        self.account = Account.objects.get(user=self.user)
+        for tx_type, amount, tx_date in (
+            ('income', '500.00', '2025-01-10'),
+            ('expense', '200.00', '2025-01-20'),
+            ('expense', '50.00', '2025-02-05'),
+            ('income', '10.00', '2025-04-01'),
+        ):
+            self.post_transaction(tx_type, amount, tx_date)
+
+    def post_transaction(self, tx_type, amount, tx_date, url=None):
+        return self.client.post(url or reverse('transactions:create'), {
+            'transaction_type': tx_type,
+            'account': self.account.pk,
+            'amount': amount,
+            'date': tx_date,
+        })
+
+    def snapshots(self):
+        return list(
+            AccountBalanceSnapshot.objects.filter(account=self.account)
+            .order_by('month_end')
+            .values_list('month_end', 'balance')
+        )
+
+    def assert_matches_rebuild(self):
+        live = self.snapshots()
+        rebuild_balance_snapshots([self.user.pk], until=date(2025, 12, 31))
+        self.assertEqual(live, self.snapshots())
+
+    def test_rebuild_writes_month_ends(self):
+        """One closing balance per month with activity."""
+        written = rebuild_balance_snapshots([self.user.pk], until=date(2025, 3, 31))
+        self.assertEqual(written, 2)
+        self.assertEqual(self.snapshots(), [
+            (date(2025, 1, 31), Decimal('1300.00')),
+            (date(2025, 2, 28), Decimal('1250.00')),
+        ])
+
+    def test_rebuild_counts_transfers(self):
+        """Transfer legs are not in the rollup but move the closing balances."""
+        savings = Account.objects.create(user=self.user, name='Poupança', account_type='savings')
+        with self.captureOnCommitCallbacks(execute=True):
+            create_transfers([
+                Transfer(user=self.user, from_account=self.account, to_account=savings,
+                         amount=Decimal('300.00'), date=date(2025, 2, 10)),
+                Transfer(user=self.user, from_account=self.account, to_account=savings,
+                         amount=Decimal('30.00'), date=date(2025, 3, 15)),
+            ])
+        written = rebuild_balance_snapshots([self.user.pk], until=date(2025, 3, 31))
+        self.assertEqual(written, 5)
+        self.assertEqual(self.snapshots(), [
+            (date(2025, 1, 31), Decimal('1300.00')),
+            (date(2025, 2, 28), Decimal('950.00')),
+            (date(2025, 3, 31), Decimal('920.00')),
+        ])
+        self.assertEqual(
+            list(savings.balance_snapshots.order_by('month_end').values_list('month_end', 'balance')),
+            [(date(2025, 2, 28), Decimal('300.00')), (date(2025, 3, 31), Decimal('330.00'))],
+        )
+        self.account.refresh_from_db()
+        self.assertEqual(balance_as_of(self.account, date(2025, 12, 31)), self.account.balance)
+
+    def test_balance_as_of(self):
+        """Balance on a date = nearest snapshot + later transactions."""
+        rebuild_balance_snapshots([self.user.pk], until=date(2025, 1, 31))
+        expected = {
+            date(2024, 12, 31): Decimal('1000.00'),
+            date(2025, 1, 15): Decimal('1500.00'),
+            date(2025, 1, 31): Decimal('1300.00'),
+            date(2025, 3, 31): Decimal('1250.00'),
+            date(2025, 4, 1): Decimal('1260.00'),
+        }
+        for day, balance in expected.items():
+            with self.subTest(day=day), self.assertNumQueries(1):
+                self.assertEqual(balance_as_of(self.account, day), balance)
+
+    def test_balance_as_of_without_snapshots(self):
+        """Without snapshots the opening balance is the starting point."""
+        self.assertEqual(
+            balance_as_of(self.account, date(2025, 2, 28)),
+            Decimal('1250.00'),
+        )
+
+    def test_back_dated_writes_patch_snapshots(self):
+        """Creating, editing and deleting old transactions patch snapshots."""
+        rebuild_balance_snapshots([self.user.pk], until=date(2025, 12, 31))
+        self.post_transaction('expense', '100.00', '2025-01-05')
+        self.assert_matches_rebuild()
+        tx = Transaction.objects.get(user=self.user, amount=Decimal('100.00'))
+        self.post_transaction(
+            'income', '30.00', '2025-02-10',
+            url=reverse('transactions:edit', args=[tx.pk]),
+        )
+        self.assert_matches_rebuild()
+        self.client.post(reverse('transactions:delete', args=[tx.pk]))
+        self.assert_matches_rebuild()
+        self.assertEqual(
+            self.snapshots()[0],
+            (date(2025, 1, 31), Decimal('1300.00')),
+        )
+
+    def test_balance_correction_shifts_snapshots(self):
+        """Correcting the account balance moves every snapshot."""
+        rebuild_balance_snapshots([self.user.pk], until=date(2025, 12, 31))
+        self.client.post(reverse('accounts:edit', args=[self.account.pk]), {
+            'name': 'Corrente',
+            'account_type': 'checking',
+            'balance': '1300.00',
+            'color': '#06b6d4',
+        })
+        self.assert_matches_rebuild()
+        self.assertEqual(
+            balance_as_of(self.account, date(2024, 12, 31)),
+            Decimal('1040.00'),
+        )
+
+    def test_snapshot_command(self):
+        """snapshot_balances writes the snapshots of completed months."""
+        out = io.StringIO()
+        call_command('snapshot_balances', stdout=out)
+        self.assertIn('3 saldo(s)', out.getvalue())
+
+    def test_dashboard_month_opening_balance(self):
+        """The dashboard shows the balance at the start of the month."""
+        today = date.today()
+        self.post_transaction('income', '40.00', today.isoformat())
+        response = self.client.get(reverse('dashboard'))
+        self.assertEqual(response.context['total_balance'], Decimal('1300.00'))
+        self.assertEqual(
+            response.context['month_opening_balance'],
+            Decimal('1260.00'),
+        )
+
+
+class RunningBalanceTests(TestCase):
+    """The list shows each account's balance after every transaction."""
+
+    def setUp(self):
+        self.client = Client()
+        self.user = User.objects.create_user(
+            email='running@example.com',
+            password='testpass123',
+        )
+        self.accounts = [
+            Account.objects.create(
+                user=self.user,
+                name=name,
+                account_type='checking',
+                balance=Decimal('100.00'),
+                opening_balance=Decimal('100.00'),
+            )
+            for name in ('A', 'B')
+        ]
+        for i in range(50):
+            tx = Transaction.objects.create(
+                user=self.user,
+                account=self.accounts[i % 2],
+                transaction_type='income' if i % 3 else 'expense',
+                amount=Decimal(i + 1),
+                date=date(2025, 1 + i // 10, 1 + i % 7),
+            )
+            apply_transaction_changes(added=[tx])
+        rebuild_balance_snapshots([self.user.pk], until=date(2025, 2, 28))
+        self.client.force_login(self.user)
+        self.url = reverse('transactions:list')
+
+    def expected_balances(self):
+        balances = {account.pk: account.opening_balance for account in self.accounts}
+        expected = {}
+        for tx in Transaction.objects.filter(user=self.user).order_by('date', 'created_at', 'id'):
+            balances[tx.account_id] += balance_delta(tx.transaction_type, tx.amount)
+            expected[tx.pk] = balances[tx.account_id]
+        return expected
+
+    def test_every_page_matches_full_history(self):
+        """Running balances on every page equal a full replay."""
+        expected = self.expected_balances()
+        response = self.client.get(self.url)
+        while True:
+            page = response.context['page_obj']
+            for tx in page:
+                self.assertEqual(tx.running_balance, expected[tx.pk])
+            if not page.has_next():
+                break
+            response = self.client.get(self.url, {'cursor': page.next_cursor})
+
+    def test_latest_row_matches_account_balance(self):
+        """The newest row of each account shows its current balance."""
+        response = self.client.get(self.url)
+        seen = set()
+        for tx in response.context['transactions']:
+            if tx.account_id not in seen:
+                seen.add(tx.account_id)
+                self.assertEqual(tx.running_balance, tx.account.balance)
+
+    def test_two_queries_whatever_the_depth(self):
+        """The running balances cost two queries on any page."""
+        self.assertEqual(running_balances([]), {})
+        page = list(
+            Transaction.objects.filter(user=self.user)
+            .order_by('-date', '-created_at', '-id')[40:50]
+        )
+        with self.assertNumQueries(2):
+            running_balances(page)
+
+
+class TransactionFilterTests(TestCase):
+    """Tests for the transaction list filters and sorts."""
+
+    def setUp(self):
+        self.client = Client()
+        self.user = User.objects.create_user(
+            email='filters@example.com',
+            password='testpass123',
+        )
+        self.checking = Account.objects.create(
+            user=self.user, name='Corrente', account_type='checking',
+        )
+        self.savings = Account.objects.create(
+            user=self.user, name='Poupança', account_type='savings',
+        )
+        self.food = Category.objects.create(
+            user=self.user, name='Mercado', category_type='expense',
+        )
+        Transaction.objects.bulk_create([
+            Transaction(
+                user=self.user,
+                account=self.checking if i % 2 else self.savings,
+                category=self.food if i % 3 == 0 else None,
+                transaction_type='expense' if i % 4 else 'income',
+                amount=Decimal(i % 7 + 1) * 10,
+                date=date(2025, 1 + i % 12, 1 + i % 28),
+            )
+            for i in range(60)
+        ])
+        self.client.force_login(self.user)
+        self.url = reverse('transactions:list')
+
+    def walk(self, params):
+        """Follow next cursors with the given params, returning all pks."""
+        seen = []
+        response = self.client.get(self.url, params)
+        while True:
+            page = response.context['page_obj']
+            seen.extend(t.pk for t in page)
+            if not page.has_next():
+                return seen
+            response = self.client.get(self.url, {**params, 'cursor': page.next_cursor})
+
+    def expected(self, ordering, **filters):
+        return list(
+            Transaction.objects.filter(user=self.user, **filters)
+            .order_by(*ordering)
+            .values_list('pk', flat=True)
+        )
+
+    def test_filters_combine(self):
+        """Account, category, type, date and amount filters all apply."""
+        params = {
+            'account': self.checking.pk,
+            'transaction_type': 'expense',
+            'date_from': '2025-03-01',
+            'date_to': '2025-10-31',
+            'amount_min': '20',
+            'amount_max': '50',
+        }
+        self.assertEqual(self.walk(params), self.expected(
+            ('-date', '-created_at', '-id'),
+            account=self.checking,
+            transaction_type='expense',
+            date__range=(date(2025, 3, 1), date(2025, 10, 31)),
+            amount__range=(Decimal('20'), Decimal('50')),
+        ))
+
+    def test_category_filter(self):
+        """The category filter keeps only that category's rows."""
+        self.assertEqual(
+            self.walk({'category': self.food.pk}),
+            self.expected(('-date', '-created_at', '-id'), category=self.food),
+        )
+
+    def test_sorts_walk_every_row_in_order(self):
+        """Each sort pages through every row once, in its order."""
+        for sort, ordering in SORT_ORDERINGS.items():
+            with self.subTest(sort=sort):
+                self.assertEqual(self.walk({'sort': sort}), self.expected(ordering))
+
+    def test_running_balance_only_in_date_order(self):
+        """The running balance column is shown for date sorts only."""
+        response = self.client.get(self.url, {'sort': '-amount'})
+        self.assertFalse(response.context['shows_running_balance'])
+        response = self.client.get(self.url, {'sort': 'date'})
+        self.assertTrue(response.context['shows_running_balance'])
+
+    def test_other_users_accounts_are_not_choices(self):
+        """Filtering by another user's account is rejected."""
+        other = User.objects.create_user(email='x@example.com', password='testpass123')
+        foreign = Account.objects.create(user=other, name='X', account_type='checking')
+        form = TransactionFilterForm({'account': foreign.pk}, user=self.user)
+        self.assertFalse(form.is_valid())
+        self.assertIn('account', form.errors)
+
+    def test_inverted_ranges_are_errors(self):
+        """A start after the end is reported on the end field."""
+        form = TransactionFilterForm(
+            {'date_from': '2025-05-01', 'date_to': '2025-04-01',
+             'amount_min': '50', 'amount_max': '10'},
+            user=self.user,
+        )
+        self.assertFalse(form.is_valid())
+        self.assertIn('date_to', form.errors)
+        self.assertIn('amount_max', form.errors)
+
+    def test_empty_filtered_result(self):
+        """No match shows the filtered empty state, not the onboarding one."""
+        response = self.client.get(self.url, {'amount_min': '9999'})
+        self.assertTrue(response.context['is_filtered'])
+        self.assertContains(response, 'Nenhuma transação encontrada')
+
+
+@skipUnless(connection.vendor == 'sqlite', 'The FTS5 index is SQLite only')
+class TransactionSearchTests(TestCase):
+    """Tests for the full-text search over transaction descriptions."""
+
+    def setUp(self):
+        self.client = Client()
+        self.user = User.objects.create_user(
+            email='search@example.com',
+            password='testpass123',
+        )
+        self.other = User.objects.create_user(
+            email='other-search@example.com',
+            password='testpass123',
+        )
+        self.account = Account.objects.create(
+            user=self.user, name='Conta', account_type='checking',
+        )
+        self.other_account = Account.objects.create(
+            user=self.other, name='Conta', account_type='checking',
+        )
+        self.client.force_login(self.user)
+        self.url = reverse('transactions:list')
+
+    def add(self, description, user=None, account=None, transaction_type='expense'):
+        return Transaction.objects.create(
+            user=user or self.user,
+            account=account or self.account,
+            transaction_type=transaction_type,
+            amount=Decimal('10.00'),
+            date=date(2025, 3, 1),
+            description=description,
+        )
+
+    def search(self, text, user=None):
+        user = user or self.user
+        return list(search_transactions(
+            Transaction.objects.filter(user=user), user, text,
+        ).values_list('description', flat=True))
+
+    def test_prefix_and_accent_insensitive(self):
+        """Every word is a prefix and accents are ignored."""
+        self.add('Supermercado Pão de Açúcar')
+        self.add('Farmácia')
+        self.assertEqual(self.search('supermerc'), ['Supermercado Pão de Açúcar'])
+        self.assertEqual(self.search('acuc pao'), ['Supermercado Pão de Açúcar'])
+        self.assertEqual(self.search('FARMACIA'), ['Farmácia'])
+        self.assertEqual(self.search('mercado'), [])
+
+    def test_all_words_must_match(self):
+        """Words are combined with AND."""
+        self.add('Mercado Central')
+        self.add('Mercado Livre')
+        self.assertEqual(self.search('mercado livre'), ['Mercado Livre'])
+
+    def test_ranked_by_relevance(self):
+        """Descriptions where the words weigh more come first."""
+        self.add('Uber viagem para o aeroporto com bagagem extra')
+        self.add('Uber uber')
+        self.assertEqual(self.search('uber')[0], 'Uber uber')
+
+    def test_scoped_to_user(self):
+        """Other users' matching transactions are never returned."""
+        self.add('Aluguel março')
+        self.add('Aluguel março', user=self.other, account=self.other_account)
+        self.assertEqual(len(self.search('aluguel')), 1)
+        self.assertEqual(len(self.search('aluguel', user=self.other)), 1)
+
+    def test_query_syntax_is_escaped(self):
+        """FTS operators and quotes typed by the user are plain words."""
+        self.add('Conta de luz')
+        self.assertEqual(self.search('"luz" :*'), ['Conta de luz'])
+        self.assertEqual(self.search('luz OR gás'), [])
+        self.assertEqual(self.search('  ***  '), [])
+
+    def test_index_follows_every_write_path(self):
+        """Create, bulk_create, updates and deletes all reach the index."""
+        tx = self.add('Padaria')
+        Transaction.objects.bulk_create([
+            Transaction(
+                user=self.user, account=self.account, transaction_type='expense',
+                amount=Decimal('5.00'), date=date(2025, 3, 2), description='Feira',
+            ),
+        ])
+        self.assertEqual(self.search('feira'), ['Feira'])
+
+        tx.description = 'Restaurante'
+        tx.save()
+        self.assertEqual(self.search('padaria'), [])
+        self.assertEqual(self.search('restaurante'), ['Restaurante'])
+
+        Transaction.objects.filter(description='Feira').update(description='Hortifruti')
+        self.assertEqual(self.search('feira'), [])
+        self.assertEqual(self.search('horti'), ['Hortifruti'])
+
+        Transaction.objects.filter(pk=tx.pk).delete()
+        self.assertEqual(self.search('restaurante'), [])
+
+        self.account.delete()
+        self.assertEqual(self.search('horti'), [])
+
+    def test_missing_triggers_are_restored(self):
+        """After a table rebuild drops the triggers, the index is refilled."""
+        with connection.cursor() as cursor:
+            cursor.execute(f'DROP TRIGGER {FTS_TABLE}_ai')
+        self.add('Academia')
+        self.assertEqual(self.search('academia'), [])
+        install_search_index(connection)
+        self.assertEqual(self.search('academia'), ['Academia'])
+        self.add('Academia anual')
+        self.assertEqual(len(self.search('academia')), 2)
+
+    def test_list_search_combines_with_filters(self):
+        """The list search box ranks matches and keeps the other filters."""
+        self.add('Posto de gasolina', transaction_type='income')
+        self.add('Posto de gasolina')
+        self.add('Cinema')
+        response = self.client.get(self.url, {'q': 'posto', 'transaction_type': 'expense'})
+        self.assertEqual(response.status_code, 200)
+        transactions = response.context['transactions']
+        self.assertEqual([t.transaction_type for t in transactions], ['expense'])
+        self.assertFalse(response.context['is_paginated'])
+        self.assertFalse(response.context['shows_running_balance'])
+        self.assertTrue(response.context['is_filtered'])
+        response = self.client.get(self.url, {'q': 'inexistente'})
+        self.assertContains(response, 'Nenhuma transação encontrada')
+
+    def test_search_is_driven_by_the_index(self):
+        """The query starts from the FTS index, not a transaction scan."""
+        self.add('Mercado')
+        queryset = search_transactions(
+            Transaction.objects.filter(user=self.user), self.user, 'merc',
+        )
+        plan = query_plan(str(queryset.query.sql_with_params()[0]).replace('%s', "'x'"))
+        self.assertTrue(plan[0].startswith(f'SCAN {FTS_TABLE} VIRTUAL TABLE'), plan)
+        self.assertIn('USING INTEGER PRIMARY KEY', plan[1])
+
+
+class RecurringTransactionTests(TestCase):
+    """Recurring rules create each due occurrence exactly once."""
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.user = User.objects.create_user(
+            email='recurring@example.com',
+            password='testpass123',
+        )
+        self.account = Account.objects.create(
+            user=self.user,
+            name='Corrente',
+            account_type='checking',
+            balance=Decimal('1000.00'),
+        )
+        self.client.force_login(self.user)
+
+    def make_rule(self, **overrides):
+        data = {
+            'user': self.user,
+            'account': self.account,
+            'transaction_type': 'expense',
+            'amount': Decimal('100.00'),
+            'description': 'Aluguel',
+            'start_date': date(2025, 1, 31),
+        }
+        data.update(overrides)
+        rule = RecurringTransaction(**data)
+        schedule(rule)
+        rule.save()
+        return rule
+
+    def test_monthly_clamps_to_month_end(self):
+        """Day 31 falls on the last day of shorter months."""
+        rule = self.make_rule()
+        self.assertEqual(due_occurrences(rule, date(2025, 4, 30)), [
+            date(2025, 1, 31), date(2025, 2, 28), date(2025, 3, 31), date(2025, 4, 30),
+        ])
+        self.assertEqual(rule.next_occurrence, date(2025, 5, 31))
+
+    def test_interval_and_day_of_month(self):
+        """Every other month on the 10th, from the first one on or after start."""
+        rule = self.make_rule(start_date=date(2025, 1, 15), day_of_month=10, interval=2)
+        self.assertEqual(rule.next_occurrence, date(2025, 3, 10))
+        self.assertEqual(due_occurrences(rule, date(2025, 8, 1)), [
+            date(2025, 3, 10), date(2025, 5, 10), date(2025, 7, 10),
+        ])
+
+    def test_weekly_and_end_date(self):
+        """Weekly rules stop after the end date."""
+        rule = self.make_rule(
+            frequency='weekly', start_date=date(2025, 3, 3), end_date=date(2025, 3, 20),
+        )
+        self.assertEqual(due_occurrences(rule, date(2025, 12, 31)), [
+            date(2025, 3, 3), date(2025, 3, 10), date(2025, 3, 17),
+        ])
+        self.assertIsNone(rule.next_occurrence)
+
+    def test_weekend_adjustment(self):
+        """Weekend occurrences move to the next or previous weekday."""
+        saturday = date(2025, 3, 1)
+        following = self.make_rule(start_date=saturday, business_day='following')
+        preceding = self.make_rule(start_date=saturday, business_day='preceding')
+        unadjusted = self.make_rule(start_date=saturday)
+        self.assertEqual(business_day(following, saturday), date(2025, 3, 3))
+        self.assertEqual(business_day(preceding, saturday), date(2025, 2, 28))
+        self.assertEqual(business_day(unadjusted, saturday), saturday)
+        # Booked on Friday, so already due then.
+        self.assertEqual(due_occurrences(preceding, date(2025, 2, 28)), [saturday])
+
+    def test_generate_books_due_occurrences_once(self):
+        """Generation updates balance and rollup; a rerun creates nothing."""
+        rule = self.make_rule()
+        other = self.make_rule(
+            transaction_type='income', amount=Decimal('50.00'),
+            frequency='daily', interval=10, start_date=date(2025, 3, 1),
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(generate_recurring(date(2025, 3, 31)), (2, 7))
+        self.account.refresh_from_db()
+        self.assertEqual(self.account.balance, Decimal('1000.00') - 300 + 200)
+        self.assertEqual(
+            list(Transaction.objects.filter(recurring_rule=rule).order_by('date')
+                 .values_list('date', flat=True)),
+            [date(2025, 1, 31), date(2025, 2, 28), date(2025, 3, 31)],
+        )
+        other.refresh_from_db()
+        self.assertEqual(other.next_occurrence, date(2025, 4, 10))
+        self.assertEqual(generate_recurring(date(2025, 3, 31)), (0, 0))
+        self.assertEqual(Transaction.objects.count(), 7)
+
+        live = sorted(
+            MonthlySummary.objects.filter(user=self.user)
+            .values_list('category_id', 'transaction_type', 'year_month', 'total', 'count')
+        )
+        rebuild_monthly_summaries([self.user.pk])
+        self.assertEqual(live, sorted(
+            MonthlySummary.objects.filter(user=self.user)
+            .values_list('category_id', 'transaction_type', 'year_month', 'total', 'count')
+        ))
+
+    def test_bulk_paths_match_rebuild(self):
+        """Many rules in one batch take the set-based update paths."""
+        accounts = [
+            Account.objects.create(user=self.user, name=f'Conta {i}', account_type='checking')
+            for i in range(10)
+        ]
+        for i, account in enumerate(accounts):
+            self.make_rule(account=account, start_date=date(2025, 1, 1 + i))
+        generate_recurring(date(2025, 2, 28), batch_size=4)
+        for account in accounts:
+            account.refresh_from_db()
+            self.assertEqual(account.balance, Decimal('-200.00'))
+        live = sorted(MonthlySummary.objects.values_list('account_id', 'year_month', 'total', 'count'))
+        rebuild_monthly_summaries([self.user.pk])
+        self.assertEqual(live, sorted(
+            MonthlySummary.objects.values_list('account_id', 'year_month', 'total', 'count')
+        ))
+        self.assertEqual(len(live), 20)
+
+    def test_occurrence_is_unique(self):
+        """The same scheduled date of a rule cannot be booked twice."""
+        rule = self.make_rule()
+        generate_recurring(date(2025, 1, 31))
+        with self.assertRaises(IntegrityError):
+            Transaction.objects.create(
+                user=self.user, account=self.account, transaction_type='expense',
+                amount=Decimal('1.00'), date=date(2025, 1, 31),
+                recurring_rule=rule, occurrence_date=date(2025, 1, 31),
+            )
+
+    def test_edit_resumes_after_last_occurrence(self):
+        """Rescheduling never books a date that was already created."""
+        rule = self.make_rule()
+        generate_recurring(date(2025, 2, 28))
+        response = self.client.post(reverse('transactions:recurring_edit', args=[rule.pk]), {
+            'transaction_type': 'expense',
+            'account': self.account.pk,
+            'amount': '120.00',
+            'frequency': 'monthly',
+            'interval': 1,
+            'business_day': 'none',
+            'start_date': '2025-01-01',
+            'day_of_month': 28,
+            'is_active': 'on',
+        })
+        self.assertRedirects(response, reverse('transactions:recurring_list'))
+        rule.refresh_from_db()
+        self.assertEqual(rule.next_occurrence, date(2025, 3, 28))
+
+    def test_create_view_schedules_rule(self):
+        """The create view sets the owner and the next occurrence."""
+        response = self.client.post(reverse('transactions:recurring_create'), {
+            'transaction_type': 'income',
+            'account': self.account.pk,
+            'amount': '3000.00',
+            'description': 'Salário',
+            'frequency': 'monthly',
+            'interval': 1,
+            'day_of_month': 5,
+            'business_day': 'following',
+            'start_date': '2025-01-01',
+            'is_active': 'on',
+        })
+        self.assertRedirects(response, reverse('transactions:recurring_list'))
+        rule = RecurringTransaction.objects.get(user=self.user)
+        self.assertEqual(rule.next_occurrence, date(2025, 1, 5))
+        response = self.client.get(reverse('transactions:recurring_list'))
+        self.assertContains(response, 'Salário')
+
+    def test_form_validation(self):
+        """End before start and out-of-range days are rejected."""
+        response = self.client.post(reverse('transactions:recurring_create'), {
+            'transaction_type': 'expense',
+            'account': self.account.pk,
+            'amount': '10.00',
+            'frequency': 'monthly',
+            'interval': 0,
+            'day_of_month': 32,
+            'business_day': 'none',
+            'start_date': '2025-02-01',
+            'end_date': '2025-01-01',
+        })
+        self.assertEqual(response.status_code, 200)
+        form = response.context['form']
+        self.assertEqual(set(form.errors), {'interval', 'day_of_month', 'end_date'})
+        self.assertFalse(RecurringTransaction.objects.exists())
+
+    def test_other_users_rules_are_hidden(self):
+        """Rules of another user give 404."""
+        other = User.objects.create_user(email='other@example.com', password='testpass123')
+        other_account = Account.objects.create(user=other, name='Outra', account_type='checking')
+        rule = self.make_rule(user=other, account=other_account)
+        for name in ('transactions:recurring_edit', 'transactions:recurring_delete'):
+            response = self.client.get(reverse(name, args=[rule.pk]))
+            self.assertEqual(response.status_code, 404)
+
+    def test_delete_keeps_created_transactions(self):
+        """Deleting a rule keeps the transactions it booked."""
+        rule = self.make_rule()
+        generate_recurring(date(2025, 1, 31))
+        self.client.post(reverse('transactions:recurring_delete', args=[rule.pk]))
+        self.assertFalse(RecurringTransaction.objects.exists())
+        self.assertIsNone(Transaction.objects.get().recurring_rule)
+
+    def test_command(self):
+        """generate_recurring reports what it created."""
+        self.make_rule()
+        out = io.StringIO()
+        call_command('generate_recurring', '--date', '2025-02-28', stdout=out)
+        self.assertIn('2 transação(ões) criada(s) a partir de 1 recorrência(s)', out.getvalue())
+        with self.assertRaises(CommandError):
+            call_command('generate_recurring', '--date', 'ontem')
+
+
+class TransferTests(TestCase):
+    """Transfers move money between accounts without being income or expenses."""
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.user = User.objects.create_user(
+            email='transfer@example.com',
+            password='testpass123',
+        )
+        self.checking = Account.objects.create(
+            user=self.user, name='Corrente', account_type='checking', balance=Decimal('1000.00'),
+        )
+        self.savings = Account.objects.create(
+            user=self.user, name='Poupança', account_type='savings', balance=Decimal('0.00'),
+        )
+        self.client.force_login(self.user)
+
+    def transfer(self, **overrides):
+        data = {
+            'from_account': self.checking.pk,
+            'to_account': self.savings.pk,
+            'amount': '300.00',
+            'date': date.today().isoformat(),
+        }
+        data.update(overrides)
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(reverse('transactions:transfer'), data)
+
+    def balances(self):
+        self.checking.refresh_from_db()
+        self.savings.refresh_from_db()
+        return self.checking.balance, self.savings.balance
+
+    def test_transfer_books_both_legs(self):
+        """Both balances move and the legs are an expense and an income."""
+        response = self.transfer()
+        self.assertRedirects(response, reverse('transactions:list'))
+        self.assertEqual(self.balances(), (Decimal('700.00'), Decimal('300.00')))
+        transfer = Transfer.objects.get(user=self.user)
+        self.assertEqual(
+            sorted(transfer.legs.values_list('account_id', 'transaction_type', 'description')),
+            sorted([
+                (self.checking.pk, 'expense', 'Transferência para Poupança'),
+                (self.savings.pk, 'income', 'Transferência de Corrente'),
+            ]),
+        )
+
+    def test_not_income_or_expenses(self):
+        """The dashboard totals and the rollup leave transfers out."""
+        self.transfer()
+        self.assertFalse(MonthlySummary.objects.exists())
+        rebuild_monthly_summaries([self.user.pk])
+        self.assertFalse(MonthlySummary.objects.exists())
+        response = self.client.get(reverse('dashboard'))
+        self.assertEqual(response.context['monthly_income'], Decimal('0'))
+        self.assertEqual(response.context['monthly_expenses'], Decimal('0'))
+        self.assertEqual(response.context['total_balance'], Decimal('1000.00'))
+
+    def test_same_account_is_rejected(self):
+        """Source and destination must differ."""
+        response = self.transfer(to_account=self.checking.pk)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('to_account', response.context['form'].errors)
+        self.assertFalse(Transfer.objects.exists())
+
+    def test_other_users_account_is_rejected(self):
+        """Another user's account is not a valid destination."""
+        other = User.objects.create_user(email='other@example.com', password='testpass123')
+        account = Account.objects.create(user=other, name='Outra', account_type='checking')
+        response = self.transfer(to_account=account.pk)
+        self.assertIn('to_account', response.context['form'].errors)
+        self.assertFalse(Transaction.objects.exists())
+
+    def test_legs_change_only_through_the_transfer(self):
+        """A leg has no edit or delete page of its own."""
+        self.transfer()
+        leg = Transaction.objects.first()
+        for name in ('transactions:edit', 'transactions:delete'):
+            response = self.client.get(reverse(name, args=[leg.pk]))
+            self.assertEqual(response.status_code, 404)
+        response = self.client.get(reverse('transactions:list'))
+        self.assertContains(response, reverse('transactions:transfer_delete', args=[leg.transfer_id]))
+
+    def test_delete_reverts_both_legs(self):
+        """Deleting the transfer removes both legs and restores balances."""
+        self.transfer()
+        transfer = Transfer.objects.get()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('transactions:transfer_delete', args=[transfer.pk]))
+        self.assertEqual(self.balances(), (Decimal('1000.00'), Decimal('0.00')))
+        self.assertFalse(Transaction.objects.exists())
+        self.assertEqual(
+            Tombstone.objects.filter(user=self.user, resource=Tombstone.TRANSACTION).count(), 2,
+        )
+
+    def test_deleting_an_account_keeps_the_other_leg(self):
+        """The other account keeps the money it received."""
+        self.transfer()
+        self.client.post(reverse('accounts:delete', args=[self.checking.pk]))
+        run_deletion_job(DeletionJob.objects.get())
+        transfer = Transfer.objects.get()
+        self.assertIsNone(transfer.from_account)
+        self.assertEqual(self.savings.transactions.get().transfer, transfer)
+        self.savings.refresh_from_db()
+        self.assertEqual(self.savings.balance, Decimal('300.00'))
+
+
+class DeletionJobTests(TestCase):
+    """Accounts and users are deleted in the background, in batches."""
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.user = User.objects.create_user(email='deletion@example.com', password='testpass123')
+        self.account = Account.objects.create(
+            user=self.user, name='Corrente', account_type='checking',
+            balance=Decimal('1000.00'), opening_balance=Decimal('1000.00'),
+        )
+        self.other = Account.objects.create(
+            user=self.user, name='Poupança', account_type='savings',
+            balance=Decimal('0.00'),
+        )
+        self.category = Category.objects.create(user=self.user, name='Mercado', category_type='expense')
+        days = [date(2025, 1, 5), date(2025, 1, 20), date(2025, 2, 3), date(2025, 2, 14), date(2025, 3, 1)]
+        transactions = [
+            Transaction.objects.create(
+                user=self.user, account=self.account, category=self.category,
+                transaction_type='expense', amount=Decimal('10.00') * (index + 1), date=day,
+            )
+            for index, day in enumerate(days)
+        ]
+        kept = Transaction.objects.create(
+            user=self.user, account=self.other, category=self.category,
+            transaction_type='expense', amount=Decimal('5.00'), date=days[0],
+        )
+        apply_transaction_changes(added=[*transactions, kept])
+        self.client.force_login(self.user)
+
+    def assert_consistent(self):
+        """Balances and rollups match the transactions left."""
+        for account in Account.objects.filter(user=self.user):
+            remaining = sum(
+                (balance_delta(tx.transaction_type, tx.amount) for tx in account.transactions.all()),
+                Decimal('0'),
+            )
+            self.assertEqual(account.balance, account.opening_balance + remaining)
+        summaries = {
+            (row.account_id, row.year_month): row.total
+            for row in MonthlySummary.objects.filter(user=self.user, count__gt=0)
+        }
+        expected = {}
+        for tx in Transaction.objects.filter(user=self.user):
+            key = (tx.account_id, tx.date.replace(day=1))
+            expected[key] = expected.get(key, Decimal('0')) + tx.amount
+        self.assertEqual(summaries, expected)
+
+    def test_view_only_schedules(self):
+        """The request marks the account and returns; nothing is deleted yet."""
+        rule = RecurringTransaction.objects.create(
+            user=self.user, account=self.account, category=self.category,
+            transaction_type='expense', amount=Decimal('50.00'), description='Aluguel',
+            frequency='monthly', start_date=date(2025, 1, 1), next_occurrence=date(2025, 4, 1),
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse('accounts:delete', args=[self.account.pk]))
+        self.assertRedirects(response, reverse('accounts:list'))
+        job = DeletionJob.objects.get()
+        self.assertEqual((job.kind, job.status, job.label), (DeletionJob.ACCOUNT, DeletionJob.PENDING, 'Corrente'))
+        self.assertEqual(self.account.transactions.count(), 5)
+        self.account.refresh_from_db()
+        self.assertFalse(self.account.is_active)
+        rule.refresh_from_db()
+        self.assertFalse(rule.is_active)
+        # No new transactions on it.
+        form = TransactionForm(user=self.user)
+        self.assertEqual(list(form.fields['account'].queryset), [self.other])
+        response = self.client.post(reverse('transactions:create'), {
+            'account': self.account.pk,
+            'category': self.category.pk,
+            'transaction_type': 'expense',
+            'amount': '1.00',
+            'date': '2025-03-02',
+        })
+        self.assertIn('account', response.context['form'].errors)
+
+    def test_batches_keep_the_data_consistent(self):
+        """After every batch the balances and rollups match what is left."""
+        job = schedule_account_deletion(self.account)
+        seen = []
+
+        def progress(job):
+            seen.append((job.deleted, job.total))
+            self.assert_consistent()
+
+        job = run_deletion_job(job, batch_size=2, progress=progress)
+        self.assertEqual(seen, [(2, 5), (4, 5), (5, 5)])
+        self.assertEqual((job.status, job.deleted, job.progress), (DeletionJob.DONE, 5, 100))
+        self.assertIsNone(job.account)
+        self.assertIsNotNone(job.finished_at)
+        self.assertFalse(Account.objects.filter(pk=self.account.pk).exists())
+        self.assertEqual(
+            list(Tombstone.objects.values_list('resource', 'object_id')),
+            [(Tombstone.ACCOUNT, self.account.pk)],
+        )
+        self.assert_consistent()
+
+    def test_one_plain_delete_per_batch(self):
+        """Transactions go with DELETE ... WHERE id IN, not the ORM collector."""
+        job = schedule_account_deletion(self.account)
+        with CaptureQueriesContext(connection) as queries:
+            run_deletion_job(job, batch_size=2)
+        quote = connection.ops.quote_name
+        batch_delete = f'DELETE FROM {quote(Transaction._meta.db_table)} WHERE {quote("id")} IN ('
+        deletes = [q['sql'] for q in queries if q['sql'].startswith(batch_delete)]
+        self.assertEqual(len(deletes), 3)
+        if connection.vendor == 'sqlite':
+            # Each batch is read from the account index, without a sort.
+            reads = [
+                q['sql'] for q in queries
+                if 'FROM "transactions_transaction"' in q['sql'] and q['sql'].endswith('LIMIT 2')
+            ]
+            self.assertEqual(len(reads), 4)
+            for sql in reads:
+                self.assertEqual(plan_problems(sql), [])
+
+    def test_failed_job_resumes(self):
+        """A batch that fails is rolled back; the next run picks up from there."""
+        job = schedule_account_deletion(self.account)
+        delete_rows = deletion.delete_rows
+        calls = []
+
+        def flaky_delete_rows(model, pks):
+            calls.append(pks)
+            if len(calls) == 2:
+                raise OperationalError('database is locked')
+            return delete_rows(model, pks)
+
+        with mock.patch('transactions.deletion.delete_rows', flaky_delete_rows):
+            job = run_deletion_job(job, batch_size=2)
+        self.assertEqual((job.status, job.deleted, job.error), (DeletionJob.FAILED, 2, 'database is locked'))
+        self.assertEqual(self.account.transactions.count(), 3)
+        self.assert_consistent()
+
+        out = io.StringIO()
+        call_command('process_deletions', '--batch-size', '2', stdout=out)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.deleted, job.total), (DeletionJob.DONE, 5, 5))
+        self.assertIn('Conta Corrente: 5 transação(ões) excluída(s).', out.getvalue())
+        self.assert_consistent()
+
+    def test_imports_skip_accounts_being_deleted(self):
+        """A statement row naming an account being deleted is an error."""
+        schedule_account_deletion(self.account)
+        csv_text = 'data;valor;conta\n01/03/2025;-10,00;Corrente\n02/03/2025;-10,00;Poupança\n'
+        result = StatementImporter(self.user).run(io.StringIO(csv_text))
+        self.assertEqual((result.created, result.error_count), (1, 1))
+        self.assertEqual(self.account.transactions.count(), 5)
+
+    def test_running_job_is_not_claimed_twice(self):
+        """A job another worker holds is left alone."""
+        job = schedule_account_deletion(self.account)
+        DeletionJob.objects.filter(pk=job.pk).update(status=DeletionJob.RUNNING)
+        run_deletion_job(job)
+        self.assertEqual(self.account.transactions.count(), 5)
+
+    def test_user_deletion(self):
+        """The user is logged out at once and deleted with all their data."""
+        job = schedule_user_deletion(self.user)
+        response = self.client.get(reverse('dashboard'))
+        self.assertEqual(response.status_code, 302)
+        other_user = User.objects.create_user(email='other@example.com', password='testpass123')
+
+        call_command('process_deletions', '--batch-size', '2', stdout=io.StringIO())
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.deleted, job.total), (DeletionJob.DONE, 6, 6))
+        self.assertEqual(job.label, 'deletion@example.com')
+        self.assertIsNone(job.user)
+        self.assertFalse(User.objects.filter(email='deletion@example.com').exists())
+        self.assertFalse(Transaction.objects.exists())
+        self.assertFalse(MonthlySummary.objects.exists())
+        self.assertTrue(User.objects.filter(pk=other_user.pk).exists())
@@ -0,0 +1,134 @@
+"""
+Transfers between accounts for the Finanpy project.
+
+A transfer is booked as two Transaction legs: an expense of the source
+account and an income of the destination. ``create_transfers`` books
+any number of transfers in one DB transaction: the transfers and then
+all their legs are bulk-created, and the balances and month-end
+snapshots of every account involved are changed together by
+apply_transaction_changes, which visits the accounts in primary-key
+order, the one lock order every writer follows. Either every leg is
+booked or none is.
+
+Legs are not income or expenses: they are left out of the
+MonthlySummary rollup, so the dashboard and the reports never count a
+transfer twice.
+"""
+import datetime
+from decimal import Decimal, InvalidOperation
+
+from django.db import transaction as db_transaction
+
+from accounts.models import Account
+from transactions.models import Transaction, Transfer
+from transactions.services import apply_transaction_changes
+
+MAX_BULK_TRANSFERS = 500
+
+CENT = Decimal('0.01')
+
+
+def transfer_legs(transfer):
+    """Return the two unsaved legs (outgoing, incoming) of a saved transfer."""
+    common = {
+        'user_id': transfer.user_id,
+        'category': None,
+        'amount': transfer.amount,
+        'date': transfer.date,
+        'transfer': transfer,
+    }
+    return [
+        Transaction(
+            account=transfer.from_account,
+            transaction_type='expense',
+            description=transfer.description or f'Transferência para {transfer.to_account.name}',
+            **common,
+        ),
+        Transaction(
+            account=transfer.to_account,
+            transaction_type='income',
+            description=transfer.description or f'Transferência de {transfer.from_account.name}',
+            **common,
+        ),
+    ]
+
+
+def create_transfers(transfers):
+    """
+    Save unsaved Transfers and book their legs in one DB transaction.
+
+    Returns the transfers, with their primary keys set.
+    """
+    transfers = list(transfers)
+    with db_transaction.atomic():
+        Transfer.objects.bulk_create(transfers)
+        legs = [leg for transfer in transfers for leg in transfer_legs(transfer)]
+        Transaction.objects.bulk_create(legs)
+        apply_transaction_changes(added=legs)
+    return transfers
+
+
+def _parse_amount(value):
+    try:
+        amount = Decimal(str(value))
+    except (InvalidOperation, ValueError):
+        raise ValueError('Informe um valor numérico.')
+    if not amount.is_finite() or amount <= 0:
+        raise ValueError('O valor deve ser maior que zero.')
+    if amount != amount.quantize(CENT) or amount >= Decimal('1e10'):
+        raise ValueError('Use no máximo 10 dígitos e 2 casas decimais.')
+    return amount
+
+
+def parse_transfers(user, items):
+    """
+    Validate API transfer data and return ``(transfers, errors)``.
+
+    ``items`` is a list of dicts with ``from_account``, ``to_account``
+    (account ids), ``amount``, ``date`` (YYYY-MM-DD) and an optional
+    ``description``. The user's accounts are read once, whatever the
+    number of items. ``errors`` maps the index of each invalid item to
+    its ``{field: [messages]}``; the transfers are only meaningful when
+    it is empty.
+    """
+    # Accounts being deleted (see transactions.deletion) take no new
+    # transactions.
+    accounts = Account.objects.filter(user=user, deletion_jobs__isnull=True).in_bulk()
+    transfers = []
+    errors = {}
+    for index, item in enumerate(items):
+        if not isinstance(item, dict):
+            errors[index] = {'__all__': ['Cada transferência deve ser um objeto.']}
+            continue
+        item_errors = {}
+        sides = {}
+        for field in ('from_account', 'to_account'):
+            account = accounts.get(item.get(field)) if isinstance(item.get(field), int) else None
+            if account is None:
+                item_errors[field] = ['Conta inválida.']
+            sides[field] = account
+        if sides['from_account'] is not None and sides['from_account'] == sides['to_account']:
+            item_errors['to_account'] = ['A conta de destino deve ser diferente da de origem.']
+        try:
+            amount = _parse_amount(item.get('amount'))
+        except ValueError as exc:
+            item_errors['amount'] = [str(exc)]
+        try:
+            date = datetime.date.fromisoformat(item.get('date') or '')
+        except (TypeError, ValueError):
+            item_errors['date'] = ['Informe uma data válida (AAAA-MM-DD).']
+        description = item.get('description') or ''
+        if not isinstance(description, str) or len(description) > 255:
+            item_errors['description'] = ['Use um texto de até 255 caracteres.']
+        if item_errors:
+            errors[index] = item_errors
+            continue
+        transfers.append(Transfer(
+            user=user,
+            from_account=sides['from_account'],
+            to_account=sides['to_account'],
+            amount=amount,
+            date=date,
+            description=description,
+        ))
+    return transfers, errors
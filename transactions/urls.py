@@ -4,10 +4,18 @@ URL configuration for the transactions app.
 from django.urls import path
 
 from transactions.views import (
+    RecurringTransactionCreateView,
+    RecurringTransactionDeleteView,
+    RecurringTransactionListView,
+    RecurringTransactionUpdateView,
     TransactionCreateView,
     TransactionDeleteView,
+    TransactionExportView,
+    TransactionImportView,
     TransactionListView,
     TransactionUpdateView,
+    TransferCreateView,
+    TransferDeleteView,
 )
 
 app_name = 'transactions'
@@ -15,6 +23,14 @@ app_name = 'transactions'
 urlpatterns = [
     path('', TransactionListView.as_view(), name='list'),
     path('create/', TransactionCreateView.as_view(), name='create'),
+    path('import/', TransactionImportView.as_view(), name='import'),
+    path('export/', TransactionExportView.as_view(), name='export'),
     path('<int:pk>/edit/', TransactionUpdateView.as_view(), name='edit'),
     path('<int:pk>/delete/', TransactionDeleteView.as_view(), name='delete'),
+    path('transfer/', TransferCreateView.as_view(), name='transfer'),
+    path('transfer/<int:pk>/delete/', TransferDeleteView.as_view(), name='transfer_delete'),
+    path('recurring/', RecurringTransactionListView.as_view(), name='recurring_list'),
+    path('recurring/create/', RecurringTransactionCreateView.as_view(), name='recurring_create'),
+    path('recurring/<int:pk>/edit/', RecurringTransactionUpdateView.as_view(), name='recurring_edit'),
+    path('recurring/<int:pk>/delete/', RecurringTransactionDeleteView.as_view(), name='recurring_delete'),
 ]
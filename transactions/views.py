@@ -2,43 +2,56 @@
 Transaction views for the Finanpy project.
 
 Provides CRUD views for managing transactions and updates account balance
-on create, update, and delete.
+on create, update, and delete (warning when an expense goes over its
+category's budget), transfers between accounts, CRUD views for
+recurring transaction rules, plus CSV statement import and export.
 """
-from decimal import Decimal
+import io
 
 from django.contrib import messages
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.db import transaction as db_transaction
+from django.http import Http404, HttpResponseBadRequest, StreamingHttpResponse
+from django.shortcuts import redirect
 from django.urls import reverse_lazy
-from django.views.generic import CreateView, DeleteView, ListView, UpdateView
+from django.views.generic import CreateView, DeleteView, FormView, ListView, UpdateView, View
 
-from accounts.models import Account
-from transactions.forms import TransactionForm
-from transactions.models import Transaction
-
-
-def _apply_transaction_to_balance(account, transaction_type, amount):
-    """Apply a single transaction effect to account balance."""
-    amount = Decimal(str(amount))
-    if transaction_type == 'income':
-        account.balance += amount
-    else:
-        account.balance -= amount
-    account.save(update_fields=['balance'])
-
-
-def _revert_transaction_from_balance(account, transaction_type, amount):
-    """Revert a transaction effect from account balance."""
-    amount = Decimal(str(amount))
-    if transaction_type == 'income':
-        account.balance -= amount
-    else:
-        account.balance += amount
-    account.save(update_fields=['balance'])
+from api.tombstones import record_deletion
+from budgets.status import over_budget
+from core.pagination import InvalidCursor, KeysetPaginator
+from transactions.exporters import export_queryset, iter_csv, iter_encoded
+from transactions.filters import DEFAULT_SORT, SORT_ORDERINGS, transaction_list_queryset
+from transactions.forms import (
+    RecurringTransactionForm,
+    TransactionExportForm,
+    TransactionFilterForm,
+    TransactionForm,
+    TransactionImportForm,
+    TransferForm,
+)
+from transactions.importers import import_statement
+from transactions.models import RecurringTransaction, Transaction, Transfer
+from transactions.recurring import schedule
+from transactions.search import SEARCH_LIMIT, search_transactions
+from transactions.services import apply_transaction_changes, snapshot
+from transactions.snapshots import running_balances
+from transactions.transfers import create_transfers
 
 
 class TransactionListView(LoginRequiredMixin, ListView):
-    """Display a list of all transactions belonging to the logged-in user."""
+    """
+    Display the logged-in user's transactions, filtered and sorted.
+
+    Uses keyset pagination on the ordering of the chosen sort (see
+    transactions.filters): each page is one indexed range query with no
+    COUNT(*) and no OFFSET, so deep pages cost the same as the first
+    one. In date order, the balance of the account after each row is
+    added with two more queries (see
+    transactions.snapshots.running_balances), also independent of depth.
+    With a search text the filtered transactions are ranked by relevance
+    instead (see transactions.search) and only the best matches are
+    shown, on a single page.
+    """
 
     model = Transaction
     template_name = 'transactions/transaction_list.html'
@@ -46,10 +59,57 @@ class TransactionListView(LoginRequiredMixin, ListView):
     paginate_by = 20
 
     def get_queryset(self):
-        return (
-            Transaction.objects.filter(user=self.request.user)
+        self.filter_form = TransactionFilterForm(self.request.GET, user=self.request.user)
+        filters = dict(self.filter_form.cleaned_data) if self.filter_form.is_valid() else {}
+        self.sort = filters.pop('sort', DEFAULT_SORT)
+        self.search = filters.pop('q', '')
+        self.ordering = SORT_ORDERINGS[self.sort]
+        queryset = (
+            transaction_list_queryset(self.request.user, self.sort, **filters)
             .select_related('account', 'category')
-            .order_by('-date', '-created_at')
+        )
+        if self.search:
+            return search_transactions(queryset, self.request.user, self.search)[:SEARCH_LIMIT]
+        return queryset
+
+    def get_paginate_by(self, queryset):
+        if self.search:
+            return None
+        return super().get_paginate_by(queryset)
+
+    def paginate_queryset(self, queryset, page_size):
+        paginator = KeysetPaginator(queryset, page_size, self.ordering)
+        try:
+            page = paginator.get_page(self.request.GET.get('cursor'))
+        except InvalidCursor:
+            raise Http404('Página inválida.')
+        return paginator, page, page.object_list, page.has_other_pages()
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['filter_form'] = self.filter_form
+        context['is_filtered'] = self.filter_form.is_filtered()
+        context['search'] = self.search
+        context['search_limit'] = SEARCH_LIMIT
+        context['shows_running_balance'] = not self.search and self.sort in ('-date', 'date')
+        if context['shows_running_balance']:
+            transactions = context['transactions']
+            balances = running_balances(transactions)
+            for tx in transactions:
+                tx.running_balance = balances.get(tx.pk)
+        return context
+
+
+def warn_over_budget(request, transaction):
+    """Warn when an expense leaves its category over the month's budget."""
+    if transaction.transaction_type != 'expense' or transaction.category_id is None:
+        return
+    month = transaction.date.replace(day=1)
+    for budget in over_budget(request.user, month, [transaction.category_id]):
+        messages.warning(
+            request,
+            f'Orçamento de {budget.category.name} excedido: '
+            f'R$ {budget.spent} de R$ {budget.amount} em {month:%m/%Y}.',
         )
 
 
@@ -70,18 +130,18 @@ class TransactionCreateView(LoginRequiredMixin, CreateView):
         form.instance.user = self.request.user
         with db_transaction.atomic():
             response = super().form_valid(form)
-            account = form.instance.account
-            _apply_transaction_to_balance(
-                account,
-                form.instance.transaction_type,
-                form.instance.amount,
-            )
+            apply_transaction_changes(added=[self.object])
         messages.success(self.request, 'Transação criada com sucesso!')
+        warn_over_budget(self.request, self.object)
         return response
 
 
 class TransactionUpdateView(LoginRequiredMixin, UpdateView):
-    """Edit an existing transaction and recalculate account balance(s)."""
+    """
+    Edit an existing transaction and recalculate account balance(s).
+
+    The legs of a transfer are not editable on their own.
+    """
 
     model = Transaction
     form_class = TransactionForm
@@ -90,33 +150,38 @@ class TransactionUpdateView(LoginRequiredMixin, UpdateView):
     context_object_name = 'transaction'
 
     def get_queryset(self):
-        return Transaction.objects.filter(user=self.request.user)
+        return Transaction.objects.filter(user=self.request.user, transfer__isnull=True)
 
     def get_form_kwargs(self):
         kwargs = super().get_form_kwargs()
         kwargs['user'] = self.request.user
         return kwargs
 
-    def form_valid(self, form):
-        old = self.object
-        old_account = old.account
-        old_type = old.transaction_type
-        old_amount = old.amount
-        new_account = form.cleaned_data['account']
-        new_type = form.cleaned_data['transaction_type']
-        new_amount = form.cleaned_data['amount']
+    def get_object(self, queryset=None):
+        obj = super().get_object(queryset)
+        # The form mutates the instance during validation, so remember
+        # the stored state before that happens.
+        self.original = snapshot(obj)
+        return obj
 
+    def form_valid(self, form):
         with db_transaction.atomic():
-            _revert_transaction_from_balance(old_account, old_type, old_amount)
             response = super().form_valid(form)
-            account_to_update = Account.objects.get(pk=new_account.pk)
-            _apply_transaction_to_balance(account_to_update, new_type, new_amount)
+            apply_transaction_changes(
+                added=[self.object],
+                removed=[self.original],
+            )
         messages.success(self.request, 'Transação atualizada com sucesso!')
+        warn_over_budget(self.request, self.object)
         return response
 
 
 class TransactionDeleteView(LoginRequiredMixin, DeleteView):
-    """Delete a transaction and revert its effect on account balance."""
+    """
+    Delete a transaction and revert its effect on account balance.
+
+    The legs of a transfer are deleted with their transfer.
+    """
 
     model = Transaction
     template_name = 'transactions/transaction_confirm_delete.html'
@@ -124,16 +189,208 @@ class TransactionDeleteView(LoginRequiredMixin, DeleteView):
     context_object_name = 'transaction'
 
     def get_queryset(self):
-        return Transaction.objects.filter(user=self.request.user)
+        return Transaction.objects.filter(user=self.request.user, transfer__isnull=True)
 
     def form_valid(self, form):
         obj = self.object
         with db_transaction.atomic():
-            _revert_transaction_from_balance(
-                obj.account,
-                obj.transaction_type,
-                obj.amount,
-            )
+            apply_transaction_changes(removed=[obj])
+            record_deletion(obj)
             response = super().form_valid(form)
         messages.success(self.request, 'Transação excluída com sucesso!')
         return response
+
+
+class TransferCreateView(LoginRequiredMixin, CreateView):
+    """Move money between two of the logged-in user's accounts."""
+
+    model = Transfer
+    form_class = TransferForm
+    template_name = 'transactions/transfer_form.html'
+    success_url = reverse_lazy('transactions:list')
+
+    def get_form_kwargs(self):
+        kwargs = super().get_form_kwargs()
+        kwargs['user'] = self.request.user
+        return kwargs
+
+    def form_valid(self, form):
+        form.instance.user = self.request.user
+        self.object = create_transfers([form.instance])[0]
+        messages.success(self.request, 'Transferência realizada com sucesso!')
+        return redirect(self.get_success_url())
+
+
+class TransferDeleteView(LoginRequiredMixin, DeleteView):
+    """Delete a transfer with both legs and revert both balances."""
+
+    model = Transfer
+    template_name = 'transactions/transfer_confirm_delete.html'
+    success_url = reverse_lazy('transactions:list')
+    context_object_name = 'transfer'
+
+    def get_queryset(self):
+        return (
+            Transfer.objects.filter(user=self.request.user)
+            .select_related('from_account', 'to_account')
+        )
+
+    def form_valid(self, form):
+        with db_transaction.atomic():
+            legs = list(self.object.legs.all())
+            apply_transaction_changes(removed=legs)
+            for leg in legs:
+                record_deletion(leg)
+            response = super().form_valid(form)
+        messages.success(self.request, 'Transferência excluída com sucesso!')
+        return response
+
+
+class TransactionImportView(LoginRequiredMixin, FormView):
+    """Import transactions for the logged-in user from a CSV statement."""
+
+    form_class = TransactionImportForm
+    template_name = 'transactions/transaction_import.html'
+    success_url = reverse_lazy('transactions:list')
+
+    def get_form_kwargs(self):
+        kwargs = super().get_form_kwargs()
+        kwargs['user'] = self.request.user
+        return kwargs
+
+    def form_valid(self, form):
+        upload = form.cleaned_data['file']
+        stream = io.TextIOWrapper(
+            upload.file,
+            encoding=form.cleaned_data['encoding'],
+            errors='replace',
+            newline='',
+        )
+        result = import_statement(
+            self.request.user,
+            stream,
+            default_account=form.cleaned_data['account'],
+        )
+        if result.created:
+            messages.success(
+                self.request,
+                f'{result.created} transação(ões) importada(s) com sucesso!',
+            )
+        if result.error_count:
+            messages.warning(
+                self.request,
+                f'{result.error_count} linha(s) ignorada(s). '
+                + ' '.join(result.errors[:5]),
+            )
+        if not result.created:
+            return self.form_invalid(form)
+        return super().form_valid(form)
+
+
+class TransactionExportView(LoginRequiredMixin, View):
+    """
+    Stream the logged-in user's transactions as a CSV download.
+
+    Accepts the TransactionExportForm filters as query parameters. The
+    response is generated row chunk by row chunk, so memory use does not
+    depend on the number of transactions.
+    """
+
+    def get(self, request, *args, **kwargs):
+        form = TransactionExportForm(request.GET, user=request.user)
+        if not form.is_valid():
+            return HttpResponseBadRequest('Filtros inválidos.')
+        data = form.cleaned_data
+        queryset = export_queryset(
+            request.user,
+            date_from=data['date_from'],
+            date_to=data['date_to'],
+            account=data['account'],
+            category=data['category'],
+        )
+        compress = data['compress']
+        response = StreamingHttpResponse(
+            iter_encoded(iter_csv(queryset), compress=compress),
+            content_type='application/gzip' if compress else 'text/csv; charset=utf-8',
+        )
+        filename = 'transacoes.csv.gz' if compress else 'transacoes.csv'
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+
+
+class RecurringTransactionListView(LoginRequiredMixin, ListView):
+    """Display the logged-in user's recurring transactions, next due first."""
+
+    model = RecurringTransaction
+    template_name = 'transactions/recurring_list.html'
+    context_object_name = 'rules'
+
+    def get_queryset(self):
+        return (
+            RecurringTransaction.objects.filter(user=self.request.user)
+            .select_related('account', 'category')
+        )
+
+
+class RecurringTransactionCreateView(LoginRequiredMixin, CreateView):
+    """Create a recurring transaction for the logged-in user."""
+
+    model = RecurringTransaction
+    form_class = RecurringTransactionForm
+    template_name = 'transactions/recurring_form.html'
+    success_url = reverse_lazy('transactions:recurring_list')
+
+    def get_form_kwargs(self):
+        kwargs = super().get_form_kwargs()
+        kwargs['user'] = self.request.user
+        return kwargs
+
+    def form_valid(self, form):
+        form.instance.user = self.request.user
+        schedule(form.instance)
+        messages.success(self.request, 'Recorrência criada com sucesso!')
+        return super().form_valid(form)
+
+
+class RecurringTransactionUpdateView(LoginRequiredMixin, UpdateView):
+    """
+    Edit a recurring transaction of the logged-in user.
+
+    Transactions already created are kept; the new schedule applies from
+    the date after the last one.
+    """
+
+    model = RecurringTransaction
+    form_class = RecurringTransactionForm
+    template_name = 'transactions/recurring_form.html'
+    success_url = reverse_lazy('transactions:recurring_list')
+    context_object_name = 'rule'
+
+    def get_queryset(self):
+        return RecurringTransaction.objects.filter(user=self.request.user)
+
+    def get_form_kwargs(self):
+        kwargs = super().get_form_kwargs()
+        kwargs['user'] = self.request.user
+        return kwargs
+
+    def form_valid(self, form):
+        schedule(form.instance)
+        messages.success(self.request, 'Recorrência atualizada com sucesso!')
+        return super().form_valid(form)
+
+
+class RecurringTransactionDeleteView(LoginRequiredMixin, DeleteView):
+    """Delete a recurring transaction; the transactions it created are kept."""
+
+    model = RecurringTransaction
+    template_name = 'transactions/recurring_confirm_delete.html'
+    success_url = reverse_lazy('transactions:recurring_list')
+    context_object_name = 'rule'
+
+    def get_queryset(self):
+        return RecurringTransaction.objects.filter(user=self.request.user)
+
+    def form_valid(self, form):
+        messages.success(self.request, 'Recorrência excluída com sucesso!')
+        return super().form_valid(form)
@@ -1,7 +1,9 @@
-from django.contrib import admin
+from django.contrib import admin, messages
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 from django.utils.translation import gettext_lazy as _
 
+from transactions.deletion import schedule_user_deletion
+
 from .models import User
 
 
@@ -39,6 +41,9 @@ class UserAdmin(BaseUserAdmin):
     
     # Ordering in list view
     ordering = ('-created_at',)
+
+    # Users with a long history are deleted by process_deletions
+    actions = ('delete_in_background',)
     
     # Read-only fields
     readonly_fields = ('created_at', 'updated_at', 'last_login', 'date_joined')
@@ -80,3 +85,15 @@ class UserAdmin(BaseUserAdmin):
             ),
         }),
     )
+
+    @admin.action(description=_('Excluir em segundo plano'))
+    def delete_in_background(self, request, queryset):
+        """Deactivate the users now and delete them and their data in batches."""
+        users = queryset.exclude(deletion_jobs__kind='user').exclude(pk=request.user.pk)
+        for user in users:
+            schedule_user_deletion(user)
+        self.message_user(
+            request,
+            f'{len(users)} usuário(s) serão excluídos por process_deletions.',
+            messages.SUCCESS,
+        )
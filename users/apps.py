@@ -1,5 +1,22 @@
 from django.apps import AppConfig
+from django.db import transaction as db_transaction
+from django.db.models.signals import post_delete, post_save
+
+
+def forget_cached_user(sender, instance, **kwargs):
+    """Drop the cached user after it changed (password, name, last login...)."""
+    from users.middleware import forget_user
+
+    forget_user(instance.pk)
+    # Also once the change commits, in case a concurrent request cached
+    # the old row in between.
+    user_id = instance.pk
+    db_transaction.on_commit(lambda: forget_user(user_id))
 
 
 class UsersConfig(AppConfig):
     name = 'users'
+
+    def ready(self):
+        post_save.connect(forget_cached_user, sender=self.get_model('User'))
+        post_delete.connect(forget_cached_user, sender=self.get_model('User'))
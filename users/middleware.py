@@ -0,0 +1,85 @@
+"""
+Cached authentication for the Finanpy project.
+
+AuthenticationMiddleware loads the logged-in user on every request.
+CachedAuthenticationMiddleware keeps that user in the cache, so a warm
+request reads neither the session (see SESSION_ENGINE) nor the user
+from the database.
+
+The cache key carries the session's password hash (HASH_SESSION_KEY),
+and a user is only cached after Django has checked that hash against
+the password in the database. A session opened or updated after a
+password change therefore never gets the user cached under the old
+hash, even if the password was changed with ``.update()`` or by
+another process with a cache of its own. The key also carries a
+per-user version, bumped on any save or deletion of the user (see
+users.apps), so sessions still holding the old hash are logged out by
+the next request too.
+"""
+from functools import partial
+
+from asgiref.sync import sync_to_async
+from django.contrib import auth
+from django.contrib.auth.middleware import AuthenticationMiddleware
+from django.core.cache import cache
+from django.utils.functional import SimpleLazyObject
+
+from core.cache import bump_data_version, get_data_version
+
+USER_CACHE_KEY = 'user:{user_id}:auth:{version}:{session_hash}'
+USER_VERSION_KEY = 'user:{user_id}:auth-version'
+
+# Bounds how long a process with its own cache (local memory) can keep
+# a user changed by another process under an unchanged password.
+USER_CACHE_TIMEOUT = 5 * 60
+
+
+def auth_cache_key(user_id, session_hash):
+    """Build the cache key of a user logged in with ``session_hash``."""
+    version = get_data_version(user_id, USER_VERSION_KEY)
+    return USER_CACHE_KEY.format(user_id=user_id, version=version, session_hash=session_hash)
+
+
+def forget_user(user_id):
+    """Make every cached copy of a user unreachable."""
+    bump_data_version(user_id, USER_VERSION_KEY)
+
+
+def get_cached_user(request):
+    """Return the user of ``request``'s session, from the cache if possible."""
+    user_id = request.session.get(auth.SESSION_KEY)
+    session_hash = request.session.get(auth.HASH_SESSION_KEY)
+    if user_id is None or not session_hash:
+        return auth.get_user(request)
+    user = cache.get(auth_cache_key(user_id, session_hash))
+    if user is None:
+        user = auth.get_user(request)
+        if user.is_authenticated:
+            # get_user may have moved the session to a new hash (see
+            # SECRET_KEY_FALLBACKS); cache under the one it verified.
+            key = auth_cache_key(user.pk, request.session[auth.HASH_SESSION_KEY])
+            cache.set(key, user, USER_CACHE_TIMEOUT)
+    return user
+
+
+def get_user(request):
+    """Return the user of ``request``, loading it once per request."""
+    if not hasattr(request, '_cached_user'):
+        request._cached_user = get_cached_user(request)
+    return request._cached_user
+
+
+async def aget_user(request):
+    """Async counterpart of get_user, behind ``request.auser()``."""
+    if not hasattr(request, '_acached_user'):
+        request._acached_user = await sync_to_async(get_cached_user)(request)
+    return request._acached_user
+
+
+class CachedAuthenticationMiddleware(AuthenticationMiddleware):
+    """AuthenticationMiddleware that keeps the logged-in user in the cache."""
+
+    def process_request(self, request):
+        super().process_request(request)
+        request.user = SimpleLazyObject(lambda: get_user(request))
+        request.auser = partial(aget_user, request)
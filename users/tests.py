@@ -1,13 +1,17 @@
 """
 Unit tests for the users app.
 
-Tests User model, authentication views, and UserRegistrationForm.
+Tests User model, authentication views, UserRegistrationForm and the
+cached user lookup.
 """
-from django.contrib.auth import get_user_model
+from django.contrib.auth import HASH_SESSION_KEY, get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
 from django.test import Client, TestCase
 from django.urls import reverse
 
 from users.forms import UserRegistrationForm
+from users.middleware import auth_cache_key
 
 User = get_user_model()
 
@@ -126,6 +130,79 @@ class AuthenticationViewTests(TestCase):
         self.assertRedirects(response, reverse('users:login'))
 
 
+class CachedUserTests(TestCase):
+    """The logged-in user and the session are read from the cache."""
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.user = User.objects.create_user(
+            email='cached@example.com',
+            password='cachedpass123',
+            first_name='Antes',
+        )
+        self.client.post(reverse('users:login'), {
+            'username': 'cached@example.com',
+            'password': 'cachedpass123',
+        })
+
+    def cache_key(self):
+        return auth_cache_key(self.user.pk, self.client.session[HASH_SESSION_KEY])
+
+    def test_warm_request_reads_no_session_or_user(self):
+        """After the first request, auth costs no query."""
+        self.client.get(reverse('users:register'))
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('users:register'))
+        self.assertRedirects(response, reverse('dashboard'), fetch_redirect_response=False)
+
+    def test_user_change_drops_the_cached_copy(self):
+        """Saving the user is seen by the next request."""
+        self.client.get(reverse('users:register'))
+        self.assertIsNotNone(cache.get(self.cache_key()))
+        self.user.first_name = 'Depois'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.save()
+        self.assertIsNone(cache.get(self.cache_key()))
+        response = self.client.get(reverse('dashboard'))
+        self.assertEqual(response.context['user'].first_name, 'Depois')
+
+    def test_password_change_logs_out_other_sessions(self):
+        """Sessions opened with the old password stop working."""
+        self.client.get(reverse('users:register'))
+        self.user.set_password('newpass456!')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.save()
+        response = self.client.get(reverse('dashboard'))
+        self.assertEqual(response.status_code, 302)
+        self.assertIn(reverse('users:login'), response['Location'])
+
+    def test_password_changed_without_signals_misses_the_cache(self):
+        """A session holding the new password hash never gets the old user."""
+        self.client.get(reverse('users:register'))
+        User.objects.filter(pk=self.user.pk).update(
+            password=make_password('newpass456!'),
+            first_name='Depois',
+        )
+        other = Client()
+        other.post(reverse('users:login'), {
+            'username': 'cached@example.com',
+            'password': 'newpass456!',
+        })
+        response = other.get(reverse('dashboard'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['user'].first_name, 'Depois')
+
+    def test_inactive_user_is_not_cached(self):
+        """A deactivated user is logged out and not kept in the cache."""
+        self.user.is_active = False
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.save()
+        response = self.client.get(reverse('dashboard'))
+        self.assertEqual(response.status_code, 302)
+        self.assertIsNone(cache.get(self.cache_key()))
+
+
 class UserRegistrationFormTests(TestCase):
     """Tests for UserRegistrationForm validation."""
 